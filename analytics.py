@@ -0,0 +1,145 @@
+"""
+Delivery analytics for August
+Lead time, cycle time, time in state and weekly throughput from the task state history
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from task_manager import TaskManager
+
+
+ANALYTICS_WEEKS = 12
+PERCENTILES = (("p50", 0.50), ("p85", 0.85))
+
+# Histograms over the window and completions per week, for the team and per agent and priority
+_HISTOGRAMS = " UNION ALL ".join(f"""
+    SELECT '{dim}', {group}, metric, bucket, SUM(count), SUM(hours)
+    FROM flow_stats WHERE week >= :since
+    GROUP BY {group}, metric, bucket
+""" for dim, group in (("all", "''"), ("agent", "agent"), ("priority", "priority")))
+
+_THROUGHPUT = " UNION ALL ".join(f"""
+    SELECT '{dim}', {group}, week, SUM(count)
+    FROM flow_stats WHERE week >= :since AND metric = 'lead_time'
+    GROUP BY {group}, week
+""" for dim, group in (("all", "''"), ("agent", "agent"), ("priority", "priority")))
+
+
+def window_start(weeks: int, now: Optional[datetime] = None) -> str:
+    """Date of the Monday that starts the first of the last `weeks` calendar weeks"""
+    today = (now or datetime.now()).date()
+    return (today - timedelta(days=today.weekday(), weeks=weeks - 1)).isoformat()
+
+
+def summarize(histogram: Dict[int, List[float]]) -> Dict:
+    """
+    Count, mean and percentiles of one flow_stats histogram ({bucket: [count, hours]}).
+    A percentile is the mean of the bucket it falls in, so it is exact to
+    within the bucket width (an hour below a day, up to a week for long waits).
+    """
+    count = sum(n for n, _ in histogram.values())
+    stats = {"count": count, "avg": sum(h for _, h in histogram.values()) / count}
+
+    buckets = sorted(histogram.items())
+    for name, fraction in PERCENTILES:
+        rank, seen = fraction * count, 0
+        for _, (n, hours) in buckets:
+            seen += n
+            if seen >= rank:
+                stats[name] = hours / n
+                break
+    return stats
+
+
+class TeamAnalytics:
+    """
+    Team delivery metrics for one TaskManager.
+
+    The history trigger files every state transition into flow_stats as it is
+    written: a duration histogram per week, metric, agent and priority. A
+    report only sums the histogram rows for its window, so its cost does not
+    depend on how much history has piled up. Reports are still cached until
+    the next history row arrives or a task is deleted or reassigned (or the
+    window rolls over to a new week).
+    """
+
+    def __init__(self, task_manager: TaskManager):
+        self.task_manager = task_manager
+        self._cache: Dict[int, Tuple[Tuple, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def team_metrics(self, weeks: int = ANALYTICS_WEEKS) -> Dict:
+        """
+        Lead time, cycle time, time in state and throughput for the last `weeks` weeks.
+
+        Durations are in hours, as {count, avg, p50, p85} for the whole team
+        ("all") and per agent and priority:
+
+            {"since": "2026-07-27", "weeks": 12,
+             "lead_time": {"all": stats, "agent": {name: stats}, "priority": {...}},
+             "cycle_time": {...},
+             "time_in_state": {"IN_PROGRESS": {...}, ...},
+             "throughput": {"all": {week: n}, "agent": {name: {week: n}}, "priority": {...}}}
+
+        Lead time runs from creation to a task's first DONE, cycle time from its
+        first IN_PROGRESS to that DONE; throughput counts first completions.
+        """
+        since = window_start(weeks)
+
+        with self.task_manager.db.reader() as conn:
+            key = (since,) + conn.execute("""
+                SELECT (SELECT MAX(id) FROM task_history),
+                       (SELECT MAX(id) FROM task_history_archive),
+                       (SELECT COALESCE(SUM(count), 0) FROM flow_stats),  -- Moves on deletes too
+                       (SELECT MAX(seq) FROM task_changes)  -- Moves on reassignments too
+            """).fetchone()
+            with self._lock:
+                cached = self._cache.get(weeks)
+            if cached and cached[0] == key:
+                return cached[1]
+
+            histograms = conn.execute(_HISTOGRAMS, {"since": since}).fetchall()
+            completions = conn.execute(_THROUGHPUT, {"since": since}).fetchall()
+
+        metrics = {
+            "since": since,
+            "weeks": weeks,
+            "lead_time": {"all": None, "agent": {}, "priority": {}},
+            "cycle_time": {"all": None, "agent": {}, "priority": {}},
+            "time_in_state": {},
+            "throughput": {"all": {}, "agent": {}, "priority": {}},
+        }
+
+        collected: Dict[Tuple[str, str, str], Dict[int, List[float]]] = {}
+        for dim, group, metric, bucket, count, hours in histograms:
+            collected.setdefault((metric, dim, group), {})[bucket] = [count, hours]
+
+        for (metric, dim, group), histogram in sorted(collected.items()):
+            if metric.startswith("state:"):
+                target = metrics["time_in_state"].setdefault(
+                    metric.split(":", 1)[1], {"all": None, "agent": {}, "priority": {}}
+                )
+            else:
+                target = metrics[metric]
+
+            if dim == "all":
+                target["all"] = summarize(histogram)
+            else:
+                target[dim][group] = summarize(histogram)
+
+        for dim, group, week, count in completions:
+            if dim == "all":
+                metrics["throughput"]["all"][week] = count
+            else:
+                metrics["throughput"][dim].setdefault(group, {})[week] = count
+
+        with self._lock:
+            self._cache[weeks] = (key, metrics)
+        return metrics
+
+    def clear(self):
+        """Drop cached reports"""
+        with self._lock:
+            self._cache.clear()
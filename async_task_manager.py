@@ -0,0 +1,54 @@
+"""
+Non-blocking facade over TaskManager for asyncio code
+Runs every database call on a dedicated thread pool so the event loop never waits on SQLite
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from task_manager import TaskManager
+
+
+class AsyncTaskManager:
+    """
+    Awaitable version of TaskManager.
+
+    Every public TaskManager method is available under the same name as a
+    coroutine, e.g. `await store.get_tasks_by_state(TaskState.REVIEW)`.
+    Calls run on a small executor sized to the connection pool, so reads
+    proceed in parallel while writes queue behind the single writer.
+    """
+
+    def __init__(self, task_manager: TaskManager, max_workers: Optional[int] = None):
+        self.task_manager = task_manager
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or task_manager.db.max_readers + 1,
+            thread_name_prefix="august-db"
+        )
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run any blocking callable on the database executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.task_manager, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
+
+    def shutdown(self):
+        """Wait for queued calls, then stop the executor and close connections"""
+        self._executor.shutdown(wait=True)
+        self.task_manager.close()
@@ -0,0 +1,206 @@
+"""
+Online backups for August's task databases
+Copies live databases in small page steps with the SQLite backup API, so the bot never stops writing
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from tenants import TenantRouter
+
+
+BACKUP_DIR = "backups"
+BACKUP_KEEP = 7  # Snapshots kept per database
+BACKUP_PAGES_PER_STEP = 256  # ~1 MB per step with 4 KB pages
+BACKUP_STEP_SLEEP = 0.005  # Pause after each step so other connections get the disk
+
+
+def snapshot_dir(db_path: str, backup_dir: str = BACKUP_DIR) -> Path:
+    """Folder holding one database's snapshots (backups/<db name>/)"""
+    return Path(backup_dir) / Path(db_path).stem
+
+
+def list_snapshots(db_path: str, backup_dir: str = BACKUP_DIR) -> List[Path]:
+    """Snapshots of a database, newest first"""
+    folder = snapshot_dir(db_path, backup_dir)
+    if not folder.is_dir():
+        return []
+    return sorted(folder.glob(f"{Path(db_path).stem}-*.db"), reverse=True)
+
+
+def _copy(source: sqlite3.Connection, dest: sqlite3.Connection, pages: int, sleep: float):
+    """
+    Run the backup API from source to dest, pausing `sleep` seconds after each
+    step. (backup()'s own sleep argument only applies when a step hits a lock.)
+    """
+    def pause(status, remaining, total):
+        if remaining:
+            time.sleep(sleep)
+
+    source.backup(dest, pages=pages, progress=pause if sleep else None)
+
+
+def backup_database(
+    db_path: str,
+    backup_dir: str = BACKUP_DIR,
+    keep: Optional[int] = BACKUP_KEEP,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    sleep: float = BACKUP_STEP_SLEEP
+) -> Path:
+    """
+    Snapshot a live database and prune old snapshots beyond keep (None keeps all).
+
+    The source connection holds one read transaction for the whole copy. In
+    WAL mode that pins a consistent snapshot without blocking writers, and
+    the backup does not restart when the bot commits between steps. The copy
+    goes to a temporary file and is renamed once it passes quick_check, so a
+    crash never leaves a torn snapshot behind.
+    """
+    folder = snapshot_dir(db_path, backup_dir)
+    folder.mkdir(parents=True, exist_ok=True)
+    # Microseconds, so two snapshots in one second (e.g. restore's safety copy) never collide
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    target = folder / f"{Path(db_path).stem}-{stamp}.db"
+    partial = target.with_suffix(".db.partial")
+
+    source = sqlite3.connect(db_path, isolation_level=None)
+    dest = sqlite3.connect(partial)
+    try:
+        source.execute("PRAGMA query_only = ON")
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1")  # Start the read snapshot
+        _copy(source, dest, pages, sleep)
+        source.execute("COMMIT")
+
+        # Snapshots are single self-contained files, not WAL databases
+        dest.execute("PRAGMA journal_mode = DELETE")
+        result = dest.execute("PRAGMA quick_check").fetchone()[0]
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"Snapshot failed quick_check: {result}")
+    except BaseException:
+        dest.close()
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    dest.close()
+    os.replace(partial, target)
+
+    if keep is not None:
+        for old in list_snapshots(db_path, backup_dir)[keep:]:
+            old.unlink()
+
+    return target
+
+
+def restore_database(snapshot: str, db_path: str):
+    """
+    Copy a snapshot over a database in one step.
+
+    Stop the bot (or at least the user's shard) first: a running TaskManager
+    keeps serving cached tasks from before the restore.
+    """
+    if not os.path.isfile(snapshot):
+        raise FileNotFoundError(f"No snapshot at {snapshot}")
+
+    source = sqlite3.connect(f"file:{snapshot}?mode=ro", uri=True)
+    dest = sqlite3.connect(db_path)
+    try:
+        _copy(source, dest, pages=-1, sleep=0)
+    finally:
+        source.close()
+        dest.close()
+
+
+class BackupScheduler:
+    """Snapshots every tenant's database on a schedule"""
+
+    def __init__(
+        self,
+        tenants: TenantRouter,
+        backup_dir: str = BACKUP_DIR,
+        keep: int = BACKUP_KEEP,
+        interval_seconds: int = 24 * 3600
+    ):
+        self.tenants = tenants
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.interval_seconds = interval_seconds
+        self.running = False
+
+    async def start(self):
+        """Start the backup loop"""
+        self.running = True
+
+        while self.running:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Backup error: {e}")
+
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> int:
+        """Back up each tenant database that exists; returns how many were saved"""
+        saved = 0
+        for user_id in self.tenants.user_ids():
+            db_path = self.tenants.db_path(user_id)
+            if not os.path.exists(db_path):
+                continue  # Never opened yet
+            try:
+                # Own connections and a worker thread: handlers never wait on a backup
+                await asyncio.to_thread(backup_database, db_path, self.backup_dir, self.keep)
+                saved += 1
+            except Exception as e:
+                print(f"Backup failed for user {user_id}: {e}")
+        if saved:
+            print(f"💾 Backed up {saved} task database(s)")
+        return saved
+
+    def stop(self):
+        """Stop the backup loop"""
+        self.running = False
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Back up and restore August task databases")
+    parser.add_argument("--db", default="tasks.db", help="database file (e.g. data/tasks_<id>.db)")
+    parser.add_argument("--backup-dir", default=BACKUP_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backup", help="take a snapshot now")
+    commands.add_parser("list", help="list snapshots, newest first")
+    restore = commands.add_parser("restore", help="restore a snapshot over --db")
+    restore.add_argument("snapshot", help="snapshot file, or its index from `list`")
+    args = parser.parse_args(argv)
+
+    if args.command == "backup":
+        print(f"💾 Saved {backup_database(args.db, args.backup_dir)}")
+
+    elif args.command == "list":
+        snapshots = list_snapshots(args.db, args.backup_dir)
+        if not snapshots:
+            print(f"No snapshots of {args.db} in {args.backup_dir}/")
+        for index, path in enumerate(snapshots):
+            print(f"{index:>3}  {path}  ({path.stat().st_size // 1024} KB)")
+
+    elif args.command == "restore":
+        snapshot = args.snapshot
+        if snapshot.isdigit():
+            snapshot = str(list_snapshots(args.db, args.backup_dir)[int(snapshot)])
+        if os.path.exists(args.db):
+            # Keep the current state too, in case the wrong snapshot was picked.
+            # No pruning here, or the snapshot being restored could be rotated out.
+            saved = backup_database(args.db, args.backup_dir, keep=None)
+            print(f"💾 Saved current database to {saved}")
+        restore_database(snapshot, args.db)
+        print(f"✅ Restored {args.db} from {snapshot}")
+
+
+if __name__ == "__main__":
+    main()
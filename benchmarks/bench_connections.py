@@ -0,0 +1,107 @@
+"""
+Connection-layer benchmark for TaskManager
+Compares the old connect-per-call pattern with the pooled WAL connections
+
+Usage: python benchmarks/bench_connections.py [--ops 2000]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_manager import TaskManager, TaskState  # noqa: E402
+
+
+class PerCallConnections:
+    """Reproduces the original behaviour: a fresh rollback-journal connection per call"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    @contextmanager
+    def writer(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @contextmanager
+    def reader(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def in_write_transaction(self) -> bool:
+        return False
+
+    def after_commit(self, callback):
+        callback()
+
+    def close(self):
+        pass
+
+
+def run_workload(tm: TaskManager, ops: int) -> dict:
+    """Time a mixed create / update / read workload"""
+    results = {}
+
+    start = time.perf_counter()
+    ids = [tm.create_task(f"Task {i}", "benchmark", "engineer").id for i in range(ops)]
+    results["create_task"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        tm.update_task_state(task_id, TaskState.IN_PROGRESS)
+    results["update_task_state"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for task_id in ids:
+        tm.get_task(task_id)
+    results["get_task"] = ops / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        tm.get_workload_summary()
+    results["get_workload_summary"] = ops / (time.perf_counter() - start)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000, help="operations per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baseline: plain journal, one connection per call
+        before_path = os.path.join(tmp, "before.db")
+        # The task cache is disabled on both sides to isolate the connection layer
+        before = TaskManager(before_path, cache_size=0)
+        before.close()
+        with sqlite3.connect(before_path) as conn:
+            conn.execute("PRAGMA journal_mode = DELETE")
+        before.db = PerCallConnections(before_path)
+        before_results = run_workload(before, args.ops)
+
+        after = TaskManager(os.path.join(tmp, "after.db"), cache_size=0)
+        after_results = run_workload(after, args.ops)
+        after.close()
+
+    print(f"{'operation':<24}{'before ops/s':>14}{'after ops/s':>14}{'speedup':>10}")
+    for name, before_ops in before_results.items():
+        after_ops = after_results[name]
+        print(f"{name:<24}{before_ops:>14.0f}{after_ops:>14.0f}{after_ops / before_ops:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Intent classifier accuracy and speed report
+Compares the compiled classifier against the original keyword lists on the labeled messages in intents.tsv
+
+Usage: python benchmarks/bench_intents.py [--data intents.tsv] [--folds 5]
+                                          [--threshold 0.6] [--show-errors]
+
+Accuracy for the new classifier is k-fold cross-validated, so every message
+is scored by a model that never saw it during training. The original keyword
+lists need no training and are scored on every message directly. "To GPT-5"
+counts messages wrongly sent to deep_technical, the slow and expensive path.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_classifier import (  # noqa: E402
+    INTENTS, INTENT_DATA_PATH, CONFIDENCE_THRESHOLD, IntentClassifier, NaiveBayes, load_samples
+)
+
+# classify_message_intent as it was before intent_classifier.py, for comparison
+_LEGACY_TECHNICAL = [
+    "what is", "what does", "how does", "why do we", "why does",
+    "explain", "tell me about", "look into", "dive into",
+    "architecture", "implementation", "function", "class", "method",
+    "edge function", "api", "database", "supabase", "swiftui",
+    "how is", "how are", "where is", "can you explain"
+]
+_LEGACY_CREATION = [
+    "create a task", "add a task", "create task", "add task",
+    "we need to implement", "we need to fix", "we need to add",
+    "let's implement", "let's fix", "let's add",
+    "kick off", "start work on"
+]
+_LEGACY_STATUS = [
+    "what's in progress", "current tasks", "task status",
+    "what are we working on", "show tasks", "what's the team",
+    "standup", "sprint", "what's blocked"
+]
+
+
+def legacy_classify(message: str) -> str:
+    """The original three ordered any(keyword in message) scans"""
+    message_lower = message.lower()
+    if any(keyword in message_lower for keyword in _LEGACY_CREATION):
+        return "task_creation"
+    if any(keyword in message_lower for keyword in _LEGACY_STATUS):
+        return "task_status"
+    if any(keyword in message_lower for keyword in _LEGACY_TECHNICAL):
+        return "deep_technical"
+    return "general"
+
+
+def cross_validate(samples, folds: int, threshold: float, seed: int = 7):
+    """Predict every sample with a classifier trained on the other folds"""
+    order = list(range(len(samples)))
+    random.Random(seed).shuffle(order)
+    predictions = [None] * len(samples)
+    sources = Counter()
+
+    for fold in range(folds):
+        held_out = set(order[fold::folds])
+        model = NaiveBayes().fit(s for i, s in enumerate(samples) if i not in held_out)
+        classifier = IntentClassifier(model, threshold=threshold)
+        for i in held_out:
+            intent, _, source = classifier.explain(samples[i][0])
+            predictions[i] = intent
+            sources[source] += 1
+
+    return predictions, sources
+
+
+def report(name: str, samples, predictions):
+    """Print accuracy, GPT-5 misroutes, per-intent precision/recall and the confusion matrix"""
+    truth = [label for _, label in samples]
+    correct = sum(p == t for p, t in zip(predictions, truth))
+    to_gpt5 = sum(p == "deep_technical" and t != "deep_technical" for p, t in zip(predictions, truth))
+
+    print(f"\n{name}: {correct}/{len(samples)} correct ({correct / len(samples):.1%}), "
+          f"{to_gpt5} wrongly sent to GPT-5")
+    print(f"{'intent':<16}{'precision':>10}{'recall':>8}   " + "".join(f"{i[:9]:>10}" for i in INTENTS))
+    for intent in INTENTS:
+        predicted = sum(p == intent for p in predictions)
+        actual = sum(t == intent for t in truth)
+        hits = sum(p == t == intent for p, t in zip(predictions, truth))
+        row = Counter(p for p, t in zip(predictions, truth) if t == intent)
+        print(f"{intent:<16}{hits / predicted if predicted else 0:>10.1%}"
+              f"{hits / actual if actual else 0:>8.1%}   "
+              + "".join(f"{row[i]:>10}" for i in INTENTS))
+
+
+def time_per_call(classify, messages, repeat: int = 20) -> float:
+    """Mean microseconds per message"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            classify(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=INTENT_DATA_PATH, help="labeled intent<TAB>message file")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds")
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD,
+                        help="model confidence needed before keywords are ignored")
+    parser.add_argument("--show-errors", action="store_true", help="list misclassified messages")
+    args = parser.parse_args()
+
+    samples = load_samples(args.data)
+    counts = Counter(label for _, label in samples)
+    print(f"{len(samples)} labeled messages: " + ", ".join(f"{i} {counts[i]}" for i in INTENTS))
+
+    legacy = [legacy_classify(text) for text, _ in samples]
+    compiled, sources = cross_validate(samples, args.folds, args.threshold)
+    report("Original keyword lists", samples, legacy)
+    report(f"Compiled classifier ({args.folds}-fold cross-validated, threshold {args.threshold})",
+           samples, compiled)
+    print("Decided by: " + ", ".join(f"{source} {n}" for source, n in sources.most_common()))
+
+    if args.show_errors:
+        print("\nMisclassified (label -> original / compiled):")
+        for (text, label), old, new in zip(samples, legacy, compiled):
+            if new != label:
+                print(f"  {label:<15} -> {old:<15}/ {new:<15} {text}")
+
+    messages = [text for text, _ in samples]
+    start = time.perf_counter()
+    classifier = IntentClassifier.from_file(args.data, threshold=args.threshold)
+    train_ms = (time.perf_counter() - start) * 1000
+    print(f"\nTraining on all {len(samples)} messages: {train_ms:.1f} ms")
+    print(f"Original keyword lists: {time_per_call(legacy_classify, messages):.1f} µs/message")
+    print(f"Compiled classifier:    {time_per_call(classifier.classify, messages):.1f} µs/message")
+    print(f"  keyword matcher only: {time_per_call(classifier.keywords.match, messages):.1f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
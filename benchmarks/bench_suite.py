@@ -0,0 +1,229 @@
+"""
+TaskManager benchmark suite at several board sizes
+Times the core task operations on synthetic boards and writes a JSON results file
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000 10000 100000 1000000]
+                                        [--output bench_results.json] [--compare old.json]
+
+Each operation runs for up to --ops calls or --seconds, whichever ends first.
+The task cache is off by default (--cache-size 0) so reads measure the query
+and row decoding, not dictionary lookups; pass --cache-size 2000 to time the
+bot's deployed configuration instead.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_manager import (  # noqa: E402
+    TaskManager, TaskState, TaskPriority, HISTORY_INSERT, to_epoch_us
+)
+
+AGENTS = ["engineer", "designer", "qa", "docs", "architect", "analyst"]
+WORDS = ("email sync inbox login crash onboarding search settings widget push "
+         "billing export import cache latency avatar thread draft").split()
+SEED_CHUNK = 10_000
+
+
+def generate_board(count: int, seed: int = 42):
+    """Yield synthetic (task row, history rows) with a realistic state mix"""
+    rng = random.Random(seed)
+    states = [s.display_name for s in TaskState]
+    state_weights = [10, 8, 6, 4, 60, 4, 8]  # Mostly closed work, like a long-lived board
+    priorities = [p.name for p in TaskPriority]
+    start = datetime(2024, 1, 1)
+
+    for i in range(count):
+        created = start + timedelta(seconds=i * 29)
+        updated = created + timedelta(seconds=rng.randint(0, 14 * 86400))
+        state = rng.choices(states, state_weights)[0]
+        title = " ".join(rng.sample(WORDS, 4)).capitalize()
+        task = (
+            f"TASK-{i:08X}", title, f"{title} - synthetic benchmark task #{i}",
+            rng.choice(AGENTS), state, rng.choice(priorities),
+            to_epoch_us(created), to_epoch_us(updated), None, '["bench"]'
+        )
+        history = [] if state == "BACKLOG" else [
+            (task[0], "state", "BACKLOG", state, updated.isoformat())
+        ]
+        yield task, history
+
+
+def seed_board(tm: TaskManager, count: int):
+    """Insert a synthetic board through the writer so every trigger fires"""
+    tasks, history = [], []
+    for task, task_history in generate_board(count):
+        tasks.append(task)
+        history.extend(task_history)
+        if len(tasks) >= SEED_CHUNK:
+            _insert(tm, tasks, history)
+            tasks, history = [], []
+    if tasks:
+        _insert(tm, tasks, history)
+
+
+def _insert(tm: TaskManager, tasks, history):
+    with tm.db.writer() as conn:
+        conn.executemany(
+            "INSERT INTO tasks (id, title, description, agent, state, priority, "
+            "created_at, updated_at, parent_task, tags) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            tasks
+        )
+        conn.executemany(HISTORY_INSERT, history)
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(call, max_calls: int, max_seconds: float) -> dict:
+    """Time call() repeatedly, then trace one extra call for peak memory"""
+    latencies = []
+    deadline = time.perf_counter() + max_seconds
+    started = time.perf_counter()
+    while len(latencies) < max_calls and (len(latencies) < 3 or time.perf_counter() < deadline):
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_mib": peak / 2**20,
+    }
+
+
+def bench_size(size: int, args) -> dict:
+    """Seed a board of the given size and time every operation on it"""
+    rng = random.Random(size)
+    with tempfile.TemporaryDirectory() as tmp:
+        tm = TaskManager(os.path.join(tmp, "bench.db"), cache_size=args.cache_size)
+
+        start = time.perf_counter()
+        seed_board(tm, size)
+        seed_seconds = time.perf_counter() - start
+
+        ids = [f"TASK-{i:08X}" for i in range(size)]
+        states = list(TaskState)
+        # One spare victim for the traced call that follows the timed ones
+        victim_list = rng.sample(ids, min(size, args.ops + 1))
+        victims = iter(victim_list)
+
+        operations = {
+            "create_task": lambda: tm.create_task(
+                "Benchmark task", "Created by the benchmark suite", rng.choice(AGENTS)
+            ),
+            "update_task_state": lambda: tm.update_task_state(
+                rng.choice(ids), rng.choice(states)
+            ),
+            "get_tasks_by_state": lambda: tm.get_tasks_by_state(rng.choice(states)),
+            "get_all_tasks": tm.get_all_tasks,
+            "get_workload_summary": tm.get_workload_summary,
+            # Deleted ids stay in `ids`; update_task_state has already run by now
+            "delete_task": lambda: tm.delete_task(next(victims)),
+        }
+
+        results = {"seed_seconds": seed_seconds, "operations": {}}
+        for name, call in operations.items():
+            if args.only and name not in args.only:
+                continue
+            max_calls = len(victim_list) - 1 if name == "delete_task" else args.ops
+            results["operations"][name] = measure(call, max_calls, args.seconds)
+            row = results["operations"][name]
+            print(f"{size:>9} {name:<22}{row['ops_per_sec']:>12.0f}{row['p50_ms']:>10.3f}"
+                  f"{row['p99_ms']:>10.3f}{row['peak_mib']:>10.1f}{row['calls']:>8}")
+
+        tm.close()
+    return results
+
+
+def git_commit() -> str:
+    """Current commit, so results files can be matched to the code they measured"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous_path: str, current: dict):
+    """Print ops/sec and p99 change against an earlier results file"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+
+    print(f"\nvs {previous_path} ({previous.get('commit', '?')} -> {current['commit']})")
+    print(f"{'size':>9} {'operation':<22}{'ops/s':>12}{'p99':>10}")
+    for size, result in current["sizes"].items():
+        before = previous["sizes"].get(size)
+        if not before:
+            continue
+        for name, row in result["operations"].items():
+            old = before["operations"].get(name)
+            if not old:
+                continue
+            ops_change = (row["ops_per_sec"] / old["ops_per_sec"] - 1) * 100
+            p99_change = (row["p99_ms"] / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0.0
+            print(f"{size:>9} {name:<22}{ops_change:>+11.1f}%{p99_change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="board sizes to test (add 1000000 for the large run)")
+    parser.add_argument("--ops", type=int, default=1000, help="max calls per operation")
+    parser.add_argument("--seconds", type=float, default=5.0, help="time budget per operation")
+    parser.add_argument("--cache-size", type=int, default=0, help="TaskManager cache_size")
+    parser.add_argument("--only", nargs="+", help="run only these operations")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cache_size": args.cache_size,
+        "sizes": {},
+    }
+
+    print(f"{'size':>9} {'operation':<22}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'peak MiB':>10}{'calls':>8}")
+    for size in args.sizes:
+        results["sizes"][str(size)] = bench_size(size, args)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
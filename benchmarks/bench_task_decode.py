@@ -0,0 +1,115 @@
+"""
+Task decoding benchmark: eager dict-based Task vs lazy slotted Task
+Loads a large board and lists titles and states, the way /tasks and /standup do
+
+Usage: python benchmarks/bench_task_decode.py [--tasks 100000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_manager import TaskManager, TaskState, TaskPriority, to_epoch_us  # noqa: E402
+
+
+class EagerTask:
+    """The original Task: per-instance __dict__, every field decoded up front"""
+
+    def __init__(self, row):
+        self.id = row[0]
+        self.title = row[1]
+        self.description = row[2]
+        self.agent = row[3]
+        self.state = TaskState[row[4]]
+        self.priority = TaskPriority[row[5]]
+        self.created_at = datetime.fromisoformat(row[6])
+        self.updated_at = datetime.fromisoformat(row[7])
+        self.parent_task = row[8]
+        self.tags = json.loads(row[9]) if row[9] else []
+
+
+def make_rows(count: int):
+    """Synthetic tasks as (row with ISO timestamps, row with epoch timestamps)"""
+    start = datetime(2025, 1, 1)
+    states = [state.display_name for state in TaskState]
+    priorities = [priority.name for priority in TaskPriority]
+    agents = ["engineer", "designer", "qa", "docs", "architect"]
+
+    for i in range(count):
+        created = start + timedelta(seconds=i * 37)
+        updated = created + timedelta(seconds=random.randint(0, 86400))
+        yield (
+            f"TASK-{i:08X}", f"Task number {i}", "Synthetic benchmark task " * 3,
+            random.choice(agents), random.choice(states), random.choice(priorities),
+            created, updated, None, json.dumps(["ios", "sync"])
+        )
+
+
+def list_board(load):
+    """Load the board and build a title/state listing from it"""
+    tasks = load()
+    return tasks, [(task.title, task.state.emoji) for task in tasks]
+
+
+def measure(label: str, load, repeat: int = 3):
+    """Report best wall time, then traced peak and retained memory of one run"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list_board(load)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    tasks, listing = list_board(load)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<28}{len(listing):>9}{best * 1000:>12.0f}{peak / 2**20:>12.1f}{current / 2**20:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000, help="board size")
+    args = parser.parse_args()
+
+    random.seed(42)
+    rows = list(make_rows(args.tasks))
+
+    # Old storage: ISO text timestamps
+    legacy = sqlite3.connect(":memory:")
+    legacy.execute("""
+        CREATE TABLE tasks (id TEXT PRIMARY KEY, title TEXT, description TEXT, agent TEXT,
+                            state TEXT, priority TEXT, created_at TEXT, updated_at TEXT,
+                            parent_task TEXT, tags TEXT)
+    """)
+    legacy.executemany(
+        "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [row[:6] + (row[6].isoformat(), row[7].isoformat()) + row[8:] for row in rows]
+    )
+
+    # Current storage: integer epoch timestamps, lazy Task
+    tm = TaskManager(":memory:", cache_size=0)
+    with tm.db.writer() as conn:
+        conn.executemany(
+            "INSERT INTO tasks (id, title, description, agent, state, priority, "
+            "created_at, updated_at, parent_task, tags) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [row[:6] + (to_epoch_us(row[6]), to_epoch_us(row[7])) + row[8:] for row in rows]
+        )
+
+    print(f"{'variant':<28}{'tasks':>9}{'time ms':>12}{'peak MiB':>12}{'retained MiB':>14}")
+    measure("eager Task, ISO text", lambda: [
+        EagerTask(row) for row in legacy.execute("SELECT * FROM tasks ORDER BY updated_at DESC")
+    ])
+    measure("lazy slotted Task, epoch", tm.get_all_tasks)
+
+
+if __name__ == "__main__":
+    main()
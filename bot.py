@@ -1,33 +1,65 @@
 import os
 import asyncio
+import hashlib
+import random
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
-from openai import OpenAI
 
 # Import our modules
 from agents import AGENTS, get_agent, format_agent_info, get_all_agents
-from task_manager import TaskManager, TaskState, TaskPriority
+from task_manager import TaskState, TaskPriority, decode_cursor
+from analytics import ANALYTICS_WEEKS
+from task_query import compile_query, QueryError, QUERY_HELP
+from task_ids import normalize_task_id
+from async_task_manager import AsyncTaskManager
 from august_prompt import get_august_prompt
-from vibe_sync import VibeKanbanClient, VibeAugustSync
-from notifications import NotificationManager, NotificationScheduler
+from vibe_sync import VibeAugustSync
+from notifications import NotificationScheduler
+from maintenance import MaintenanceScheduler
+from backup import BackupScheduler
+from tenants import TenantRouter
+from response_cache import CACHED_INTENTS
+from status_responder import answer_status_question, standup_message, workload_message
+from llm import LLMGateway
+from intent_classifier import IntentClassifier
+from streaming import StreamingReply
 
 # ============= CONFIGURATION =============
 # TODO: Move these to environment variables for security
 TELEGRAM_TOKEN = "your-telegram-bot-token-here"
-ALLOWED_USER_ID = 0  # Your Telegram user ID (get from @userinfobot)
+ALLOWED_USER_ID = 0  # Optional single-user install on tasks.db; other users come from configs/
 OPENAI_API_KEY = "your-openai-api-key-here"
 REPO_PATH = "/path/to/your/codebase"  # Optional: for technical discussions
+ARCHIVE_AFTER_DAYS = 30  # Closed tasks older than this move to the archive
+MAX_OPEN_TENANTS = 64  # Tenant databases kept open at once (also capped by the fd limit)
+TENANT_IDLE_SECONDS = 15 * 60  # Close a tenant's database after this long unused
+BACKUP_INTERVAL_HOURS = 24  # Online snapshot of every task database (restore: python backup.py)
+BACKUP_KEEP = 7  # Snapshots kept per database
+LLM_MAX_CONCURRENCY = 8  # OpenAI completions in flight at once, shared by all users
+STREAM_RESPONSES = True  # Show answers as they are generated instead of all at once
 # =========================================
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-task_manager = TaskManager()
-vibe_sync = VibeAugustSync(task_manager)
-notification_manager = None  # Initialized in main()
+# One pooled async OpenAI client for every handler; closed in shutdown()
+llm = LLMGateway(OPENAI_API_KEY, max_concurrency=LLM_MAX_CONCURRENCY)
+
+# Trained once at startup from intents.tsv (a few milliseconds)
+intent_classifier = IntentClassifier.from_file()
+
+# One task database per user in configs/user_<id>.json, opened on demand.
+# Handlers lease a tenant: `async with tenants.lease(user_id) as tenant`,
+# then use tenant.store (never blocks the event loop) and tenant.vibe_sync.
+tenants = TenantRouter(max_open=MAX_OPEN_TENANTS, idle_seconds=TENANT_IDLE_SECONDS)
+if ALLOWED_USER_ID:
+    # Installs from before per-user databases keep their existing tasks.db
+    tenants.add_tenant(ALLOWED_USER_ID, {"tasks_db": "tasks.db", "repo_path": REPO_PATH})
 
 
 def check_auth(update: Update) -> bool:
-    """Check if user is authorized"""
-    return update.effective_user.id == ALLOWED_USER_ID
+    """Check if user has a workspace"""
+    return tenants.is_tenant(update.effective_user.id)
 
 
 async def classify_message_intent(message: str) -> str:
@@ -35,46 +67,7 @@ async def classify_message_intent(message: str) -> str:
     Classify user message intent to route to appropriate handler
     Returns: "deep_technical", "task_creation", "task_status", or "general"
     """
-    message_lower = message.lower()
-
-    # Technical discussion indicators - questions about code/architecture
-    technical_keywords = [
-        "what is", "what does", "how does", "why do we", "why does",
-        "explain", "tell me about", "look into", "dive into",
-        "architecture", "implementation", "function", "class", "method",
-        "edge function", "api", "database", "supabase", "swiftui",
-        "how is", "how are", "where is", "can you explain"
-    ]
-
-    # Task creation indicators - explicit work requests
-    task_creation_keywords = [
-        "create a task", "add a task", "create task", "add task",
-        "we need to implement", "we need to fix", "we need to add",
-        "let's implement", "let's fix", "let's add",
-        "kick off", "start work on"
-    ]
-
-    # Task status indicators
-    status_keywords = [
-        "what's in progress", "current tasks", "task status",
-        "what are we working on", "show tasks", "what's the team",
-        "standup", "sprint", "what's blocked"
-    ]
-
-    # Check for task creation first (most explicit)
-    if any(keyword in message_lower for keyword in task_creation_keywords):
-        return "task_creation"
-
-    # Check for status requests
-    if any(keyword in message_lower for keyword in status_keywords):
-        return "task_status"
-
-    # Check for technical discussion
-    if any(keyword in message_lower for keyword in technical_keywords):
-        return "deep_technical"
-
-    # Default to general
-    return "general"
+    return intent_classifier.classify(message)
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -92,12 +85,16 @@ I coordinate the Lovemail development team and manage our workflow.
 📋 **Task Management**
 • Create tasks: "Create a task to fix email sync"
 • Check status: "What's in progress?"
+• Search tasks: `/find email sync`
+• Filter tasks: `/tasks agent:engineer prio:P0,P1 updated:<7d`
+• Epics and subtasks: `/epic`, `/subtask TASK-ID title`
 • Update tasks: "Move TASK-ABC to review"
 
 👥 **Team Coordination**
 • See agents: `/agents`
 • Check workload: `/workload`
 • Daily standup: `/standup`
+• Team flow metrics: `/metrics_team`
 
 🔔 **Proactive Updates** (NEW!)
 • I'll notify you when tasks change state
@@ -158,17 +155,8 @@ async def workload_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not check_auth(update):
         return
 
-    workload = task_manager.get_workload_summary()
-    msg = "**📊 Team Workload** (active tasks)\n\n"
-
-    if not workload:
-        msg += "No active tasks right now. Clean slate!"
-    else:
-        for agent_id, count in sorted(workload.items(), key=lambda x: x[1], reverse=True):
-            agent = get_agent(agent_id)
-            if agent:
-                msg += f"{agent.emoji} **{agent.name}**: {count} tasks\n"
-
+    async with tenants.lease(update.effective_user.id) as tenant:
+        msg = await workload_message(tenant.store)
     await update.message.reply_text(msg, parse_mode='Markdown')
 
 
@@ -179,74 +167,340 @@ async def standup_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.message.reply_text("Generating standup report...")
 
-    # Get tasks by state
-    in_progress = task_manager.get_tasks_by_state(TaskState.IN_PROGRESS)
-    in_review = task_manager.get_tasks_by_state(TaskState.REVIEW)
-    blocked = task_manager.get_tasks_by_state(TaskState.BLOCKED)
+    async with tenants.lease(update.effective_user.id) as tenant:
+        msg = await standup_message(tenant.store)
+    await update.message.reply_text(msg, parse_mode='Markdown')
 
-    msg = "**🎯 Daily Standup**\n\n"
 
-    if in_progress:
-        msg += "**🏃 In Progress** (" + str(len(in_progress)) + ")\n"
-        for task in in_progress[:5]:
-            msg += f"• {task.title} ({task.agent})\n"
-        msg += "\n"
+TASKS_PAGE_SIZE = 10
 
-    if in_review:
-        msg += "**👀 In Review** (" + str(len(in_review)) + ")\n"
-        for task in in_review[:5]:
-            msg += f"• {task.title} ({task.agent})\n"
-        msg += "\n"
+# Telegram caps callback_data at 64 bytes; longer filter queries are kept
+# here and the buttons carry a short key instead
+CALLBACK_DATA_LIMIT = 64
+SAVED_QUERIES_MAX = 512
+_saved_queries: "OrderedDict[str, str]" = OrderedDict()
 
-    if blocked:
-        msg += "**❌ Blocked** (" + str(len(blocked)) + ")\n"
-        for task in blocked[:5]:
-            msg += f"• {task.title} ({task.agent})\n"
-        msg += "\n"
 
-    if not in_progress and not in_review and not blocked:
-        msg += "All clear! No active work right now."
+def _query_token(query_text: str, cursor: str) -> str:
+    """The query as it travels in a page button: verbatim if it fits, else a saved key"""
+    if len(f"tasks:n:{query_text}:{cursor}".encode()) <= CALLBACK_DATA_LIMIT:
+        return query_text
+    key = "#" + hashlib.sha1(query_text.encode()).hexdigest()[:10]
+    _saved_queries[key] = query_text
+    _saved_queries.move_to_end(key)
+    while len(_saved_queries) > SAVED_QUERIES_MAX:
+        _saved_queries.popitem(last=False)
+    return key
 
-    await update.message.reply_text(msg, parse_mode='Markdown')
+
+async def _tasks_page_view(store: AsyncTaskManager, query_text: str = "", after: str = None,
+                           before: str = None, with_filters: bool = False):
+    """
+    Build the message and keyboard for one page of tasks matching a filter query.
+    Prev/Next buttons carry the query and page cursor in their callback data.
+    """
+    if query_text == "all":  # Buttons sent before filter queries existed
+        query_text = ""
+    try:
+        query = compile_query(query_text)
+    except QueryError as e:
+        return f"⚠️ {e}\n\n{QUERY_HELP}", None
+
+    filters = {'query': query} if query_text else {}
+    tasks, next_cursor, prev_cursor = await store.get_tasks_page(
+        filters, after_cursor=after, limit=TASKS_PAGE_SIZE, before_cursor=before
+    )
+    label = f"`{query_text}`" if query_text else "ALL"
+
+    if not tasks:
+        return f"No tasks match {label}.", None
+
+    total = await store.count_tasks(filters)
+    msg = f"**📋 Tasks ({label})** ({total} total)\n\n"
+
+    for task in tasks:
+        msg += f"{task.state.emoji} {task.priority.emoji} **{task.title}**\n"
+        msg += f"   Agent: {task.agent} • {task.id}\n\n"
+
+    if total > len(tasks):
+        msg += f"\n_Showing {len(tasks)} of {total} tasks. Filter with /tasks state:review prio:P0 ..._"
+
+    keyboard = []
+    nav_row = []
+    if prev_cursor:
+        token = _query_token(query_text, prev_cursor)
+        nav_row.append(InlineKeyboardButton("« Prev", callback_data=f"tasks:p:{token}:{prev_cursor}"))
+    if next_cursor:
+        token = _query_token(query_text, next_cursor)
+        nav_row.append(InlineKeyboardButton("Next »", callback_data=f"tasks:n:{token}:{next_cursor}"))
+    if nav_row:
+        keyboard.append(nav_row)
+
+    if with_filters:
+        keyboard += [
+            [
+                InlineKeyboardButton("🆕 Backlog", callback_data="tasks:n:backlog:"),
+                InlineKeyboardButton("🏃 In Progress", callback_data="tasks:n:progress:"),
+            ],
+            [
+                InlineKeyboardButton("👀 Review", callback_data="tasks:n:review:"),
+                InlineKeyboardButton("✅ Done", callback_data="tasks:n:done:"),
+            ],
+            [InlineKeyboardButton("« Back", callback_data="back_main")],
+        ]
+
+    return msg, InlineKeyboardMarkup(keyboard) if keyboard else None
 
 
 async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """List all tasks"""
+    """List tasks matching an optional filter query, one page at a time"""
     if not check_auth(update):
         return
 
-    args = context.args
-    if args and args[0] in ['backlog', 'planned', 'progress', 'review', 'done', 'blocked']:
-        state_map = {
-            'backlog': TaskState.BACKLOG,
-            'planned': TaskState.PLANNED,
-            'progress': TaskState.IN_PROGRESS,
-            'review': TaskState.REVIEW,
-            'done': TaskState.DONE,
-            'blocked': TaskState.BLOCKED
-        }
-        tasks = task_manager.get_tasks_by_state(state_map[args[0]])
-        state_name = args[0].upper()
-    else:
-        tasks = task_manager.get_all_tasks()
-        state_name = "ALL"
+    query_text = " ".join(context.args or [])
 
-    if not tasks:
-        await update.message.reply_text(f"No {state_name} tasks found.")
+    async with tenants.lease(update.effective_user.id) as tenant:
+        msg, reply_markup = await _tasks_page_view(tenant.store, query_text)
+    await update.message.reply_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
+
+
+async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Full-text search over task titles and descriptions"""
+    if not check_auth(update):
         return
 
-    msg = f"**📋 Tasks ({state_name})** ({len(tasks)} total)\n\n"
+    query = ' '.join(context.args) if context.args else ""
+    if not query:
+        await update.message.reply_text(
+            "Usage: /find <words>\n\n"
+            "Example: /find email sync"
+        )
+        return
 
-    for task in tasks[:10]:
+    async with tenants.lease(update.effective_user.id) as tenant:
+        tasks = await tenant.store.search(query, limit=TASKS_PAGE_SIZE, include_archived=True)
+    if not tasks:
+        await update.message.reply_text(f"No tasks matching \"{query}\".")
+        return
+
+    msg = f"**🔍 Tasks matching \"{query}\"**\n\n"
+    for task in tasks:
         msg += f"{task.state.emoji} {task.priority.emoji} **{task.title}**\n"
         msg += f"   Agent: {task.agent} • {task.id}\n\n"
 
-    if len(tasks) > 10:
-        msg += f"\n_Showing 10 of {len(tasks)} tasks. Use /tasks <state> to filter._"
+    await update.message.reply_text(msg, parse_mode='Markdown')
+
+
+EPIC_TREE_MAX_NODES = 40  # Keeps the tree well under Telegram's 4096-character limit
+
+
+def _progress_bar(done: int, total: int, width: int = 10) -> str:
+    """Text progress bar, e.g. ▓▓▓░░░░░░░ 3/10 (30%)"""
+    if not total:
+        return "no subtasks"
+    filled = round(width * done / total)
+    return f"{'▓' * filled}{'░' * (width - filled)} {done}/{total} ({done * 100 // total}%)"
+
+
+async def epic_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show an epic's subtask tree with rolled-up progress, or list epics"""
+    if not check_auth(update):
+        return
+
+    async with tenants.lease(update.effective_user.id) as tenant:
+        if not context.args:
+            epics = await tenant.store.get_epics(limit=TASKS_PAGE_SIZE)
+            rollups = await tenant.store.get_rollups([epic.id for epic in epics])
+            if not epics:
+                await update.message.reply_text(
+                    "No epics yet. Add subtasks with /subtask <TASK-ID> <title>."
+                )
+                return
+
+            msg = "**🗂️ Epics**\n\n"
+            for epic in epics:
+                counts = rollups.get(epic.id, {})
+                total = sum(counts.values()) - counts.get(TaskState.CANCELLED, 0)
+                msg += f"{epic.state.emoji} **{epic.title}** • {epic.id}\n"
+                msg += f"   {_progress_bar(counts.get(TaskState.DONE, 0), total)}\n\n"
+            msg += "_Send /epic <TASK-ID> to see the tree._"
+            await update.message.reply_text(msg, parse_mode='Markdown')
+            return
+
+        subtree = await tenant.store.get_subtree(normalize_task_id(context.args[0]))
+        if not subtree:
+            await update.message.reply_text(f"No active task {context.args[0]}.")
+            return
+
+        shown = subtree[:EPIC_TREE_MAX_NODES]
+        # One indexed lookup for every node's counts; nothing walks the tree here
+        rollups = await tenant.store.get_rollups([task.id for _, task in shown])
+
+    _, root = subtree[0]
+    counts = rollups.get(root.id, {})
+    total = sum(counts.values()) - counts.get(TaskState.CANCELLED, 0)
+    msg = f"**🗂️ {root.title}** • {root.id}\n"
+    msg += f"{_progress_bar(counts.get(TaskState.DONE, 0), total)}\n\n"
+
+    for depth, task in shown[1:]:
+        line = f"{'    ' * (depth - 1)}└ {task.state.emoji} {task.title}"
+        task_counts = rollups.get(task.id)
+        if task_counts:
+            task_total = sum(task_counts.values()) - task_counts.get(TaskState.CANCELLED, 0)
+            line += f" ({task_counts.get(TaskState.DONE, 0)}/{task_total})"
+        msg += line + "\n"
+
+    if len(subtree) > len(shown):
+        msg += f"\n_...and {len(subtree) - len(shown)} more subtasks._"
+    await update.message.reply_text(msg, parse_mode='Markdown')
+
+
+async def subtask_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Create a subtask under an existing task"""
+    if not check_auth(update):
+        return
+
+    if not context.args or len(context.args) < 2:
+        await update.message.reply_text(
+            "Usage: /subtask <TASK-ID> <title>\n\n"
+            "Example: /subtask T-2J4H07F5E00 Write migration tests"
+        )
+        return
+
+    parent_id = normalize_task_id(context.args[0])
+    title = ' '.join(context.args[1:])
+    async with tenants.lease(update.effective_user.id) as tenant:
+        task = await tenant.store.create_subtask(parent_id, title, title)
+        if task is None:
+            await update.message.reply_text(f"No active task {parent_id}.")
+            return
+        done, total = await tenant.store.get_progress(parent_id)
+
+    await update.message.reply_text(
+        f"✅ **Subtask Created: {task.id}**\n\n"
+        f"{task.state.emoji} {task.priority.emoji} **{task.title}**\n"
+        f"Under: {parent_id} ({done}/{total} done)",
+        parse_mode='Markdown'
+    )
+
+
+METRICS_MAX_WEEKS = 104
+THROUGHPUT_WEEKS_SHOWN = 8
+
+
+def _hours(value: float) -> str:
+    """Compact duration: hours up to two days, then days"""
+    return f"{value:.0f}h" if value < 48 else f"{value / 24:.1f}d"
+
+
+async def metrics_team_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show lead time, cycle time, time in state and weekly throughput"""
+    if not check_auth(update):
+        return
+
+    weeks = ANALYTICS_WEEKS
+    if context.args:
+        if not context.args[0].isdigit() or not 1 <= int(context.args[0]) <= METRICS_MAX_WEEKS:
+            await update.message.reply_text(
+                f"Usage: /metrics_team [weeks]\n\nWeeks from 1 to {METRICS_MAX_WEEKS} "
+                f"(default {ANALYTICS_WEEKS})."
+            )
+            return
+        weeks = int(context.args[0])
+
+    async with tenants.lease(update.effective_user.id) as tenant:
+        # Served from flow_stats and cached per history change, so this stays fast
+        metrics = await tenant.store.run(tenant.analytics.team_metrics, weeks)
+
+    lead = metrics["lead_time"]["all"]
+    cycle = metrics["cycle_time"]["all"]
+    if not lead:
+        await update.message.reply_text(f"No tasks completed in the last {weeks} weeks yet.")
+        return
+
+    msg = f"**📈 Team Flow** (last {weeks} weeks, since {metrics['since']})\n\n"
+    msg += f"**Lead time:** median {_hours(lead['p50'])}, 85% within {_hours(lead['p85'])}\n"
+    if cycle:
+        msg += f"**Cycle time:** median {_hours(cycle['p50'])}, 85% within {_hours(cycle['p85'])}\n"
+    msg += f"**Completed:** {lead['count']} tasks\n\n"
+
+    msg += "**By agent** (done • median cycle • median lead)\n"
+    by_agent = sorted(metrics["lead_time"]["agent"].items(), key=lambda x: x[1]["count"], reverse=True)
+    for agent_id, stats in by_agent:
+        agent = get_agent(agent_id)
+        name = f"{agent.emoji} {agent.name}" if agent else agent_id
+        agent_cycle = metrics["cycle_time"]["agent"].get(agent_id)
+        msg += (f"{name}: {stats['count']} • {_hours(agent_cycle['p50']) if agent_cycle else '-'}"
+                f" • {_hours(stats['p50'])}\n")
+
+    msg += "\n**By priority** (done • median cycle • median lead)\n"
+    for priority in TaskPriority:
+        stats = metrics["lead_time"]["priority"].get(priority.name)
+        if stats:
+            priority_cycle = metrics["cycle_time"]["priority"].get(priority.name)
+            msg += (f"{priority.emoji} {priority.name}: {stats['count']} • "
+                    f"{_hours(priority_cycle['p50']) if priority_cycle else '-'} • {_hours(stats['p50'])}\n")
+
+    msg += "\n**Time in state** (median • average)\n"
+    for state in TaskState:
+        stats = metrics["time_in_state"].get(state.name, {}).get("all")
+        if stats:
+            msg += f"{state.emoji} {state.display_name}: {_hours(stats['p50'])} • {_hours(stats['avg'])}\n"
+
+    throughput = sorted(metrics["throughput"]["all"].items())[-THROUGHPUT_WEEKS_SHOWN:]
+    if throughput:
+        busiest = max(count for _, count in throughput)
+        msg += "\n**Throughput** (tasks done per week)\n"
+        for week, count in throughput:
+            msg += f"`{week[5:]}` {'▓' * max(1, round(10 * count / busiest))} {count}\n"
 
     await update.message.reply_text(msg, parse_mode='Markdown')
 
 
+TASK_CREATE_PREFIX = "TASK_CREATE:"
+ACKNOWLEDGMENTS = [
+    "Hold on, thinking...",
+    "Give me a sec...",
+    "One moment...",
+    "Let me check that...",
+    "Hang on...",
+]
+
+
+async def _acknowledge_if_slow(message, reply: StreamingReply, after: float = 5.0):
+    """Send a short holding reply if August has not shown any text yet"""
+    await asyncio.sleep(after)
+    if not reply.messages_sent:
+        await message.reply_text(random.choice(ACKNOWLEDGMENTS))
+
+
+async def _stream_august_response(reply: StreamingReply, model: str, messages: list,
+                                  max_tokens: int) -> Tuple[str, bool]:
+    """
+    Stream August's answer into reply as it is generated. Returns the full
+    text and whether it was shown: a TASK_CREATE answer is held back whole,
+    since it becomes a task rather than a message.
+    """
+    if not STREAM_RESPONSES:
+        return await llm.complete(model, messages, temperature=0.7, max_tokens=max_tokens), False
+
+    text = ""
+    held = True  # Until the text can no longer be a TASK_CREATE line
+    async with aclosing(llm.stream(model, messages, temperature=0.7, max_tokens=max_tokens)) as deltas:
+        async for delta in deltas:
+            text += delta
+            if held:
+                head = text.lstrip()
+                if TASK_CREATE_PREFIX.startswith(head) or head.startswith(TASK_CREATE_PREFIX):
+                    continue
+                held = False
+                await reply.feed(text)
+            else:
+                await reply.feed(delta)
+
+    return text.strip(), not held
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle user messages - route to August"""
     if not check_auth(update):
@@ -257,8 +511,24 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Classify the intent of the message
     intent = await classify_message_intent(user_message)
 
+    # Plain status questions are answered from the board, without the model.
+    # Only for task_status: the parser reads state and agent words as filters,
+    # so a request phrased around them must reach the model.
+    if intent == "task_status":
+        async with tenants.lease(update.effective_user.id) as tenant:
+            answer = await answer_status_question(tenant.store, user_message)
+        if answer:
+            try:
+                await update.message.reply_text(answer, parse_mode='Markdown')
+            except Exception:
+                # If Markdown parsing fails (e.g. a title with an underscore), send as plain text
+                await update.message.reply_text(answer)
+            return
+
     # Build context for August
-    recent_tasks = task_manager.get_all_tasks()[:10]
+    async with tenants.lease(update.effective_user.id) as tenant:
+        recent_tasks, _, _ = await tenant.store.get_tasks_page(limit=10)
+        repo_path = tenant.config.get("repo_path") or REPO_PATH
     tasks_context = "\n".join([
         f"- {t.id}: {t.title} ({t.agent}, {t.state.display_name})"
         for t in recent_tasks
@@ -278,15 +548,29 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         model = "gpt-4o"  # Balanced for general tasks
         max_tokens = 2500
 
+    agents_line = ', '.join([a.emoji + ' ' + a.name for a in get_all_agents()])
+
+    # Repeated status and general questions against an unchanged board reuse the last answer
+    cacheable = intent in CACHED_INTENTS
+    context_snapshot = "\n".join([system_prompt, tasks_context, agents_line, repo_path])
+    if cacheable:
+        async with tenants.lease(update.effective_user.id) as tenant:
+            cached, board_seq = await tenant.store.run(
+                tenant.responses.get, intent, user_message, context_snapshot, model
+            )
+        if cached:
+            await StreamingReply(update.message).close(cached)
+            return
+
     context_prompt = f"""
 CURRENT CONTEXT:
 
 Recent Tasks:
 {tasks_context}
 
-Available Agents: {', '.join([a.emoji + ' ' + a.name for a in get_all_agents()])}
+Available Agents: {agents_line}
 
-Repository Path: {REPO_PATH}
+Repository Path: {repo_path}
 
 ---
 
@@ -331,58 +615,27 @@ INSTRUCTIONS FOR YOUR RESPONSE:
 """
 
     try:
-        import random
-        from concurrent.futures import ThreadPoolExecutor
-
-        # Function to get response from OpenAI (runs in thread)
-        def get_august_response():
-            if "gpt-5" in model:
-                response = openai_client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": context_prompt}
-                    ]
-                )
-            else:
-                response = openai_client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": context_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=max_tokens
-                )
-            return response.choices[0].message.content.strip()
-
-        # Run in executor to make it non-blocking
-        loop = asyncio.get_event_loop()
-        executor = ThreadPoolExecutor(max_workers=1)
-
-        # Try to get response within 5 seconds
-        response_task = loop.run_in_executor(executor, get_august_response)
+        reply = StreamingReply(update.message)
 
+        # If nothing is on screen after 5 seconds, send a quick acknowledgment
+        acknowledgment = asyncio.create_task(_acknowledge_if_slow(update.message, reply))
         try:
-            august_response = await asyncio.wait_for(response_task, timeout=5.0)
-        except asyncio.TimeoutError:
-            # If it takes longer than 5 seconds, send a quick acknowledgment
-            acknowledgments = [
-                "Hold on, thinking...",
-                "Give me a sec...",
-                "One moment...",
-                "Let me check that...",
-                "Hang on...",
-            ]
-            await update.message.reply_text(random.choice(acknowledgments))
-
-            # Now wait for the full response (no timeout)
-            august_response = await response_task
+            august_response, shown = await _stream_august_response(
+                reply,
+                model,
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": context_prompt}
+                ],
+                max_tokens
+            )
+        finally:
+            acknowledgment.cancel()
 
         # Check if August wants to create a task
-        if august_response.startswith("TASK_CREATE:"):
+        if august_response.startswith(TASK_CREATE_PREFIX):
             lines = august_response.split('\n')
-            task_line = lines[0].replace("TASK_CREATE:", "").strip()
+            task_line = lines[0].replace(TASK_CREATE_PREFIX, "").strip()
             parts = [p.strip() for p in task_line.split('|')]
 
             if len(parts) >= 3:
@@ -404,12 +657,13 @@ INSTRUCTIONS FOR YOUR RESPONSE:
                 priority = priority_map.get(priority_str, TaskPriority.P2)
 
                 # Create the task
-                task = task_manager.create_task(
-                    title=task_title,
-                    description=user_message,
-                    agent=agent_id,
-                    priority=priority
-                )
+                async with tenants.lease(update.effective_user.id) as tenant:
+                    task = await tenant.store.create_task(
+                        title=task_title,
+                        description=user_message,
+                        agent=agent_id,
+                        priority=priority
+                    )
 
                 # Send August's explanation with task ID
                 explanation = '\n'.join(lines[1:]).strip()
@@ -423,24 +677,16 @@ INSTRUCTIONS FOR YOUR RESPONSE:
                 await update.message.reply_text(full_response, parse_mode='Markdown')
                 return
 
-        # Split response into multiple messages if August used "---"
-        messages = august_response.split('---')
-
-        for msg in messages:
-            msg = msg.strip()
-            if not msg:
-                continue
-
-            # Send each message separately with a small delay
-            try:
-                await update.message.reply_text(msg, parse_mode='Markdown')
-            except Exception:
-                # If Markdown parsing fails, send as plain text
-                await update.message.reply_text(msg)
+        # Text held back from the stream (not streaming, or a TASK_CREATE line
+        # that didn't parse) is sent now, split on "---" like the rest
+        await reply.close("" if shown else august_response)
 
-            # Small delay between messages to feel more human
-            if len(messages) > 1:
-                await asyncio.sleep(0.5)
+        if cacheable and not august_response.startswith(TASK_CREATE_PREFIX):
+            async with tenants.lease(update.effective_user.id) as tenant:
+                await tenant.store.run(
+                    tenant.responses.put, intent, user_message, context_snapshot, model,
+                    august_response, board_seq
+                )
 
     except Exception as e:
         await update.message.reply_text(f"Error: {str(e)}")
@@ -457,53 +703,64 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Route to appropriate command based on callback data
     callback_data = query.data
 
-    if callback_data == "cmd_tasks":
-        await _tasks_response(query)
-    elif callback_data == "cmd_agents":
+    if callback_data == "cmd_agents":
         await _agents_response(query)
-    elif callback_data == "cmd_workload":
-        await _workload_response(query)
-    elif callback_data == "cmd_standup":
-        await _standup_response(query)
-    elif callback_data == "cmd_sync_vibe":
-        await _sync_vibe_response(query)
-    elif callback_data == "sync_from_vibe":
-        await _sync_from_vibe_callback(query)
-    elif callback_data == "sync_to_vibe":
-        await _sync_to_vibe_callback(query)
-
-
-async def _tasks_response(query):
-    """Show tasks via callback"""
-    tasks = task_manager.get_all_tasks()
-
-    if not tasks:
-        await query.edit_message_text("No tasks found.")
         return
 
-    msg = f"**📋 All Tasks** ({len(tasks)} total)\n\n"
-
-    for task in tasks[:10]:
-        msg += f"{task.state.emoji} {task.priority.emoji} **{task.title}**\n"
-        msg += f"   Agent: {task.agent} • {task.id}\n\n"
-
-    if len(tasks) > 10:
-        msg += f"\n_Showing 10 of {len(tasks)} tasks._"
+    async with tenants.lease(update.effective_user.id) as tenant:
+        if callback_data == "cmd_tasks":
+            await _tasks_response(query, tenant.store)
+        elif callback_data.startswith("tasks:"):
+            await _tasks_page_callback(query, callback_data, tenant.store)
+        elif callback_data == "cmd_workload":
+            await _workload_response(query, tenant.store)
+        elif callback_data == "cmd_standup":
+            await _standup_response(query, tenant.store)
+        elif callback_data == "cmd_sync_vibe":
+            await _sync_vibe_response(query, tenant.vibe_sync)
+        elif callback_data == "sync_from_vibe":
+            await _sync_from_vibe_callback(query, tenant.vibe_sync)
+        elif callback_data == "sync_to_vibe":
+            await _sync_to_vibe_callback(query, tenant.vibe_sync)
+
+
+async def _tasks_response(query, store: AsyncTaskManager):
+    """Show tasks via callback"""
+    msg, reply_markup = await _tasks_page_view(store, with_filters=True)
+    await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
 
-    # Add filter buttons
-    keyboard = [
-        [
-            InlineKeyboardButton("🆕 Backlog", callback_data="filter_backlog"),
-            InlineKeyboardButton("🏃 In Progress", callback_data="filter_progress"),
-        ],
-        [
-            InlineKeyboardButton("👀 Review", callback_data="filter_review"),
-            InlineKeyboardButton("✅ Done", callback_data="filter_done"),
-        ],
-        [InlineKeyboardButton("« Back", callback_data="back_main")],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
 
+async def _tasks_page_callback(query, callback_data: str, store: AsyncTaskManager):
+    """Show a filtered page or move between pages (tasks:<n|p>:<query or #key>:<cursor>)"""
+    expired = False
+    try:
+        # The query may contain colons; the cursor never does
+        _, direction, rest = callback_data.split(":", 2)
+        query_text, cursor = rest.rsplit(":", 1)
+    except ValueError:
+        direction, query_text, cursor, expired = "n", "", "", True
+
+    if query_text.startswith("#"):
+        query_text = _saved_queries.get(query_text)
+        if query_text is None:
+            # Saved queries live in memory, so a restart or eviction loses them
+            query_text, cursor, expired = "", "", True
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            # A stale or tampered button; start the list over
+            cursor, expired = "", True
+
+    msg, reply_markup = await _tasks_page_view(
+        store,
+        query_text,
+        after=cursor if cursor and direction == "n" else None,
+        before=cursor if cursor and direction == "p" else None,
+        with_filters=True
+    )
+    if expired:
+        msg = f"⚠️ That list has expired, here is a fresh one.\n\n{msg}"
     await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
 
 
@@ -521,18 +778,9 @@ async def _agents_response(query):
     await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
 
 
-async def _workload_response(query):
+async def _workload_response(query, store: AsyncTaskManager):
     """Show workload via callback"""
-    workload = task_manager.get_workload_summary()
-    msg = "**📊 Team Workload** (active tasks)\n\n"
-
-    if not workload:
-        msg += "No active tasks right now. Clean slate!"
-    else:
-        for agent_id, count in sorted(workload.items(), key=lambda x: x[1], reverse=True):
-            agent = get_agent(agent_id)
-            if agent:
-                msg += f"{agent.emoji} **{agent.name}**: {count} tasks\n"
+    msg = await workload_message(store)
 
     keyboard = [[InlineKeyboardButton("« Back", callback_data="back_main")]]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -540,34 +788,9 @@ async def _workload_response(query):
     await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
 
 
-async def _standup_response(query):
+async def _standup_response(query, store: AsyncTaskManager):
     """Show standup via callback"""
-    in_progress = task_manager.get_tasks_by_state(TaskState.IN_PROGRESS)
-    in_review = task_manager.get_tasks_by_state(TaskState.REVIEW)
-    blocked = task_manager.get_tasks_by_state(TaskState.BLOCKED)
-
-    msg = "**🎯 Daily Standup**\n\n"
-
-    if in_progress:
-        msg += "**🏃 In Progress** (" + str(len(in_progress)) + ")\n"
-        for task in in_progress[:5]:
-            msg += f"• {task.title} ({task.agent})\n"
-        msg += "\n"
-
-    if in_review:
-        msg += "**👀 In Review** (" + str(len(in_review)) + ")\n"
-        for task in in_review[:5]:
-            msg += f"• {task.title} ({task.agent})\n"
-        msg += "\n"
-
-    if blocked:
-        msg += "**❌ Blocked** (" + str(len(blocked)) + ")\n"
-        for task in blocked[:5]:
-            msg += f"• {task.title} ({task.agent})\n"
-        msg += "\n"
-
-    if not in_progress and not in_review and not blocked:
-        msg += "All clear! No active work right now."
+    msg = await standup_message(store)
 
     keyboard = [[InlineKeyboardButton("« Back", callback_data="back_main")]]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -575,9 +798,9 @@ async def _standup_response(query):
     await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
 
 
-async def _sync_vibe_response(query):
+async def _sync_vibe_response(query, vibe_sync: VibeAugustSync):
     """Show Vibe sync status via callback"""
-    status = vibe_sync.get_sync_status()
+    status = await asyncio.to_thread(vibe_sync.get_sync_status)
 
     if not status.get("vibe_online"):
         msg = "❌ **Vibe Kanban Offline**\n\nMake sure Vibe is running."
@@ -601,12 +824,12 @@ Ready to sync!"""
     await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=reply_markup)
 
 
-async def _sync_from_vibe_callback(query):
+async def _sync_from_vibe_callback(query, vibe_sync: VibeAugustSync):
     """Handle Import from Vibe button"""
     await query.answer("⬇️ Importing tasks...")
 
     try:
-        stats = vibe_sync.sync_from_vibe()
+        stats = await asyncio.to_thread(vibe_sync.sync_from_vibe)
 
         msg = f"""✅ **Import Complete!**
 
@@ -627,12 +850,12 @@ Run /tasks to see all imported tasks!"""
         await query.edit_message_text(f"❌ Import failed: {str(e)}")
 
 
-async def _sync_to_vibe_callback(query):
+async def _sync_to_vibe_callback(query, vibe_sync: VibeAugustSync):
     """Handle Export to Vibe button"""
     await query.answer("⬆️ Exporting tasks...")
 
     try:
-        stats = vibe_sync.sync_to_vibe()
+        stats = await asyncio.to_thread(vibe_sync.sync_to_vibe)
 
         msg = f"""✅ **Export Complete!**
 
@@ -658,7 +881,8 @@ async def sync_vibe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔄 Checking Vibe Kanban connection...")
 
     # Get sync status
-    status = vibe_sync.get_sync_status()
+    async with tenants.lease(update.effective_user.id) as tenant:
+        status = await asyncio.to_thread(tenant.vibe_sync.get_sync_status)
 
     if not status.get("vibe_online"):
         await update.message.reply_text(
@@ -695,7 +919,8 @@ async def sync_from_vibe_command(update: Update, context: ContextTypes.DEFAULT_T
     await update.message.reply_text("⬇️ Importing tasks from Vibe Kanban...")
 
     try:
-        stats = vibe_sync.sync_from_vibe()
+        async with tenants.lease(update.effective_user.id) as tenant:
+            stats = await asyncio.to_thread(tenant.vibe_sync.sync_from_vibe)
 
         msg = f"""✅ **Import Complete!**
 
@@ -741,9 +966,9 @@ AGENT: <emoji>
 PRIORITY: <P0|P1|P2|P3>
 """
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+    response = await llm.complete(
+        "gpt-4o-mini",
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"Create task: {args}"}
         ],
@@ -751,7 +976,7 @@ PRIORITY: <P0|P1|P2|P3>
     )
 
     # Parse response
-    lines = response.choices[0].message.content.strip().split('\n')
+    lines = response.split('\n')
     task_data = {}
     for line in lines:
         if ':' in line:
@@ -773,12 +998,13 @@ PRIORITY: <P0|P1|P2|P3>
     priority = priority_map.get(task_data.get('PRIORITY', 'P2'), TaskPriority.P2)
 
     # Create the task
-    task = task_manager.create_task(
-        title=task_data.get('TITLE', args[:50]),
-        description=task_data.get('DESCRIPTION', args),
-        agent=agent_id,
-        priority=priority
-    )
+    async with tenants.lease(update.effective_user.id) as tenant:
+        task = await tenant.store.create_task(
+            title=task_data.get('TITLE', args[:50]),
+            description=task_data.get('DESCRIPTION', args),
+            agent=agent_id,
+            priority=priority
+        )
 
     agent = get_agent(agent_id)
     msg = f"""✅ **Task Created!**
@@ -795,40 +1021,47 @@ The task is in 🆕 BACKLOG. Ready to move to 📋 PLANNED?"""
 
 async def start_notification_scheduler(application):
     """Start the background notification scheduler"""
-    global notification_manager
-
-    # Initialize notification manager
-    notification_manager = NotificationManager(
-        bot_token=TELEGRAM_TOKEN,
-        user_id=ALLOWED_USER_ID,
-        task_manager=task_manager
-    )
-
-    # Create and start scheduler
-    scheduler = NotificationScheduler(notification_manager)
-
-    # Run scheduler in background
-    import asyncio
+    # One scheduler serves every tenant, leasing each database in turn
+    scheduler = NotificationScheduler(TELEGRAM_TOKEN, tenants)
     asyncio.create_task(scheduler.start())
 
     print("🔔 Notification system started")
     print("   - Task state change alerts: ON")
-    print("   - Daily summaries: 9:00 AM")
+    print("   - Daily summaries: per user config (default 9:00 AM)")
     print("   - Standup reminders: 9:30 AM")
     print("   - Blocked task alerts: ON")
 
 
+async def start_background_jobs(application):
+    """Start notifications, database maintenance, backups and idle tenant eviction"""
+    await start_notification_scheduler(application)
+
+    maintenance = MaintenanceScheduler(tenants, archive_after_days=ARCHIVE_AFTER_DAYS)
+    asyncio.create_task(maintenance.start())
+    print(f"🗄️ Archiving closed tasks after {ARCHIVE_AFTER_DAYS} days")
+
+    backups = BackupScheduler(
+        tenants, keep=BACKUP_KEEP, interval_seconds=BACKUP_INTERVAL_HOURS * 3600
+    )
+    asyncio.create_task(backups.start())
+    print(f"💾 Backing up task databases every {BACKUP_INTERVAL_HOURS}h (keeping {BACKUP_KEEP})")
+
+    asyncio.create_task(tenants.start_idle_eviction())
+
+
+async def shutdown(application):
+    """Finish in-flight LLM calls, then drain and close every tenant database"""
+    await llm.close()
+    await tenants.close_all()
+
+
 def main():
     """Start the bot"""
     print("🎯 Starting August - AI Product Manager Bot...")
     print(f"📁 Repository: {REPO_PATH}")
-    print(f"🔒 Authorized user: {ALLOWED_USER_ID}")
+    print(f"🔒 Tenants: {len(tenants.user_ids())} (up to {tenants.max_open} databases open)")
     print(f"👥 Team: {len(AGENTS)} agents")
 
-    # Count tasks
-    all_tasks = task_manager.get_all_tasks()
-    print(f"📋 Tasks in system: {len(all_tasks)}")
-
     app = Application.builder().token(TELEGRAM_TOKEN).build()
 
     # Command handlers
@@ -837,6 +1070,10 @@ def main():
     app.add_handler(CommandHandler("workload", workload_command))
     app.add_handler(CommandHandler("standup", standup_command))
     app.add_handler(CommandHandler("tasks", tasks_command))
+    app.add_handler(CommandHandler("find", find_command))
+    app.add_handler(CommandHandler("epic", epic_command))
+    app.add_handler(CommandHandler("subtask", subtask_command))
+    app.add_handler(CommandHandler("metrics_team", metrics_team_command))
     app.add_handler(CommandHandler("create_task", create_task_command))
     app.add_handler(CommandHandler("sync_vibe", sync_vibe_command))
 
@@ -847,7 +1084,8 @@ def main():
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
     # Start notification scheduler
-    app.post_init = start_notification_scheduler
+    app.post_init = start_background_jobs
+    app.post_shutdown = shutdown
 
     print("✅ August is online! Ready to coordinate the team.")
     app.run_polling()
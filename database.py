@@ -0,0 +1,145 @@
+"""
+SQLite connection management for August
+Keeps one long-lived writer and a small pool of readers on a WAL database
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+
+
+# Applied to every connection when it is opened
+CONNECTION_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",   # WAL + NORMAL only fsyncs at checkpoints
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",    # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 134217728",  # 128 MB memory-mapped reads
+]
+
+
+class ConnectionPool:
+    """One writer connection plus a bounded pool of reader connections"""
+
+    def __init__(self, db_path: str, max_readers: int = 4, timeout: float = 5.0):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.in_memory = db_path == ":memory:"
+
+        self._writer = self._connect()
+        if not self.in_memory:
+            try:
+                self._writer.execute("PRAGMA journal_mode = WAL")
+            except sqlite3.Error:
+                self._writer.close()
+                raise
+        self._writer_lock = threading.RLock()
+        self._writer_owner = None
+        self._after_commit: List[Callable[[], None]] = []
+
+        self._readers = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._reader_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection with August's pragmas applied"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,  # Transactions are managed explicitly
+            check_same_thread=False,
+        )
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            if read_only:
+                conn.execute("PRAGMA query_only = ON")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """
+        Yield the writer connection inside an IMMEDIATE transaction.
+        Nested use from the same thread joins the outer transaction.
+        """
+        with self._writer_lock:
+            conn = self._writer
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            self._writer_owner = threading.get_ident()
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._after_commit.clear()
+                raise
+            else:
+                conn.execute("COMMIT")
+                callbacks, self._after_commit = self._after_commit, []
+                for callback in callbacks:
+                    callback()
+            finally:
+                self._writer_owner = None
+
+    def in_write_transaction(self) -> bool:
+        """Check if the calling thread is inside a write transaction"""
+        return self._writer_owner == threading.get_ident()
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        Run callback once the current write transaction commits, while the
+        writer lock is still held. Outside a transaction it runs immediately.
+        """
+        if self.in_write_transaction():
+            self._after_commit.append(callback)
+        else:
+            callback()
+
+    @contextmanager
+    def reader(self):
+        """Yield a reader connection from the pool"""
+        # Reads issued inside a write transaction must see its uncommitted rows,
+        # and an in-memory database only exists on the writer connection.
+        if self.in_memory or self.in_write_transaction():
+            with self._writer_lock:
+                yield self._writer
+            return
+
+        with self._reader_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect(read_only=True)
+                with self._reader_lock:
+                    self._all_readers.append(conn)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self._readers.put(conn)
+
+    def close(self):
+        """Close every connection held by the pool"""
+        if self._closed:
+            return
+        self._closed = True
+
+        with self._reader_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+
+        with self._writer_lock:
+            self._writer.close()
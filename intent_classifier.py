@@ -0,0 +1,210 @@
+"""
+Intent classification for August
+Routes messages with a compiled keyword matcher and a naive Bayes model trained from intents.tsv
+"""
+
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+INTENTS = ("task_creation", "task_status", "deep_technical", "general")
+INTENT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.tsv")
+
+# The model's answer is used when its probability reaches this; below it the keywords decide
+CONFIDENCE_THRESHOLD = 0.7
+# Add-alpha smoothing; small, because the training file is small and its phrases are telling
+NB_ALPHA = 0.1
+
+# Phrases that signal an intent when the model is unsure. Bare nouns like
+# "api" or "function" are left out: they show up in every kind of message.
+INTENT_KEYWORDS = {
+    "task_creation": (
+        "create a task", "add a task", "create task", "add task", "new task",
+        "make a task", "make a ticket", "file a bug", "open a ticket",
+        "we need to implement", "we need to fix", "we need to add",
+        "let's implement", "let's fix", "let's add",
+        "kick off", "start work on", "add to the backlog",
+    ),
+    "task_status": (
+        "what's in progress", "current tasks", "task status",
+        "what are we working on", "show tasks", "what's the team",
+        "standup", "sprint status", "what's blocked", "working on",
+        "in review", "workload",
+    ),
+    "deep_technical": (
+        "how does", "how do we", "what does", "why do we", "why does",
+        "explain", "tell me about", "look into", "dive into", "walk me through",
+        "how is", "how are", "where is", "where do we", "can you explain",
+        "architecture", "implementation",
+    ),
+}
+
+# When keyword hits tie, the more specific intent wins
+_PRECEDENCE = {"task_creation": 0, "task_status": 1, "deep_technical": 2, "general": 3}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lower case with apostrophes dropped, so "What's" and "whats" match alike"""
+    return text.lower().replace("'", "").replace("’", "")
+
+
+def features(text: str) -> List[str]:
+    """Word unigrams and bigrams of a message"""
+    words = _WORD.findall(normalize(text))
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    One regex for a set of phrases, factored by shared prefixes
+    ("how does|how do we" -> "how do(?:es| we)"), so the engine walks the
+    message once and never re-reads a common prefix to try the next phrase.
+    """
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of a phrase
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Every intent's phrases compiled into one prefix-factored regex, so a
+    single scan of the message finds all hits at once (longest phrase first).
+    """
+
+    def __init__(self, keywords: Dict[str, Sequence[str]]):
+        self._intent_of = {
+            normalize(phrase): intent for intent, phrases in keywords.items() for phrase in phrases
+        }
+        self._pattern = re.compile(r"\b(?:" + _trie_pattern(self._intent_of) + r")\b")
+
+    def match(self, text: str) -> Counter:
+        """Number of phrase hits per intent"""
+        return Counter(self._intent_of[phrase] for phrase in self._pattern.findall(normalize(text)))
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes over unigram and bigram counts, with add-alpha smoothing"""
+
+    def __init__(self, alpha: float = NB_ALPHA):
+        self.alpha = alpha
+        self.labels: List[str] = []
+        self._log_prior: Dict[str, float] = {}
+        self._log_likelihood: Dict[str, Dict[str, float]] = {}
+        self._log_unseen: Dict[str, float] = {}
+        self._vocabulary: set = set()
+
+    def fit(self, samples: Iterable[Tuple[str, str]]) -> "NaiveBayes":
+        """Train on (text, label) pairs"""
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        docs = Counter()
+        for text, label in samples:
+            counts[label].update(features(text))
+            docs[label] += 1
+
+        vocabulary = set().union(*counts.values()) if counts else set()
+        total_docs = sum(docs.values())
+        self.labels = sorted(counts)
+        for label in self.labels:
+            denominator = sum(counts[label].values()) + self.alpha * (len(vocabulary) + 1)
+            self._log_prior[label] = math.log(docs[label] / total_docs)
+            self._log_likelihood[label] = {
+                token: math.log((n + self.alpha) / denominator)
+                for token, n in counts[label].items()
+            }
+            self._log_unseen[label] = math.log(self.alpha / denominator)
+        self._vocabulary = vocabulary
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Posterior probability of each label"""
+        tokens = [t for t in features(text) if t in self._vocabulary]
+        scores = {}
+        for label in self.labels:
+            likelihood, unseen = self._log_likelihood[label], self._log_unseen[label]
+            scores[label] = self._log_prior[label] + sum(likelihood.get(t, unseen) for t in tokens)
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Most likely label and its probability"""
+        proba = self.predict_proba(text)
+        label = max(proba, key=proba.get)
+        return label, proba[label]
+
+
+def load_samples(path: str = INTENT_DATA_PATH) -> List[Tuple[str, str]]:
+    """Read (text, label) pairs from an intent<TAB>message file, skipping # comments"""
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            label, sep, text = line.partition("\t")
+            if not sep or label not in INTENTS:
+                raise ValueError(f"{path}:{line_number}: expected <intent><TAB><message>")
+            samples.append((text, label))
+    return samples
+
+
+class IntentClassifier:
+    """
+    Picks "task_creation", "task_status", "deep_technical" or "general".
+
+    The naive Bayes model decides when it is at least `threshold` sure.
+    Otherwise the intent with the most keyword hits wins (ties go to the
+    more specific intent), and a message with no hits is "general".
+    """
+
+    def __init__(self, model: Optional[NaiveBayes] = None,
+                 keywords: Dict[str, Sequence[str]] = INTENT_KEYWORDS,
+                 threshold: float = CONFIDENCE_THRESHOLD):
+        self.model = model
+        self.keywords = KeywordMatcher(keywords)
+        self.threshold = threshold
+
+    @classmethod
+    def from_file(cls, path: str = INTENT_DATA_PATH, **kwargs) -> "IntentClassifier":
+        """Train the model on a labeled file; keywords only if the file is missing"""
+        try:
+            model = NaiveBayes().fit(load_samples(path))
+        except FileNotFoundError:
+            print(f"⚠️ No intent training data at {path}; classifying by keywords only")
+            model = None
+        return cls(model, **kwargs)
+
+    def explain(self, message: str) -> Tuple[str, float, str]:
+        """Intent, confidence and where the decision came from: "model", "keywords" or "default" """
+        if self.model is not None:
+            label, confidence = self.model.predict(message)
+            if confidence >= self.threshold:
+                return label, confidence, "model"
+
+        hits = self.keywords.match(message)
+        if hits:
+            intent = min(hits, key=lambda i: (-hits[i], _PRECEDENCE[i]))
+            return intent, hits[intent] / sum(hits.values()), "keywords"
+        return "general", 0.0, "default"
+
+    def classify(self, message: str) -> str:
+        """Intent of a message"""
+        return self.explain(message)[0]
@@ -0,0 +1,111 @@
+"""
+LLM gateway for August
+One async OpenAI client per process, with bounded concurrency and a clean shutdown
+"""
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+
+LLM_MAX_CONCURRENCY = 8      # Completions in flight at once; later calls wait their turn
+LLM_TIMEOUT_SECONDS = 120.0  # Per request, including GPT-5's long answers
+LLM_MAX_RETRIES = 2          # Retries on connection errors, 429s and 5xx responses
+LLM_DRAIN_SECONDS = 30.0     # How long close() waits for in-flight calls
+
+
+class LLMGateway:
+    """
+    Process-wide access to the chat completions API.
+
+    Every caller shares one AsyncOpenAI client, so HTTPS connections are
+    pooled and reused, and requests are awaited on the event loop instead of
+    holding a thread each. A semaphore caps the completions in flight, so
+    memory and connections stay flat however many messages arrive at once.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES
+    ):
+        self.client = AsyncOpenAI(api_key=api_key, timeout=timeout, max_retries=max_retries)
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._closed = False
+
+    def request_options(self, model: str, temperature: Optional[float],
+                        max_tokens: Optional[int]) -> Dict:
+        """Sampling options for a model; GPT-5 only accepts its defaults"""
+        if model.startswith("gpt-5"):
+            return {}
+        options = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        return options
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Run one chat completion and return its text"""
+        if self._closed:
+            raise RuntimeError("LLM gateway is closed")
+
+        async with self._slots:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                **self.request_options(model, temperature, max_tokens)
+            )
+        return response.choices[0].message.content.strip()
+
+    async def stream(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Run one chat completion, yielding its text as it arrives.
+        The call keeps its concurrency slot until the stream is consumed or closed.
+        """
+        if self._closed:
+            raise RuntimeError("LLM gateway is closed")
+
+        async with self._slots:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                **self.request_options(model, temperature, max_tokens)
+            )
+            try:
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await response.close()
+
+    async def close(self, drain_seconds: float = LLM_DRAIN_SECONDS):
+        """Refuse new calls, wait for in-flight ones to finish, then close the connections"""
+        self._closed = True
+
+        async def drain():
+            for _ in range(self.max_concurrency):
+                await self._slots.acquire()
+
+        try:
+            await asyncio.wait_for(drain(), timeout=drain_seconds)
+        except asyncio.TimeoutError:
+            print(f"LLM calls still running after {drain_seconds:.0f}s; closing anyway")
+        await self.client.close()
@@ -0,0 +1,75 @@
+"""
+Background database housekeeping for August
+Periodically archives closed tasks and prunes the read changelog so the active tables stay small
+"""
+
+import asyncio
+import time
+from typing import Dict, Tuple
+
+from task_manager import ARCHIVE_AFTER_DAYS
+from tenants import TenantRouter
+
+
+# A shard with no changes since its last maintenance waits this long for the next
+IDLE_MAINTENANCE_SECONDS = 24 * 3600
+
+
+class MaintenanceScheduler:
+    """
+    Runs periodic maintenance jobs on every tenant's database executor.
+    Shards unchanged since their last run are skipped for up to
+    IDLE_MAINTENANCE_SECONDS, so idle users' databases stay closed.
+    """
+
+    def __init__(
+        self,
+        tenants: TenantRouter,
+        archive_after_days: int = ARCHIVE_AFTER_DAYS,
+        interval_seconds: int = 6 * 3600
+    ):
+        self.tenants = tenants
+        self.archive_after_days = archive_after_days
+        self.interval_seconds = interval_seconds
+        # user_id -> (changelog seq after the last run, time.monotonic() of it)
+        self.last_runs: Dict[int, Tuple[int, float]] = {}
+        self.running = False
+
+    async def start(self):
+        """Start the maintenance loop"""
+        self.running = True
+
+        while self.running:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Maintenance error: {e}")
+
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self):
+        """Run every maintenance job once for each tenant that changed or is due"""
+        for user_id in self.tenants.user_ids():
+            last_run = self.last_runs.get(user_id)
+            if last_run and time.monotonic() - last_run[1] < IDLE_MAINTENANCE_SECONDS:
+                if await self.tenants.change_seq(user_id) == last_run[0]:
+                    continue
+
+            try:
+                async with self.tenants.lease(user_id) as tenant:
+                    archived = await tenant.store.archive_closed_tasks(self.archive_after_days)
+                    pruned = await tenant.store.prune_consumed_changes()
+                    # Archiving writes to the changelog too, so read it after the jobs
+                    seq = await tenant.store.latest_change_seq()
+                self.last_runs[user_id] = (seq, time.monotonic())
+            except Exception as e:
+                print(f"Maintenance error for user {user_id}: {e}")
+                continue
+            if archived:
+                print(f"🗄️ Archived {archived} closed task(s) for user {user_id}")
+            if pruned:
+                print(f"🧹 Pruned {pruned} changelog entries for user {user_id}")
+
+    def stop(self):
+        """Stop the maintenance loop"""
+        self.running = False
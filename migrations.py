@@ -0,0 +1,729 @@
+"""
+Schema migrations for the August task database
+Each migration runs once, in order, and is recorded in schema_version
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Tuple, Union
+
+# A migration step is either a SQL statement or a callable taking the connection
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+# Changelog triggers on tasks; re-created whenever the tasks table is rebuilt
+_CHANGE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_change_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO task_changes (task_id, op, agent, old_state, new_state, changed_at)
+        VALUES (new.id, 'create', new.agent, NULL, new.state,
+                strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_change_update AFTER UPDATE ON tasks
+    BEGIN
+        INSERT INTO task_changes (task_id, op, agent, old_state, new_state, changed_at)
+        VALUES (new.id, 'update', new.agent, old.state, new.state,
+                strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_change_delete AFTER DELETE ON tasks
+    BEGIN
+        INSERT INTO task_changes (task_id, op, agent, old_state, new_state, changed_at)
+        VALUES (old.id, 'delete', old.agent, old.state, NULL,
+                strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+    END
+    """,
+]
+
+
+# Board counter triggers on tasks; kept in the same transaction as each mutation
+_COUNT_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO board_counts (agent, state, priority, count)
+        VALUES (new.agent, new.state, new.priority, 1)
+        ON CONFLICT (agent, state, priority) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_delete AFTER DELETE ON tasks
+    BEGIN
+        UPDATE board_counts SET count = count - 1
+        WHERE agent = old.agent AND state = old.state AND priority = old.priority;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_count_update AFTER UPDATE OF agent, state, priority ON tasks
+    WHEN old.agent IS NOT new.agent OR old.state IS NOT new.state OR old.priority IS NOT new.priority
+    BEGIN
+        UPDATE board_counts SET count = count - 1
+        WHERE agent = old.agent AND state = old.state AND priority = old.priority;
+        INSERT INTO board_counts (agent, state, priority, count)
+        VALUES (new.agent, new.state, new.priority, 1)
+        ON CONFLICT (agent, state, priority) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
+
+
+# Hierarchy triggers: task_tree is the closure of parent_task (every ancestor/descendant
+# pair with its depth, plus a depth-0 row per task) and task_rollups counts each task's
+# descendants per state. Both stay current in the same transaction as the change.
+_TREE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_tree_check_insert BEFORE INSERT ON tasks
+    WHEN new.parent_task = new.id
+    BEGIN
+        SELECT RAISE(ABORT, 'a task cannot be its own parent');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_tree_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO task_tree (ancestor, descendant, depth) VALUES (new.id, new.id, 0);
+        INSERT INTO task_tree (ancestor, descendant, depth)
+        SELECT ancestor, new.id, depth + 1 FROM task_tree WHERE descendant = new.parent_task;
+        INSERT INTO task_rollups (task_id, state, count)
+        SELECT ancestor, new.state, 1 FROM task_tree WHERE descendant = new.id AND depth > 0
+        ON CONFLICT (task_id, state) DO UPDATE SET count = count + 1;
+        -- Adopt subtasks that arrived before their parent (imports, archive restores)
+        UPDATE tasks SET parent_task = new.id WHERE parent_task = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_tree_check_move BEFORE UPDATE OF parent_task ON tasks
+    WHEN new.parent_task IS NOT NULL AND EXISTS (
+        SELECT 1 FROM task_tree WHERE ancestor = new.id AND descendant = new.parent_task
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'parent_task would create a cycle');
+    END
+    """,
+    # Moves also handle a state change made in the same UPDATE, so the state
+    # trigger below skips those rows; trigger order does not matter.
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_tree_move AFTER UPDATE OF parent_task ON tasks
+    WHEN old.parent_task IS NOT new.parent_task OR (
+        new.parent_task IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM task_tree WHERE ancestor = new.parent_task AND descendant = new.id
+        )
+    )
+    BEGIN
+        UPDATE task_rollups SET count = count - (
+            SELECT COUNT(*) FROM task_tree s JOIN tasks t ON t.id = s.descendant
+            WHERE s.ancestor = new.id
+              AND (CASE WHEN s.descendant = new.id THEN old.state ELSE t.state END) = task_rollups.state
+        )
+        WHERE task_id IN (SELECT ancestor FROM task_tree WHERE descendant = new.id AND depth > 0);
+
+        DELETE FROM task_tree
+        WHERE descendant IN (SELECT descendant FROM task_tree WHERE ancestor = new.id)
+          AND ancestor IN (SELECT ancestor FROM task_tree WHERE descendant = new.id AND depth > 0);
+
+        INSERT INTO task_tree (ancestor, descendant, depth)
+        SELECT p.ancestor, s.descendant, p.depth + s.depth + 1
+        FROM task_tree p, task_tree s
+        WHERE p.descendant = new.parent_task AND s.ancestor = new.id;
+
+        INSERT INTO task_rollups (task_id, state, count)
+        SELECT p.ancestor, t.state, COUNT(*)
+        FROM task_tree p, task_tree s JOIN tasks t ON t.id = s.descendant
+        WHERE p.descendant = new.id AND p.depth > 0 AND s.ancestor = new.id
+        GROUP BY p.ancestor, t.state
+        ON CONFLICT (task_id, state) DO UPDATE SET count = count + excluded.count;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_tree_state AFTER UPDATE OF state ON tasks
+    WHEN old.state IS NOT new.state AND old.parent_task IS new.parent_task
+    BEGIN
+        UPDATE task_rollups SET count = count - 1
+        WHERE state = old.state
+          AND task_id IN (SELECT ancestor FROM task_tree WHERE descendant = new.id AND depth > 0);
+        INSERT INTO task_rollups (task_id, state, count)
+        SELECT ancestor, new.state, 1 FROM task_tree WHERE descendant = new.id AND depth > 0
+        ON CONFLICT (task_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_tree_delete AFTER DELETE ON tasks
+    BEGIN
+        -- Subtasks move up to the deleted task's parent
+        UPDATE tasks SET parent_task = old.parent_task WHERE parent_task = old.id;
+        UPDATE task_rollups SET count = count - 1
+        WHERE state = old.state
+          AND task_id IN (SELECT ancestor FROM task_tree WHERE descendant = old.id AND depth > 0);
+        DELETE FROM task_tree WHERE descendant = old.id OR ancestor = old.id;
+        DELETE FROM task_rollups WHERE task_id = old.id;
+    END
+    """,
+]
+
+# Recompute task_tree and task_rollups from parent_task (migration and TaskManager.rebuild_hierarchy)
+REBUILD_HIERARCHY = [
+    "DELETE FROM task_tree",
+    "DELETE FROM task_rollups",
+    """
+    INSERT OR IGNORE INTO task_tree (ancestor, descendant, depth)
+    WITH RECURSIVE chain (ancestor, descendant, depth) AS (
+        SELECT id, id, 0 FROM tasks
+        UNION ALL
+        SELECT parent.id, chain.descendant, chain.depth + 1
+        FROM chain
+        JOIN tasks child ON child.id = chain.ancestor
+        JOIN tasks parent ON parent.id = child.parent_task
+        WHERE chain.depth < 64  -- Stops on cycles left by direct edits
+    )
+    SELECT ancestor, descendant, depth FROM chain
+    """,
+    """
+    INSERT INTO task_rollups (task_id, state, count)
+    SELECT tree.ancestor, tasks.state, COUNT(*)
+    FROM task_tree tree JOIN tasks ON tasks.id = tree.descendant
+    WHERE tree.depth > 0
+    GROUP BY tree.ancestor, tasks.state
+    """,
+]
+
+# flow_stats holds duration histograms per week (the Monday it starts on), metric,
+# agent and priority. Metrics are lead_time and cycle_time, counted at a task's
+# first DONE, and state:<STATE> for each interval a task spent in a state.
+# Buckets are the lower bound in hours: hourly below a day, 6-hourly below a
+# week, daily below four weeks, weekly beyond.
+_FLOW_BUCKET = """
+    CASE WHEN hours < 24 THEN CAST(hours AS INTEGER)
+         WHEN hours < 168 THEN CAST(hours / 6 AS INTEGER) * 6
+         WHEN hours < 672 THEN CAST(hours / 24 AS INTEGER) * 24
+         ELSE CAST(hours / 168 AS INTEGER) * 168 END
+"""
+_FLOW_WEEK = "date({at}, 'weekday 0', '-6 days')"
+_JULIAN_CREATED = "(t.created_at / 86400000000.0 + 2440587.5)"  # epoch us as julianday()
+# History rows before the new one, ordered by (changed_at, id) like the rebuild's window
+_BEFORE_NEW = "({h}.changed_at < new.changed_at OR ({h}.changed_at = new.changed_at AND {h}.id < new.id))"
+
+# Rows moved back by restore_archived_task were already counted when first written
+_FLOW_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_task_history_flow AFTER INSERT ON task_history
+    WHEN new.field = 'state' AND new.old_value IS NOT new.new_value
+      AND NOT EXISTS (SELECT 1 FROM task_history_archive WHERE id = new.id)
+    BEGIN
+        INSERT INTO flow_stats (week, metric, agent, priority, bucket, count, hours)
+        SELECT {_FLOW_WEEK.format(at="new.changed_at")}, metric, agent, priority,
+               {_FLOW_BUCKET}, 1, hours
+        FROM (
+            SELECT 'state:' || new.old_value AS metric, t.agent, t.priority,
+                   MAX(0, julianday(new.changed_at) - COALESCE(
+                       julianday((
+                           SELECT MAX(p.changed_at) FROM task_history p
+                           WHERE p.task_id = new.task_id AND p.field = 'state'
+                             AND {_BEFORE_NEW.format(h="p")}
+                       )),
+                       {_JULIAN_CREATED}
+                   )) * 24 AS hours
+            FROM tasks t WHERE t.id = new.task_id
+            UNION ALL
+            SELECT 'lead_time', t.agent, t.priority,
+                   MAX(0, julianday(new.changed_at) - {_JULIAN_CREATED}) * 24
+            FROM tasks t WHERE t.id = new.task_id AND new.new_value = 'DONE'
+            UNION ALL
+            SELECT 'cycle_time', t.agent, t.priority,
+                   MAX(0, julianday(new.changed_at) - julianday(started.at)) * 24
+            FROM tasks t, (
+                SELECT MIN(s.changed_at) AS at FROM task_history s
+                WHERE s.task_id = new.task_id AND s.field = 'state' AND s.new_value = 'IN_PROGRESS'
+                  AND {_BEFORE_NEW.format(h="s")}
+            ) started
+            WHERE t.id = new.task_id AND new.new_value = 'DONE' AND started.at IS NOT NULL
+        )
+        -- Only a task's first completion counts towards lead time and throughput
+        WHERE metric NOT IN ('lead_time', 'cycle_time') OR NOT EXISTS (
+            SELECT 1 FROM task_history d
+            WHERE d.task_id = new.task_id AND d.field = 'state' AND d.new_value = 'DONE'
+              AND {_BEFORE_NEW.format(h="d")}
+        )
+        ON CONFLICT (week, metric, agent, priority, bucket) DO UPDATE SET
+            count = count + 1, hours = hours + excluded.hours;
+    END
+    """,
+]
+
+
+def _flow_samples(history: str, owners: str) -> str:
+    """
+    SELECT of flow_stats rows (week, metric, agent, priority, bucket, count,
+    hours) for the state history rows in `history`, attributed to their
+    tasks in `owners`. Both are subqueries; no CTE, so triggers can use it.
+    """
+    return f"""
+    SELECT {_FLOW_WEEK.format(at="changed_at")} AS week, metric, agent, priority,
+           {_FLOW_BUCKET} AS bucket, COUNT(*) AS samples, SUM(hours) AS total_hours
+    FROM (
+        SELECT s.changed_at, s.agent, s.priority,
+               CASE m.kind WHEN 'state' THEN 'state:' || s.old_value ELSE m.kind END AS metric,
+               MAX(0, julianday(s.changed_at) - CASE m.kind
+                   WHEN 'state' THEN COALESCE(julianday(s.previous_at), s.created)
+                   WHEN 'lead_time' THEN s.created
+                   ELSE julianday(s.started_at) END) * 24 AS hours
+        FROM (
+            SELECT h.*, t.agent, t.priority, {_JULIAN_CREATED} AS created
+            FROM (
+                SELECT *,
+                       LAG(changed_at) OVER task AS previous_at,
+                       MIN(CASE WHEN new_value = 'IN_PROGRESS' THEN changed_at END) OVER task AS started_at,
+                       COUNT(CASE WHEN new_value = 'DONE' THEN 1 END) OVER task AS completions
+                FROM ({history})
+                WINDOW task AS (PARTITION BY task_id ORDER BY changed_at, id ROWS UNBOUNDED PRECEDING)
+            ) h
+            JOIN ({owners}) t ON t.id = h.task_id
+        ) s
+        JOIN (SELECT 'state' AS kind UNION ALL SELECT 'lead_time' UNION ALL SELECT 'cycle_time') m
+          ON s.old_value IS NOT s.new_value AND (
+               m.kind = 'state'
+               -- Only a task's first completion counts towards lead time and throughput
+               OR s.new_value = 'DONE' AND s.completions = 1
+                  AND (m.kind = 'lead_time' OR s.started_at IS NOT NULL)
+          )
+    )
+    GROUP BY week, metric, agent, priority, bucket
+    """
+
+
+# Recompute flow_stats from the full (active and archived) state history
+REBUILD_FLOW_STATS = [
+    "DELETE FROM flow_stats",
+    "INSERT INTO flow_stats (week, metric, agent, priority, bucket, count, hours)" + _flow_samples(
+        history="""
+            SELECT id, task_id, old_value, new_value, changed_at
+            FROM task_history WHERE field = 'state'
+            UNION ALL
+            SELECT id, task_id, old_value, new_value, changed_at
+            FROM task_history_archive WHERE field = 'state'
+        """,
+        owners="""
+            SELECT id, agent, priority, created_at FROM tasks
+            UNION ALL
+            SELECT id, agent, priority, created_at FROM tasks_archive
+        """
+    ),
+]
+
+# A task's samples sit under its current agent and priority, as in the rebuild.
+# Deleting a task takes them back out of flow_stats, computed from its history
+# before delete_task removes it. Archiving moves the task to tasks_archive
+# first and keeps its samples, as the rebuild does.
+_TASK_STATE_HISTORY = """
+    SELECT id, task_id, old_value, new_value, changed_at
+    FROM task_history WHERE task_id = old.id AND field = 'state'
+"""
+_DELETED_TASK_SAMPLES = _flow_samples(
+    history=_TASK_STATE_HISTORY,
+    owners="SELECT id, agent, priority, created_at FROM tasks WHERE id = old.id"
+)
+_FLOW_DELETE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_flow_delete BEFORE DELETE ON tasks
+    WHEN NOT EXISTS (SELECT 1 FROM tasks_archive WHERE id = old.id)
+    BEGIN
+        UPDATE flow_stats SET count = flow_stats.count - gone.samples,
+                              hours = flow_stats.hours - gone.total_hours
+        FROM ({_DELETED_TASK_SAMPLES}) AS gone
+        WHERE flow_stats.week = gone.week AND flow_stats.metric = gone.metric
+          AND flow_stats.agent = gone.agent AND flow_stats.priority = gone.priority
+          AND flow_stats.bucket = gone.bucket;
+        DELETE FROM flow_stats WHERE count <= 0;
+    END
+    """,
+]
+
+# Reassigning a task (or re-dating it, e.g. import_ndjson with replace=True)
+# moves its samples from the old agent/priority/created_at to the new ones
+_REASSIGNED_TASK_SAMPLES = {
+    side: _flow_samples(
+        history=_TASK_STATE_HISTORY,
+        owners=f"SELECT {side}.id AS id, {side}.agent AS agent, {side}.priority AS priority, "
+               f"{side}.created_at AS created_at"
+    )
+    for side in ("old", "new")
+}
+_FLOW_REASSIGN_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tasks_flow_reassign AFTER UPDATE OF agent, priority, created_at ON tasks
+    WHEN old.agent IS NOT new.agent OR old.priority IS NOT new.priority
+      OR old.created_at IS NOT new.created_at
+    BEGIN
+        UPDATE flow_stats SET count = flow_stats.count - moved.samples,
+                              hours = flow_stats.hours - moved.total_hours
+        FROM ({_REASSIGNED_TASK_SAMPLES["old"]}) AS moved
+        WHERE flow_stats.week = moved.week AND flow_stats.metric = moved.metric
+          AND flow_stats.agent = moved.agent AND flow_stats.priority = moved.priority
+          AND flow_stats.bucket = moved.bucket;
+        DELETE FROM flow_stats WHERE count <= 0;
+        INSERT INTO flow_stats (week, metric, agent, priority, bucket, count, hours)
+        SELECT * FROM ({_REASSIGNED_TASK_SAMPLES["new"]}) WHERE true
+        ON CONFLICT (week, metric, agent, priority, bucket) DO UPDATE SET
+            count = count + excluded.count, hours = hours + excluded.hours;
+    END
+    """,
+]
+
+
+def _iso_to_epoch_us(value: str) -> int:
+    """Convert an ISO timestamp to microseconds since the naive 1970 epoch"""
+    delta = datetime.fromisoformat(value) - datetime(1970, 1, 1)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _rebuild_tasks_with_epoch_timestamps(conn: sqlite3.Connection):
+    """Rebuild tasks with INTEGER created_at/updated_at (TEXT affinity would stringify them)"""
+    conn.create_function("iso_to_epoch_us", 1, _iso_to_epoch_us, deterministic=True)
+    conn.execute("""
+        CREATE TABLE tasks_new (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            agent TEXT NOT NULL,
+            state TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            parent_task TEXT,
+            tags TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO tasks_new
+        SELECT id, title, description, agent, state, priority,
+               iso_to_epoch_us(created_at), iso_to_epoch_us(updated_at), parent_task, tags
+        FROM tasks
+    """)
+    # Dropping tasks also drops its indexes and changelog triggers
+    conn.execute("DROP TABLE tasks")
+    conn.execute("ALTER TABLE tasks_new RENAME TO tasks")
+
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Create tasks and task_history tables", [
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            agent TEXT NOT NULL,
+            state TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            parent_task TEXT,
+            tags TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS task_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            old_value TEXT,
+            new_value TEXT,
+            changed_at TEXT NOT NULL,
+            FOREIGN KEY (task_id) REFERENCES tasks(id)
+        )
+        """,
+    ]),
+
+    (2, "Index tasks for agent, state and workload queries", [
+        # get_tasks_by_agent: WHERE agent = ? ORDER BY updated_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_tasks_agent_updated ON tasks(agent, updated_at)",
+        # get_tasks_by_state: WHERE state = ? ORDER BY priority, updated_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_tasks_state_priority_updated "
+        "ON tasks(state, priority, updated_at DESC)",
+        # get_workload_summary: covering index for GROUP BY agent over active states
+        "CREATE INDEX IF NOT EXISTS idx_tasks_agent_state ON tasks(agent, state)",
+        # get_all_tasks: ORDER BY updated_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks(updated_at)",
+    ]),
+
+    (3, "Index task_history by task", [
+        "CREATE INDEX IF NOT EXISTS idx_task_history_task_changed "
+        "ON task_history(task_id, changed_at)",
+    ]),
+
+    (4, "Add id tiebreak to updated_at indexes for keyset pagination", [
+        # get_tasks_page: ORDER BY updated_at DESC, id DESC, optionally per agent/state
+        "DROP INDEX IF EXISTS idx_tasks_updated",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_updated_id ON tasks(updated_at, id)",
+        "DROP INDEX IF EXISTS idx_tasks_agent_updated",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_agent_updated_id ON tasks(agent, updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_state_updated_id ON tasks(state, updated_at, id)",
+    ]),
+
+    (5, "Add task_changes changelog with durable consumer cursors", [
+        """
+        CREATE TABLE IF NOT EXISTS task_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            agent TEXT,
+            old_state TEXT,
+            new_state TEXT,
+            changed_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS change_cursors (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+        # Triggers write the changelog inside the same transaction as the mutation
+        *_CHANGE_TRIGGERS,
+    ]),
+
+    (6, "Store task timestamps as integer epoch microseconds", [
+        _rebuild_tasks_with_epoch_timestamps,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_state_priority_updated "
+        "ON tasks(state, priority, updated_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_agent_state ON tasks(agent, state)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_updated_id ON tasks(updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_agent_updated_id ON tasks(agent, updated_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_state_updated_id ON tasks(state, updated_at, id)",
+        *_CHANGE_TRIGGERS,
+    ]),
+
+    (7, "Full-text search over task titles and descriptions", [
+        # External-content FTS5 index over tasks, keyed by the tasks rowid
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content='tasks', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update AFTER UPDATE OF title, description ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END
+        """,
+        "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+        # Exact title lookups (Vibe import dedup)
+        "CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks(title)",
+    ]),
+
+    (8, "Incrementally maintained agent x state x priority counters", [
+        """
+        CREATE TABLE IF NOT EXISTS board_counts (
+            agent TEXT NOT NULL,
+            state TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (agent, state, priority)
+        ) WITHOUT ROWID
+        """,
+        *_COUNT_TRIGGERS,
+        "DELETE FROM board_counts",
+        """
+        INSERT INTO board_counts (agent, state, priority, count)
+        SELECT agent, state, priority, COUNT(*) FROM tasks GROUP BY agent, state, priority
+        """,
+    ]),
+
+    (9, "Archive tables for closed tasks and their history", [
+        """
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            agent TEXT NOT NULL,
+            state TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            parent_task TEXT,
+            tags TEXT,
+            archived_at INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS task_history_archive (
+            id INTEGER PRIMARY KEY,
+            task_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            old_value TEXT,
+            new_value TEXT,
+            changed_at TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_task_history_archive_task_changed "
+        "ON task_history_archive(task_id, changed_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_archive_title ON tasks_archive(title)",
+        # Archived tasks stay searchable through their own full-text index
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_archive_fts USING fts5(
+            title, description,
+            content='tasks_archive', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_archive_fts_insert AFTER INSERT ON tasks_archive
+        BEGIN
+            INSERT INTO tasks_archive_fts (rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_archive_fts_delete AFTER DELETE ON tasks_archive
+        BEGIN
+            INSERT INTO tasks_archive_fts (tasks_archive_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END
+        """,
+    ]),
+
+    (10, "Optimistic version column on tasks", [
+        "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE tasks_archive ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    ]),
+
+    (11, "Task hierarchy: closure table and per-state subtree rollups", [
+        """
+        CREATE TABLE IF NOT EXISTS task_tree (
+            ancestor TEXT NOT NULL,
+            descendant TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor, descendant)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_task_tree_descendant ON task_tree(descendant, depth)",
+        """
+        CREATE TABLE IF NOT EXISTS task_rollups (
+            task_id TEXT NOT NULL,
+            state TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (task_id, state)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks(parent_task)",
+        *_TREE_TRIGGERS,
+        *REBUILD_HIERARCHY,
+    ]),
+
+    (12, "Weekly flow histograms for lead time, cycle time and time in state", [
+        """
+        CREATE TABLE IF NOT EXISTS flow_stats (
+            week TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            agent TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            hours REAL NOT NULL,
+            PRIMARY KEY (week, metric, agent, priority, bucket)
+        ) WITHOUT ROWID
+        """,
+        *_FLOW_TRIGGERS,
+        *REBUILD_FLOW_STATS,
+    ]),
+
+    (13, "Cache of LLM answers keyed by question and board version", [
+        """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            intent TEXT NOT NULL,
+            model TEXT NOT NULL,
+            board_seq INTEGER NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used)",
+    ]),
+
+    (14, "Leases on task ID worker characters, one per writing process", [
+        """
+        CREATE TABLE IF NOT EXISTS id_workers (
+            worker INTEGER PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """,
+    ]),
+
+    (15, "Take deleted tasks out of the flow histograms", [
+        *_FLOW_DELETE_TRIGGERS,
+        # Drops samples of tasks deleted before the trigger existed
+        *REBUILD_FLOW_STATS,
+    ]),
+
+    (16, "Move flow samples with a task when it is reassigned", [
+        *_FLOW_REASSIGN_TRIGGERS,
+        # Re-files samples of tasks reassigned before the trigger existed
+        *REBUILD_FLOW_STATS,
+    ]),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the highest applied migration version (0 for a fresh database)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply all pending migrations on an open transaction.
+    Returns the number of migrations applied.
+    """
+    current = get_schema_version(conn)
+    applied = 0
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+
+        for step in steps:
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+
+        conn.execute(
+            "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+            (version, description, datetime.now().isoformat())
+        )
+        applied += 1
+
+    return applied
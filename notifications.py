@@ -4,28 +4,53 @@ Sends updates about task state changes and agent activity
 """
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, List, Tuple
 from telegram import Bot
-from task_manager import TaskManager, TaskState, Task
+from task_manager import TaskState, Task, TaskChange
+from task_query import compile_query
+from async_task_manager import AsyncTaskManager
+from tenants import TenantRouter
 from agents import get_agent
 import json
 
 
+# Changelog consumer name under which the notification cursor is stored
+CHANGE_CONSUMER = "notifications"
+
+# More state changes than this in one check are sent as a single digest
+MAX_INDIVIDUAL_UPDATES = 5
+
+# A shard with no new changes is still opened this often, for the stale-P0 alert
+P0_RECHECK_SECONDS = 3600
+
+# Scheduled messages go out within this many minutes of their configured time
+SCHEDULE_WINDOW_MINUTES = 5
+
+
+def within_window(hhmm: str, now: datetime) -> bool:
+    """Check if now is within SCHEDULE_WINDOW_MINUTES of an "HH:MM" time of day"""
+    target = datetime.strptime(hhmm, "%H:%M").time()
+    return abs((now.hour * 60 + now.minute) -
+               (target.hour * 60 + target.minute)) <= SCHEDULE_WINDOW_MINUTES
+
+
 class NotificationManager:
     """Manages proactive notifications for task and agent updates"""
 
-    def __init__(self, bot_token: str, user_id: int, task_manager: TaskManager):
+    def __init__(self, bot_token: str, user_id: int, task_manager: Optional[AsyncTaskManager],
+                 config: Optional[Dict] = None):
         self.bot = Bot(token=bot_token)
         self.user_id = user_id
         self.task_manager = task_manager
-        self.last_check = datetime.now()
-        self.notification_prefs = self._load_preferences()
+        self.change_consumer = f"{CHANGE_CONSUMER}:{user_id}"
+        self.notification_prefs = self._load_preferences(config or {})
 
-    def _load_preferences(self) -> Dict:
+    def _load_preferences(self, config: Dict) -> Dict:
         """Load user notification preferences"""
         # Default preferences
-        return {
+        prefs = {
             "task_state_changes": True,
             "daily_summary": True,
             "daily_summary_time": "09:00",
@@ -38,58 +63,105 @@ class NotificationManager:
             "standup_time": "09:30",
         }
 
-    async def check_and_notify(self):
-        """Check for changes and send notifications"""
+        # Overrides from the user's configs/user_<id>.json (see setup.py)
+        settings = config.get("notifications") or {}
+        if "enabled" in settings:
+            prefs["daily_summary"] = settings["enabled"]
+        if settings.get("daily_summary_time"):
+            prefs["daily_summary_time"] = settings["daily_summary_time"]
+        if "standup_reminder" in settings:
+            prefs["standup_reminder"] = settings["standup_reminder"]
+        return prefs
+
+    async def check_and_notify(self) -> Optional[int]:
+        """Check for changes and send notifications; returns the saved cursor, or None on error"""
         try:
+            # Pick up writes made by other processes (e.g. a separate sync worker)
+            await self.task_manager.sync_cache()
+
+            # Read everything that changed since the stored cursor
+            cursor, changes = await self._read_new_changes()
+
             # Check for task state changes since last check
-            await self._check_task_state_changes()
+            await self._check_task_state_changes(changes)
 
             # Check for blocked tasks
-            await self._check_blocked_tasks()
+            await self._check_blocked_tasks(changes)
 
             # Check for P0 tasks needing attention
             await self._check_p0_tasks()
 
-            # Update last check time
-            self.last_check = datetime.now()
+            # Only advance the cursor once the notifications went out
+            if changes:
+                cursor = changes[-1].seq
+            await self.task_manager.save_change_cursor(self.change_consumer, cursor)
+            return cursor
 
         except Exception as e:
             print(f"Notification error: {e}")
-
-    async def _check_task_state_changes(self):
+            return None
+
+    async def _read_new_changes(self) -> Tuple[int, List[TaskChange]]:
+        """Read changelog entries after the durable cursor"""
+        cursor = await self.task_manager.get_change_cursor(self.change_consumer)
+        if cursor is None:
+            # First run: start from now instead of replaying the whole history
+            return await self.task_manager.latest_change_seq(), []
+
+        changes = []
+        while True:
+            batch = await self.task_manager.changes_since(cursor)
+            if not batch:
+                return cursor, changes
+            changes.extend(batch)
+            cursor = batch[-1].seq
+
+    async def _check_task_state_changes(self, changes: List[TaskChange]):
         """Detect and notify about task state changes"""
         if not self.notification_prefs.get("task_state_changes"):
             return
 
-        # Get recently updated tasks (last 5 minutes)
-        all_tasks = self.task_manager.get_all_tasks()
-        recent_updates = [
-            t for t in all_tasks
-            if (datetime.now() - t.updated_at).total_seconds() < 300
-        ]
-
-        for task in recent_updates:
-            # Skip if we already notified about this
-            if task.updated_at <= self.last_check:
-                continue
+        # Newly created tasks and state transitions, latest change per task
+        changed_ids = list(dict.fromkeys(
+            change.task_id for change in changes
+            if change.op == 'create' or change.state_changed
+        ))
+
+        tasks = []
+        for task_id in changed_ids:
+            task = await self.task_manager.get_task(task_id)
+            if task:  # Skip tasks deleted since
+                tasks.append(task)
+
+        if len(tasks) > MAX_INDIVIDUAL_UPDATES:
+            msg = f"📋 **{len(tasks)} Tasks Updated**\n\n"
+            for task in tasks[:MAX_INDIVIDUAL_UPDATES]:
+                msg += f"{task.state.emoji} {task.title} ({task.state.display_name})\n"
+            msg += f"\n...and {len(tasks) - MAX_INDIVIDUAL_UPDATES} more. Send `/tasks` to see them."
+            await self.send_notification(msg)
+            return
 
+        for task in tasks:
             agent = get_agent(task.agent)
             msg = self._format_task_update(task, agent.emoji if agent else "🤖")
             await self.send_notification(msg)
 
-    async def _check_blocked_tasks(self):
+    async def _check_blocked_tasks(self, changes: List[TaskChange]):
         """Alert when tasks become blocked"""
         if not self.notification_prefs.get("agent_blocked_alerts"):
             return
 
-        blocked_tasks = self.task_manager.get_tasks_by_state(TaskState.BLOCKED)
-
         # Only alert on newly blocked tasks
-        newly_blocked = [
-            t for t in blocked_tasks
-            if (datetime.now() - t.updated_at).total_seconds() < 300
-            and t.updated_at > self.last_check
-        ]
+        blocked_ids = list(dict.fromkeys(
+            change.task_id for change in changes
+            if change.new_state == TaskState.BLOCKED and change.old_state != TaskState.BLOCKED
+        ))
+
+        newly_blocked = []
+        for task_id in blocked_ids:
+            task = await self.task_manager.get_task(task_id)
+            if task and task.state == TaskState.BLOCKED:
+                newly_blocked.append(task)
 
         if newly_blocked:
             msg = f"🚨 **{len(newly_blocked)} Task(s) Blocked!**\n\n"
@@ -106,22 +178,15 @@ class NotificationManager:
         if not self.notification_prefs.get("p0_task_alerts"):
             return
 
-        all_tasks = self.task_manager.get_all_tasks()
-        p0_in_progress = [
-            t for t in all_tasks
-            if t.priority.name == "P0" and t.state == TaskState.IN_PROGRESS
-        ]
-
-        # Alert if P0 tasks have been in progress for >24 hours
-        stale_p0 = [
-            t for t in p0_in_progress
-            if (datetime.now() - t.updated_at).total_seconds() > 86400
-        ]
+        # Filtered in SQL: P0 tasks in progress and untouched for over 24 hours
+        stale_filter = {'query': compile_query("prio:P0 state:progress updated:>24h")}
+        stale_p0, _, _ = await self.task_manager.get_tasks_page(stale_filter, limit=3)
 
         if stale_p0:
+            stale_count = await self.task_manager.count_tasks(stale_filter)
             msg = f"⏰ **P0 Task Alert**\n\n"
-            msg += f"{len(stale_p0)} critical task(s) in progress >24h:\n\n"
-            for task in stale_p0[:3]:
+            msg += f"{stale_count} critical task(s) in progress >24h:\n\n"
+            for task in stale_p0:
                 agent = get_agent(task.agent)
                 msg += f"🔴 {task.title}\n"
                 msg += f"   {agent.emoji if agent else '🤖'} {task.agent}\n\n"
@@ -155,28 +220,29 @@ class NotificationManager:
         if not self.notification_prefs.get("daily_summary"):
             return
 
-        in_progress = self.task_manager.get_tasks_by_state(TaskState.IN_PROGRESS)
-        in_review = self.task_manager.get_tasks_by_state(TaskState.REVIEW)
-        blocked = self.task_manager.get_tasks_by_state(TaskState.BLOCKED)
+        counts = await self.task_manager.count_by_state()
+        in_progress = await self.task_manager.get_tasks_by_state(TaskState.IN_PROGRESS, limit=5)
+        in_review = await self.task_manager.get_tasks_by_state(TaskState.REVIEW, limit=5)
+        blocked = await self.task_manager.get_tasks_by_state(TaskState.BLOCKED, limit=3)
 
         msg = f"🌅 **Daily Summary - {datetime.now().strftime('%B %d, %Y')}**\n\n"
 
         if in_progress:
-            msg += f"**🏃 In Progress** ({len(in_progress)})\n"
+            msg += f"**🏃 In Progress** ({counts[TaskState.IN_PROGRESS]})\n"
             for task in in_progress[:5]:
                 agent = get_agent(task.agent)
                 msg += f"• {task.title} ({agent.emoji if agent else '🤖'})\n"
             msg += "\n"
 
         if in_review:
-            msg += f"**👀 In Review** ({len(in_review)})\n"
+            msg += f"**👀 In Review** ({counts[TaskState.REVIEW]})\n"
             for task in in_review[:5]:
                 agent = get_agent(task.agent)
                 msg += f"• {task.title} ({agent.emoji if agent else '🤖'})\n"
             msg += "\n"
 
         if blocked:
-            msg += f"**❌ Blocked** ({len(blocked)})\n"
+            msg += f"**❌ Blocked** ({counts[TaskState.BLOCKED]})\n"
             for task in blocked[:3]:
                 agent = get_agent(task.agent)
                 msg += f"• {task.title} ({agent.emoji if agent else '🤖'})\n"
@@ -218,11 +284,32 @@ class NotificationManager:
         await self.send_notification(msg)
 
 
-class NotificationScheduler:
-    """Schedules periodic notifications"""
+class TenantSchedule:
+    """What a tenant's last notification round covered, kept outside its shard"""
+
+    def __init__(self):
+        self.seen_seq: Optional[int] = None  # Changelog cursor the last check saved
+        self.next_p0_check = 0.0             # time.monotonic() deadline
+        self.summary_sent: Optional[date] = None
+        self.standup_sent: Optional[date] = None
+
 
-    def __init__(self, notification_manager: NotificationManager):
-        self.notification_manager = notification_manager
+class NotificationScheduler:
+    """
+    Schedules periodic notifications for every tenant.
+
+    A shard is only leased when something is due for it: changelog entries
+    past the last saved cursor (read from the shard file without opening it),
+    a daily summary or standup reminder, or the hourly stale-P0 check. Idle
+    shards stay closed, so the router's open-shard cap and idle timeout hold
+    however many users there are.
+    """
+
+    def __init__(self, bot_token: str, tenants: TenantRouter):
+        self.bot_token = bot_token
+        self.tenants = tenants
+        self.managers: Dict[int, NotificationManager] = {}
+        self.schedules: Dict[int, TenantSchedule] = {}
         self.running = False
 
     async def start(self):
@@ -233,13 +320,7 @@ class NotificationScheduler:
         while self.running:
             try:
                 # Check every 5 minutes for state changes
-                await self.notification_manager.check_and_notify()
-
-                # Check if it's time for daily summary
-                await self._check_daily_summary()
-
-                # Check if it's time for standup reminder
-                await self._check_standup_reminder()
+                await self.run_once()
 
                 # Wait 5 minutes before next check
                 await asyncio.sleep(300)
@@ -248,30 +329,56 @@ class NotificationScheduler:
                 print(f"Scheduler error: {e}")
                 await asyncio.sleep(60)
 
-    async def _check_daily_summary(self):
-        """Check if it's time for daily summary"""
-        prefs = self.notification_manager.notification_prefs
-        summary_time = prefs.get("daily_summary_time", "09:00")
-
-        now = datetime.now()
-        target_time = datetime.strptime(summary_time, "%H:%M").time()
-
-        # Send if current time matches target (within 5 min window)
-        if abs((now.time().hour * 60 + now.time().minute) -
-               (target_time.hour * 60 + target_time.minute)) <= 5:
-            await self.notification_manager.send_daily_summary()
-
-    async def _check_standup_reminder(self):
-        """Check if it's time for standup reminder"""
-        prefs = self.notification_manager.notification_prefs
-        standup_time = prefs.get("standup_time", "09:30")
+    async def run_once(self):
+        """Run one round of checks, leasing only the shards that have something due"""
+        for user_id in self.tenants.user_ids():
+            try:
+                await self._run_for(user_id)
+            except Exception as e:
+                print(f"Notification error for user {user_id}: {e}")
 
+    async def _run_for(self, user_id: int):
+        """Check one tenant, if anything is due"""
+        manager = self._manager_for(user_id)
+        schedule = self.schedules.setdefault(user_id, TenantSchedule())
+        prefs = manager.notification_prefs
         now = datetime.now()
-        target_time = datetime.strptime(standup_time, "%H:%M").time()
 
-        if abs((now.time().hour * 60 + now.time().minute) -
-               (target_time.hour * 60 + target_time.minute)) <= 5:
-            await self.notification_manager.send_standup_reminder()
+        summary_due = (prefs.get("daily_summary") and schedule.summary_sent != now.date()
+                       and within_window(prefs.get("daily_summary_time", "09:00"), now))
+        standup_due = (prefs.get("standup_reminder") and schedule.standup_sent != now.date()
+                       and within_window(prefs.get("standup_time", "09:30"), now))
+        p0_due = prefs.get("p0_task_alerts") and time.monotonic() >= schedule.next_p0_check
+
+        if not (summary_due or standup_due or p0_due):
+            seq = await self.tenants.change_seq(user_id)
+            if seq is not None and seq == schedule.seen_seq:
+                return
+
+        async with self.tenants.lease(user_id) as tenant:
+            # The shard may have been evicted and reopened since the last round
+            manager.task_manager = tenant.store
+
+            schedule.seen_seq = await manager.check_and_notify()
+            schedule.next_p0_check = time.monotonic() + P0_RECHECK_SECONDS
+
+            if summary_due:
+                await manager.send_daily_summary()
+                schedule.summary_sent = now.date()
+
+            if standup_due:
+                await manager.send_standup_reminder()
+                schedule.standup_sent = now.date()
+
+    def _manager_for(self, user_id: int) -> NotificationManager:
+        """Reuse one NotificationManager per user across shard reopenings"""
+        manager = self.managers.get(user_id)
+        if manager is None:
+            manager = NotificationManager(
+                self.bot_token, user_id, None, config=self.tenants.configs[user_id]
+            )
+            self.managers[user_id] = manager
+        return manager
 
     def stop(self):
         """Stop the scheduler"""
@@ -0,0 +1,123 @@
+"""
+Response cache for August
+Reuses answers to repeated questions while the board they were based on is unchanged
+"""
+
+import hashlib
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
+from task_manager import TaskManager
+
+
+RESPONSE_CACHE_TTL_SECONDS = 15 * 60
+RESPONSE_CACHE_MAX_ENTRIES = 500
+CACHED_INTENTS = ("task_status", "general")
+
+# Board version: the changelog's AUTOINCREMENT counter, which pruning never lowers
+_BOARD_SEQ = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'), 0)"
+
+_NOT_WORDS = re.compile(r"[^\w\s]+")
+
+
+def normalize_message(message: str) -> str:
+    """Lower case, without punctuation, single-spaced ("What's in progress?!" -> whats in progress)"""
+    return " ".join(_NOT_WORDS.sub("", message.lower()).split())
+
+
+def response_key(intent: str, message: str, context: str, model: str) -> str:
+    """Cache key for one question: intent, normalized message, context snapshot and model"""
+    context_hash = hashlib.sha256(context.encode()).hexdigest()
+    parts = (intent, normalize_message(message), context_hash, model)
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM answers stored in the tenant's database, so they survive restarts.
+
+    Each entry records the board version (changelog sequence) it was answered
+    against. Any task write moves the board on, so older entries stop
+    matching right away and are deleted on the next store. Entries also
+    expire after ttl_seconds, and the least recently used go beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        task_manager: TaskManager,
+        ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES
+    ):
+        self.task_manager = task_manager
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, intent: str, message: str, context: str, model: str) -> Tuple[Optional[str], int]:
+        """
+        Look up a cached answer. Returns (response or None, board version);
+        pass the version to put() so an answer is filed under the board it saw.
+        """
+        key = response_key(intent, message, context, model)
+        now = time.time()
+
+        with self.task_manager.db.reader() as conn:
+            board_seq = conn.execute(_BOARD_SEQ).fetchone()[0]
+            row = conn.execute("""
+                SELECT response FROM response_cache
+                WHERE key = ? AND board_seq = ? AND created_at >= ?
+            """, (key, board_seq, now - self.ttl_seconds)).fetchone()
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None, board_seq
+
+        with self.task_manager.db.writer() as conn:
+            conn.execute(
+                "UPDATE response_cache SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (now, key)
+            )
+        with self._lock:
+            self.hits += 1
+        return row[0], board_seq
+
+    def put(self, intent: str, message: str, context: str, model: str,
+            response: str, board_seq: int):
+        """Store an answer computed against board version board_seq (from get())"""
+        key = response_key(intent, message, context, model)
+        now = time.time()
+
+        with self.task_manager.db.writer() as conn:
+            if conn.execute(_BOARD_SEQ).fetchone()[0] != board_seq:
+                return  # The board changed while the model was answering
+
+            conn.execute(
+                "DELETE FROM response_cache WHERE board_seq <> ? OR created_at < ?",
+                (board_seq, now - self.ttl_seconds)
+            )
+            conn.execute("""
+                INSERT INTO response_cache
+                    (key, intent, model, board_seq, response, created_at, last_used, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                ON CONFLICT(key) DO UPDATE SET
+                    board_seq = excluded.board_seq,
+                    response = excluded.response,
+                    created_at = excluded.created_at,
+                    last_used = excluded.last_used,
+                    hits = 0
+            """, (key, intent, model, board_seq, response, now, now))
+            conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def clear(self) -> int:
+        """Drop every cached answer, returning how many there were"""
+        with self.task_manager.db.writer() as conn:
+            return conn.execute("DELETE FROM response_cache").rowcount
@@ -0,0 +1,209 @@
+"""
+Local answers to task status questions for August
+Turns questions like "what's blocked?" or "what is the designer working on" into task filters and answers from the board
+"""
+
+import re
+from typing import Optional
+
+from agents import get_agent, get_all_agents
+from async_task_manager import AsyncTaskManager
+from task_manager import TaskState
+from task_query import compile_query
+
+
+STATUS_LIST_LIMIT = 8
+
+# Filter values for task_query, by phrase; "working on" means any active state
+_STATE_PHRASES = {
+    "in progress": "progress", "progress": "progress", "wip": "progress",
+    "working on": "progress,review,blocked", "doing": "progress,review,blocked",
+    "busy with": "progress,review,blocked", "active": "progress,review,blocked",
+    "blocked": "blocked", "stuck": "blocked", "blockers": "blocked",
+    "in review": "review", "review": "review", "reviewing": "review",
+    "backlog": "backlog",
+    "planned": "planned", "up next": "planned", "next up": "planned",
+    "done": "done", "finished": "done", "completed": "done", "shipped": "done",
+    "cancelled": "cancelled", "canceled": "cancelled",
+    "open": "backlog,planned,progress,review,blocked",
+}
+_OPEN_STATES = _STATE_PHRASES["open"]
+_STATE_WORDS = {
+    "backlog": "in the backlog", "planned": "planned", "progress": "in progress",
+    "review": "in review", "blocked": "blocked", "done": "done", "cancelled": "cancelled",
+}
+
+_PRIORITY_PHRASES = {
+    "p0": "P0", "p1": "P1", "p2": "P2", "p3": "P3",
+    "critical": "P0", "urgent": "P0", "high priority": "P0,P1", "low priority": "P3",
+}
+
+_OVERVIEW_PHRASES = (
+    "standup", "stand up", "sprint", "overview", "status", "board", "update",
+    "current tasks", "show tasks", "whats the team", "what are we working on",
+)
+_WORKLOAD_PHRASES = ("workload", "how busy", "capacity")
+
+# Verbs asking August to change the board; "update the designer task to done"
+# reads as a filter otherwise, so messages with them go to the model
+_ACTION_WORDS = frozenset("""
+    add assign cancel change close create delete make mark move put remove
+    rename reopen set start update
+""".split())
+# "update" is also a noun in status questions ("give me an update", "status update")
+_UPDATE_NOUN = re.compile(r"\b(?:an|any|quick|status|daily|board) update\b")
+
+# Words a status question may contain besides the phrases above
+_FILLER = set("""
+    a about all an any anything are at august be being can current currently do
+    does everybody everyone everything for from get give going got has have hey
+    hi how i in is it items its let list many me my now of on our please right
+    s see show so still stuff task tasks team tell the their there these things
+    this tickets to today up us we what whats which who whos with work you
+""".split())
+
+# Agents by id or name, singular or plural; August is the one being asked, not an assignee
+_AGENT_NAMES = {
+    name + plural: agent.id
+    for agent in get_all_agents() if agent.id != "august"
+    for name in {agent.id, agent.name.lower()}
+    for plural in ("", "s")
+}
+
+_PHRASES = sorted(
+    set(_STATE_PHRASES) | set(_PRIORITY_PHRASES) | set(_OVERVIEW_PHRASES)
+    | set(_WORKLOAD_PHRASES) | set(_AGENT_NAMES),
+    key=len, reverse=True
+)
+_PHRASE_PATTERN = re.compile(r"\b(?:" + "|".join(map(re.escape, _PHRASES)) + r")\b")
+_NOT_WORDS = re.compile(r"[^\w\s]+")
+
+
+def parse_status_question(message: str) -> Optional[str]:
+    """
+    Parse a status question into a task_query filter, "standup" or "workload".
+    Returns None unless every word is understood, so anything more subtle
+    ("why is login blocked?") is left to the model, and for any request to
+    change the board ("move the designer task to done").
+    """
+    text = " ".join(_NOT_WORDS.sub("", message.lower()).split())
+    if any(word in _ACTION_WORDS for word in _UPDATE_NOUN.sub(" ", text).split()):
+        return None
+    states, priorities, agents = [], [], []
+    overview = workload = False
+
+    for phrase in _PHRASE_PATTERN.findall(text):
+        if phrase in _STATE_PHRASES:
+            states.append(_STATE_PHRASES[phrase])
+        elif phrase in _PRIORITY_PHRASES:
+            priorities.append(_PRIORITY_PHRASES[phrase])
+        elif phrase in _AGENT_NAMES:
+            agents.append(_AGENT_NAMES[phrase])
+        elif phrase in _WORKLOAD_PHRASES:
+            workload = True
+        else:
+            overview = True
+
+    leftover = _PHRASE_PATTERN.sub(" ", text).split()
+    if any(word not in _FILLER for word in leftover):
+        return None
+
+    if states or priorities or agents:
+        terms = [f"state:{','.join(states) if states else _OPEN_STATES}"]
+        if agents:
+            terms.append(f"agent:{','.join(dict.fromkeys(agents))}")
+        if priorities:
+            terms.append(f"prio:{','.join(priorities)}")
+        return " ".join(terms)
+    if workload:
+        return "workload"
+    if overview:
+        return "standup"
+    return None
+
+
+async def answer_status_question(store: AsyncTaskManager, message: str) -> Optional[str]:
+    """Answer a status question from the task store, or None if it needs the model"""
+    parsed = parse_status_question(message)
+    if parsed is None:
+        return None
+    if parsed == "standup":
+        return await standup_message(store)
+    if parsed == "workload":
+        return await workload_message(store)
+    return await filtered_message(store, parsed)
+
+
+async def filtered_message(store: AsyncTaskManager, query_text: str) -> str:
+    """List the tasks matching a filter query, with the total and a /tasks link for the rest"""
+    filters = {'query': compile_query(query_text)}
+    tasks, _, _ = await store.get_tasks_page(filters, limit=STATUS_LIST_LIMIT)
+    total = await store.count_tasks(filters)
+
+    heading = _describe(query_text)
+    if not tasks:
+        return f"Nothing {heading} right now."
+
+    msg = f"**{heading[0].upper()}{heading[1:]}** ({total})\n\n"
+    for task in tasks:
+        agent = get_agent(task.agent)
+        owner = f"{agent.emoji} {agent.name}" if agent else task.agent
+        msg += f"{task.state.emoji} {task.priority.emoji} {task.title} - {owner} (`{task.id}`)\n"
+    if total > len(tasks):
+        msg += f"\n…and {total - len(tasks)} more: `/tasks {query_text}`"
+    return msg
+
+
+def _describe(query_text: str) -> str:
+    """Short heading for a filter query, e.g. "blocked for Designer at P0" """
+    terms = dict(term.split(":", 1) for term in query_text.split())
+    states = terms["state"]
+    words = ["open" if states == _OPEN_STATES else
+             "active" if states == _STATE_PHRASES["active"] else
+             " or ".join(_STATE_WORDS[s] for s in dict.fromkeys(states.split(",")))]
+    if "agent" in terms:
+        names = [get_agent(a).name for a in terms["agent"].split(",")]
+        words.append("for " + " and ".join(names))
+    if "prio" in terms:
+        words.append("at " + "/".join(dict.fromkeys(terms["prio"].split(","))))
+    return " ".join(words)
+
+
+async def standup_message(store: AsyncTaskManager) -> str:
+    """Build the standup report: counts from the board counters, top 5 per state"""
+    counts = await store.count_by_state()
+    msg = "**🎯 Daily Standup**\n\n"
+
+    sections = [
+        (TaskState.IN_PROGRESS, "**🏃 In Progress**"),
+        (TaskState.REVIEW, "**👀 In Review**"),
+        (TaskState.BLOCKED, "**❌ Blocked**"),
+    ]
+    for state, heading in sections:
+        if not counts[state]:
+            continue
+        msg += f"{heading} ({counts[state]})\n"
+        for task in await store.get_tasks_by_state(state, limit=5):
+            msg += f"• {task.title} ({task.agent})\n"
+        msg += "\n"
+
+    if not any(counts[state] for state, _ in sections):
+        msg += "All clear! No active work right now."
+
+    return msg
+
+
+async def workload_message(store: AsyncTaskManager) -> str:
+    """Build the per-agent workload report from the board counters"""
+    workload = await store.get_workload_summary()
+    msg = "**📊 Team Workload** (active tasks)\n\n"
+
+    if not workload:
+        msg += "No active tasks right now. Clean slate!"
+    else:
+        for agent_id, count in sorted(workload.items(), key=lambda x: x[1], reverse=True):
+            agent = get_agent(agent_id)
+            if agent:
+                msg += f"{agent.emoji} **{agent.name}**: {count} tasks\n"
+
+    return msg
@@ -0,0 +1,119 @@
+"""
+Progressive Telegram replies for August
+Shows a streamed answer as it is generated, one message per "---" chunk
+"""
+
+import asyncio
+import time
+
+
+CHUNK_SEPARATOR = "---"        # August splits answers into separate texts with this
+EDIT_INTERVAL_SECONDS = 1.5    # Live edits per message at most this often (Telegram flood limits)
+MESSAGE_GAP_SECONDS = 0.5      # Pause between messages, so a burst of chunks reads like texting
+MESSAGE_LIMIT = 4000           # Telegram's cap is 4096 characters; long chunks split below it
+MIN_LIVE_CHARS = 24            # A chunk appears once it has this much text (or is complete)
+_MARKDOWN = set("*_`[")
+
+
+class StreamingReply:
+    """
+    Renders streamed text into replies to one Telegram message.
+
+    Each "---" chunk becomes its own message, sent as soon as the chunk has
+    any text and then edited in place as more arrives, at most once per
+    EDIT_INTERVAL_SECONDS. Live edits are plain text, since half-written
+    Markdown does not parse; each message gets one final Markdown edit once
+    its chunk is complete. Feed text with feed(), then call close().
+    """
+
+    def __init__(self, message, edit_interval: float = EDIT_INTERVAL_SECONDS):
+        self.message = message  # The user's message being answered
+        self.edit_interval = edit_interval
+        self.messages_sent = 0
+        self._buffer = ""       # Text of the chunk being streamed
+        self._current = None    # Sent message showing that chunk, if any
+        self._shown = ""        # Text currently visible in _current
+        self._next_edit = 0.0   # Monotonic time of the earliest next live edit
+        self._last_send = 0.0
+
+    async def feed(self, text: str):
+        """Add streamed text, sending completed chunks and refreshing the live one"""
+        self._buffer += text
+        while CHUNK_SEPARATOR in self._buffer:
+            chunk, self._buffer = self._buffer.split(CHUNK_SEPARATOR, 1)
+            await self._finish(chunk)
+        while len(self._buffer) > MESSAGE_LIMIT:
+            cut = self._buffer.rfind("\n", 0, MESSAGE_LIMIT)
+            if cut <= 0:
+                cut = MESSAGE_LIMIT
+            chunk, self._buffer = self._buffer[:cut], self._buffer[cut:]
+            await self._finish(chunk)
+        await self._refresh()
+
+    async def close(self, text: str = ""):
+        """Add any final text, then finish the last chunk once the stream has ended"""
+        self._buffer += text
+        while CHUNK_SEPARATOR in self._buffer:
+            chunk, self._buffer = self._buffer.split(CHUNK_SEPARATOR, 1)
+            await self._finish(chunk)
+        await self._finish(self._buffer)
+        self._buffer = ""
+
+    async def _refresh(self):
+        # Trailing dashes may be the start of a separator still on its way
+        text = self._buffer.rstrip("-").strip()
+        if text == self._shown or time.monotonic() < self._next_edit:
+            return
+        if self._current is None and len(text) < MIN_LIVE_CHARS:
+            return
+        try:
+            if self._current is None:
+                await self._pace()
+                self._current = await self.message.reply_text(text)
+                self.messages_sent += 1
+                self._last_send = time.monotonic()
+            else:
+                await self._current.edit_text(text)
+            self._shown = text
+            self._next_edit = time.monotonic() + self.edit_interval
+        except Exception as e:
+            # Skip this refresh (flood control, network blip); the final edit catches up
+            retry_after = getattr(e, "retry_after", None)
+            self._next_edit = time.monotonic() + (retry_after or self.edit_interval)
+
+    async def _finish(self, chunk: str):
+        text = chunk.strip()
+        current, shown = self._current, self._shown
+        self._current, self._shown, self._next_edit = None, "", 0.0
+        if not text:
+            return
+        if text == shown and not _MARKDOWN.intersection(text):
+            return  # Already on screen exactly as it would render
+
+        if current is None:
+            await self._pace()
+            await self._send(text)
+            self.messages_sent += 1
+            self._last_send = time.monotonic()
+            return
+
+        try:
+            await current.edit_text(text, parse_mode='Markdown')
+        except Exception:
+            # Markdown parsing failed, or the text was already shown as-is
+            try:
+                await current.edit_text(text)
+            except Exception:
+                pass
+
+    async def _send(self, text: str):
+        try:
+            await self.message.reply_text(text, parse_mode='Markdown')
+        except Exception:
+            # If Markdown parsing fails, send as plain text
+            await self.message.reply_text(text)
+
+    async def _pace(self):
+        wait = self._last_send + MESSAGE_GAP_SECONDS - time.monotonic()
+        if self.messages_sent and wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,168 @@
+"""
+In-memory read-through cache for TaskManager
+Keeps decoded Task objects plus the ID lists behind per-state and per-agent queries
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+ALL_KEY = ("all",)
+
+
+def state_key(state_name: str) -> Tuple:
+    """Index key for get_tasks_by_state"""
+    return ("state", state_name)
+
+
+def agent_key(agent: str) -> Tuple:
+    """Index key for get_tasks_by_agent"""
+    return ("agent", agent)
+
+
+class TaskCache:
+    """
+    LRU cache of Task objects keyed by ID, with cached query results.
+    A result read with a LIMIT is cached as a prefix: it serves any limit up
+    to its length, and a read without a limit misses.
+
+    Cached tasks are shared between callers and must be treated as read-only.
+    Writers bump `generation`; a reader only fills the cache if the generation
+    it saw before querying is still current, so a slow read never resurrects
+    data that a concurrent write has already replaced. A max_size of 0
+    disables caching.
+    """
+
+    def __init__(self, max_size: int = 2000):
+        self.max_size = max_size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._tasks: "OrderedDict[str, object]" = OrderedDict()
+        self._lists: Dict[Tuple, List[str]] = {}
+        self._prefixes: Set[Tuple] = set()  # Keys whose list is only the first rows
+        self._memberships: Dict[str, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, task_id: str):
+        """Get a cached task, marking it as recently used"""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                self.misses += 1
+                return None
+            self._tasks.move_to_end(task_id)
+            self.hits += 1
+            return task
+
+    def put(self, task, generation: int):
+        """Cache a task read at the given generation"""
+        if not self.max_size:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._store(task)
+
+    def get_list(self, key: Tuple, limit: Optional[int] = None) -> Optional[List]:
+        """
+        Get a cached query result (its first `limit` tasks), or None if it is
+        not cached in full, is a shorter prefix, or any member was evicted
+        """
+        with self._lock:
+            ids = self._lists.get(key)
+            if ids is not None and key in self._prefixes and (limit is None or limit > len(ids)):
+                ids = None
+            if ids is None:
+                self.misses += 1
+                return None
+            if limit is not None:
+                ids = ids[:limit]
+
+            tasks = []
+            for task_id in ids:
+                task = self._tasks.get(task_id)
+                if task is None:
+                    self._drop_list(key)
+                    self.misses += 1
+                    return None
+                tasks.append(task)
+
+            for task_id in ids:
+                self._tasks.move_to_end(task_id)
+            self.hits += 1
+            return tasks
+
+    def put_list(self, key: Tuple, tasks: List, generation: int, complete: bool = True):
+        """
+        Cache a query result read at the given generation; complete=False
+        marks it as the first rows of a longer result (read with a LIMIT)
+        """
+        if not self.max_size:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            for task in tasks:
+                self._store(task)
+            # A result larger than the cache would evict its own members
+            if len(tasks) > self.max_size:
+                return
+            cached = self._lists.get(key)
+            if not complete and cached is not None and (
+                key not in self._prefixes or len(cached) >= len(tasks)
+            ):
+                return  # A concurrent reader already cached more of it
+            self._drop_list(key)
+            self._lists[key] = [task.id for task in tasks]
+            if not complete:
+                self._prefixes.add(key)
+            for task in tasks:
+                self._memberships.setdefault(task.id, set()).add(key)
+
+    def invalidate(self, task_ids: Iterable[str] = (), keys: Iterable[Tuple] = ()):
+        """
+        Drop tasks and every cached result that contains them, plus the
+        results named in keys (queries the written tasks may now belong to)
+        """
+        with self._lock:
+            self.generation += 1
+            for task_id in task_ids:
+                self._tasks.pop(task_id, None)
+                for key in self._memberships.pop(task_id, ()):
+                    self._drop_list(key)
+            for key in keys:
+                self._drop_list(key)
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self.generation += 1
+            self._tasks.clear()
+            self._lists.clear()
+            self._prefixes.clear()
+            self._memberships.clear()
+
+    def _store(self, task):
+        """Insert a task and evict the least recently used ones (lock held)"""
+        self._tasks[task.id] = task
+        self._tasks.move_to_end(task.id)
+        while len(self._tasks) > self.max_size:
+            evicted, _ = self._tasks.popitem(last=False)
+            # Results missing a member can no longer be served, so drop them with it
+            for key in self._memberships.pop(evicted, ()):
+                self._drop_list(key)
+
+    def _drop_list(self, key: Tuple):
+        """Forget a cached result (lock held)"""
+        ids = self._lists.pop(key, None)
+        self._prefixes.discard(key)
+        if not ids:
+            return
+        for task_id in ids:
+            members = self._memberships.get(task_id)
+            if members:
+                members.discard(key)
+                if not members:
+                    del self._memberships[task_id]
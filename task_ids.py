@@ -0,0 +1,125 @@
+"""
+Task IDs for August
+Time-ordered IDs (T-<time><worker><sequence>) that sort by creation time and append to the key index
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+# Crockford base32: digits and capitals without I, L, O and U, so IDs are easy to read out and type
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+_DECODE.update({"O": 0, "I": 1, "L": 1})  # Common misreadings
+
+ID_PREFIX = "T-"
+LEGACY_PREFIX = "TASK-"  # TASK- plus 8 random hex digits, from before time-ordered IDs
+
+ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+TIME_CHARS = 8               # Milliseconds since ID_EPOCH_MS; lasts until 2058
+SEQUENCE_CHARS = 2           # Up to 1024 IDs per millisecond per worker
+WORKER_COUNT = len(ALPHABET) # The worker is one character
+ID_LENGTH = len(ID_PREFIX) + TIME_CHARS + 1 + SEQUENCE_CHARS
+
+# Every time-ordered ID sorts inside [ID_RANGE_START, ID_RANGE_END), apart from legacy IDs
+ID_RANGE_START = ID_PREFIX
+ID_RANGE_END = "T."  # "." is the character after "-"
+
+_MAX_SEQUENCE = len(ALPHABET) ** SEQUENCE_CHARS
+
+
+def _encode(number: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        number, digit = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _decode(text: str) -> int:
+    number = 0
+    for char in text:
+        number = number * len(ALPHABET) + _DECODE[char]
+    return number
+
+
+def is_time_ordered(task_id: str) -> bool:
+    """Check if an ID uses the time-ordered scheme (not a legacy TASK- ID)"""
+    return (len(task_id) == ID_LENGTH and task_id.startswith(ID_PREFIX)
+            and all(char in _DECODE for char in task_id[len(ID_PREFIX):]))
+
+
+def normalize_task_id(text: str) -> str:
+    """
+    Canonical form of a typed task ID: upper case, with O, I and L read as
+    0, 1 and 1 in time-ordered IDs. Legacy IDs are only upper-cased.
+    """
+    task_id = text.strip().upper()
+    if is_time_ordered(task_id):
+        body = task_id[len(ID_PREFIX):]
+        task_id = ID_PREFIX + "".join(ALPHABET[_DECODE[char]] for char in body)
+    return task_id
+
+
+def id_time(task_id: str) -> Optional[datetime]:
+    """Local creation time encoded in a time-ordered ID (None for legacy IDs)"""
+    if not is_time_ordered(task_id):
+        return None
+    ms = _decode(task_id[len(ID_PREFIX):len(ID_PREFIX) + TIME_CHARS]) + ID_EPOCH_MS
+    return datetime.fromtimestamp(ms / 1000)
+
+
+def id_floor(moment: datetime) -> str:
+    """Lowest time-ordered ID that can be generated at or after a local naive datetime"""
+    ms = max(0, int(moment.timestamp() * 1000) - ID_EPOCH_MS)
+    return ID_PREFIX + _encode(ms, TIME_CHARS) + "0" * (1 + SEQUENCE_CHARS)
+
+
+class TaskIdGenerator:
+    """
+    Snowflake-style ID source: millisecond time, then the worker, then a
+    per-millisecond sequence, all in fixed-width base32. IDs from one
+    generator are strictly increasing, even if the clock steps back, and
+    workers with different IDs never collide. TaskManager leases the worker
+    from the database, so every process writing to it gets its own.
+    """
+
+    def __init__(self, worker_id: int):
+        if not 0 <= worker_id < WORKER_COUNT:
+            raise ValueError(f"worker_id must be between 0 and {WORKER_COUNT - 1}")
+        self.worker_id = worker_id
+        self.worker = ALPHABET[worker_id]
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def new_id(self) -> str:
+        """Next ID for this worker"""
+        with self._lock:
+            ms = max(int(time.time() * 1000) - ID_EPOCH_MS, self._last_ms)
+            if ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence == _MAX_SEQUENCE:
+                    # Sequence exhausted: borrow the next millisecond
+                    ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            sequence = self._sequence
+
+        return f"{ID_PREFIX}{_encode(ms, TIME_CHARS)}{self.worker}{_encode(sequence, SEQUENCE_CHARS)}"
+
+    def advance_past(self, task_id: str):
+        """
+        Only issue IDs from the millisecond after task_id's on (e.g. after the
+        newest one already stored), so none can equal an ID written earlier
+        """
+        if not is_time_ordered(task_id):
+            return
+        ms = _decode(task_id[len(ID_PREFIX):len(ID_PREFIX) + TIME_CHARS])
+        with self._lock:
+            if ms >= self._last_ms:
+                # An exhausted sequence makes new_id() move on to ms + 1
+                self._last_ms, self._sequence = ms, _MAX_SEQUENCE - 1
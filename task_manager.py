@@ -3,12 +3,128 @@ Task management system for August PM bot
 Handles task creation, state transitions, and persistence
 """
 
-import sqlite3
 import json
-from datetime import datetime
-from typing import List, Optional, Dict
+import os
+import re
+import secrets
+import socket
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Dict, Set, Tuple
 from enum import Enum
 
+from database import ConnectionPool
+from migrations import migrate, REBUILD_HIERARCHY, REBUILD_FLOW_STATS
+from task_cache import TaskCache, ALL_KEY, agent_key, state_key
+from task_ids import TaskIdGenerator, ID_RANGE_START, ID_RANGE_END, WORKER_COUNT, id_floor
+
+
+TASK_FIELDS = [
+    "id", "title", "description", "agent", "state", "priority",
+    "created_at", "updated_at", "parent_task", "tags", "version"
+]
+TASK_COLUMNS = ", ".join(TASK_FIELDS)
+TASK_PLACEHOLDERS = ", ".join("?" * len(TASK_FIELDS))
+# Task columns qualified with the alias t, for joins against task_tree
+_T_COLUMNS = ", ".join(f"t.{field}" for field in TASK_FIELDS)
+
+# Every task, newest first: get_all_tasks, and the first page of an unfiltered
+# get_tasks_page, which is served from the same cached list
+ALL_TASKS_SQL = f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY updated_at DESC, id DESC"
+
+HISTORY_INSERT = """
+    INSERT INTO task_history (task_id, field, old_value, new_value, changed_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+
+# Closed tasks untouched for this many days move to the archive tables
+ARCHIVE_AFTER_DAYS = 30
+
+# Each TaskManager leases its ID worker character in id_workers for this long,
+# renewing it on writes; a crashed process's lease lapses after it
+WORKER_LEASE_SECONDS = 3600
+# Fresh IDs tried for a new task before a primary key collision is raised
+NEW_ID_ATTEMPTS = 3
+
+# Changelog entries always kept by prune_consumed_changes, so processes that
+# sync their task cache from it (sync_cache) can fall this far behind
+CHANGELOG_KEEP = 10_000
+
+# Tasks created in [start, end), taking created_between_params(start, end).
+# Time-ordered IDs answer it as a primary key range; legacy IDs carry no
+# time and sort outside that range, so they are checked by created_at instead.
+CREATED_BETWEEN = f"""(id >= ? AND id < ?
+    OR id < '{ID_RANGE_START}' AND created_at >= ? AND created_at < ?
+    OR id >= '{ID_RANGE_END}' AND created_at >= ? AND created_at < ?)"""
+
+_intern = sys.intern
+
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Task timestamps are stored as integer microseconds since this naive epoch.
+# They keep the bot's local wall-clock time, exactly like the ISO strings did.
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_us(value: datetime) -> int:
+    """Convert a naive datetime to stored epoch microseconds"""
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_epoch_us(value: int) -> datetime:
+    """Convert stored epoch microseconds back to a naive datetime"""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def created_between_params(start: Optional[datetime], end: Optional[datetime]) -> list:
+    """Parameters for CREATED_BETWEEN; a missing start or end leaves that side open"""
+    id_range = [
+        id_floor(start) if start else ID_RANGE_START,
+        id_floor(end) if end else ID_RANGE_END,
+    ]
+    created_range = [
+        to_epoch_us(start) if start else -2**63,
+        to_epoch_us(end) if end else 2**63 - 1,
+    ]
+    return id_range + created_range * 2
+
+
+def encode_cursor(task: "Task") -> str:
+    """
+    Encode a task's (updated_at, id) position as a short page cursor.
+    The timestamp is packed in base 36 to fit Telegram callback data.
+    """
+    number = task.updated_at_us
+    packed = ""
+    while number:
+        number, digit = divmod(number, 36)
+        packed = _BASE36[digit] + packed
+    return f"{packed or '0'}.{task.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Decode a page cursor back into its (updated_at, id) values"""
+    packed, task_id = cursor.split(".", 1)
+    return int(packed, 36), task_id
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a task changed since the version the caller last saw"""
+
+    def __init__(self, task_id: str, expected_version: int, actual_version: int):
+        super().__init__(
+            f"{task_id} is at version {actual_version}, expected {expected_version}"
+        )
+        self.task_id = task_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+
 
 class TaskState(Enum):
     """Task states with display colors"""
@@ -39,7 +155,18 @@ class TaskPriority(Enum):
 
 
 class Task:
-    """Represents a task in the system"""
+    """
+    Represents a task in the system.
+
+    Tasks loaded from the database keep the raw state, priority, timestamp
+    and tag values and only decode each one the first time it is read, so
+    listings that touch a couple of fields stay cheap.
+    """
+    __slots__ = (
+        'id', 'title', 'description', 'agent', 'parent_task', 'version',
+        '_state', '_priority', '_created_at', '_updated_at', '_tags'
+    )
+
     def __init__(
         self,
         id: str,
@@ -51,7 +178,8 @@ class Task:
         created_at: datetime = None,
         updated_at: datetime = None,
         parent_task: Optional[str] = None,
-        tags: List[str] = None
+        tags: List[str] = None,
+        version: int = 1
     ):
         self.id = id
         self.title = title
@@ -63,6 +191,92 @@ class Task:
         self.updated_at = updated_at or datetime.now()
         self.parent_task = parent_task
         self.tags = tags or []
+        self.version = version  # Bumped on every write; used for compare-and-set
+
+    @classmethod
+    def from_row(cls, row) -> "Task":
+        """Build a task from a tasks row, deferring all decoding"""
+        task = cls.__new__(cls)
+        (task.id, task.title, task.description, agent, state, priority,
+         task._created_at, task._updated_at, task.parent_task, task._tags, task.version) = row
+        # Low-cardinality columns share one string object across all rows
+        task.agent = _intern(agent)
+        task._state = _intern(state)
+        task._priority = _intern(priority)
+        return task
+
+    @property
+    def state(self) -> TaskState:
+        value = self._state
+        if value.__class__ is str:
+            value = self._state = TaskState[value]
+        return value
+
+    @state.setter
+    def state(self, value: TaskState):
+        self._state = value
+
+    @property
+    def priority(self) -> TaskPriority:
+        value = self._priority
+        if value.__class__ is str:
+            value = self._priority = TaskPriority[value]
+        return value
+
+    @priority.setter
+    def priority(self, value: TaskPriority):
+        self._priority = value
+
+    @property
+    def created_at(self) -> datetime:
+        value = self._created_at
+        if value.__class__ is int:
+            value = self._created_at = from_epoch_us(value)
+        return value
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        self._created_at = value
+
+    @property
+    def updated_at(self) -> datetime:
+        value = self._updated_at
+        if value.__class__ is int:
+            value = self._updated_at = from_epoch_us(value)
+        return value
+
+    @updated_at.setter
+    def updated_at(self, value: datetime):
+        self._updated_at = value
+
+    @property
+    def created_at_us(self) -> int:
+        """Creation time as stored epoch microseconds (no datetime decoding)"""
+        value = self._created_at
+        return value if value.__class__ is int else to_epoch_us(value)
+
+    @property
+    def updated_at_us(self) -> int:
+        """Update time as stored epoch microseconds (no datetime decoding)"""
+        value = self._updated_at
+        return value if value.__class__ is int else to_epoch_us(value)
+
+    @property
+    def tags(self) -> List[str]:
+        value = self._tags
+        if value is None or value.__class__ is str:
+            value = self._tags = json.loads(value) if value else []
+        return value
+
+    @tags.setter
+    def tags(self, value: List[str]):
+        self._tags = value
+
+    @property
+    def state_name(self) -> str:
+        """State name without decoding the enum"""
+        value = self._state
+        return value if value.__class__ is str else value.display_name
 
     def to_dict(self) -> Dict:
         """Convert task to dictionary"""
@@ -76,9 +290,27 @@ class Task:
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'parent_task': self.parent_task,
-            'tags': self.tags
+            'tags': self.tags,
+            'version': self.version
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Task":
+        """Build a task from the output of to_dict()"""
+        return cls(
+            id=data['id'],
+            title=data['title'],
+            description=data.get('description', ''),
+            agent=data['agent'],
+            state=TaskState[data.get('state', 'BACKLOG')],
+            priority=TaskPriority[data.get('priority', 'P2')],
+            created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None,
+            updated_at=datetime.fromisoformat(data['updated_at']) if data.get('updated_at') else None,
+            parent_task=data.get('parent_task'),
+            tags=data.get('tags'),
+            version=data.get('version', 1)
+        )
+
     def format_display(self) -> str:
         """Format task for Telegram display"""
         lines = [
@@ -97,47 +329,147 @@ class Task:
         return "\n".join(lines)
 
 
+class TaskChange:
+    """One entry of the task changelog"""
+    def __init__(
+        self,
+        seq: int,
+        task_id: str,
+        op: str,
+        agent: Optional[str],
+        old_state: Optional[TaskState],
+        new_state: Optional[TaskState],
+        changed_at: datetime
+    ):
+        self.seq = seq
+        self.task_id = task_id
+        self.op = op  # 'create', 'update' or 'delete'
+        self.agent = agent
+        self.old_state = old_state
+        self.new_state = new_state
+        self.changed_at = changed_at
+
+    @property
+    def state_changed(self) -> bool:
+        """Whether this change moved the task to a different state"""
+        return self.op == 'update' and self.old_state != self.new_state
+
+
 class TaskManager:
     """Manages task persistence and operations"""
 
-    def __init__(self, db_path: str = "tasks.db"):
+    def __init__(
+        self,
+        db_path: str = "tasks.db",
+        max_readers: int = 4,
+        cache_size: int = 2000
+    ):
         self.db_path = db_path
-        self.init_db()
+        self.db = ConnectionPool(db_path, max_readers=max_readers)
+        self.cache = TaskCache(cache_size)  # cache_size=0 disables caching
+        self._worker_owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        try:
+            self.init_db()
+            self._cache_seq = self.latest_change_seq()
+        except BaseException:
+            # e.g. a failed migration: don't leave the pool's connections open
+            self.db.close()
+            raise
+
+    def close(self):
+        """Release the ID worker lease and close all database connections"""
+        try:
+            with self.db.writer() as conn:
+                conn.execute(
+                    "DELETE FROM id_workers WHERE worker = ? AND owner = ?",
+                    (self.ids.worker_id, self._worker_owner)
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not release task ID worker on {self.db_path}: {e}")
+        self.db.close()
 
     def init_db(self):
-        """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                description TEXT,
-                agent TEXT NOT NULL,
-                state TEXT NOT NULL,
-                priority TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                parent_task TEXT,
-                tags TEXT
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS task_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task_id TEXT NOT NULL,
-                field TEXT NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                changed_at TEXT NOT NULL,
-                FOREIGN KEY (task_id) REFERENCES tasks(id)
+        """Initialize database schema, apply pending migrations and lease an ID worker"""
+        with self.db.writer() as conn:
+            migrate(conn)
+            self._claim_worker(conn)
+
+    def _claim_worker(self, conn: sqlite3.Connection):
+        """
+        Lease a worker character no other live process holds on this database,
+        and start IDs after the newest stored one in case the clock stepped back
+        """
+        now = time.time()
+        leases = dict(conn.execute(
+            "SELECT worker, expires_at FROM id_workers WHERE expires_at > ?", (now,)
+        ))
+        worker = next((w for w in range(WORKER_COUNT) if w not in leases), None)
+        if worker is None:
+            # Share the lease closest to lapsing; _insert_new_tasks still never overwrites
+            worker = min(leases, key=leases.get)
+            print(f"⚠️ All {WORKER_COUNT} task ID workers on {self.db_path} are leased; sharing {worker}")
+
+        conn.execute("""
+            INSERT INTO id_workers (worker, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(worker) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+        """, (worker, self._worker_owner, now + WORKER_LEASE_SECONDS))
+        self._lease_renew_at = now + WORKER_LEASE_SECONDS / 2
+
+        self.ids = TaskIdGenerator(worker)
+        self._advance_ids(conn)
+
+    def _advance_ids(self, conn: sqlite3.Connection):
+        """Move the ID generator past the newest time-ordered ID in the database"""
+        newest = conn.execute(f"""
+            SELECT MAX(id) FROM (
+                SELECT MAX(id) AS id FROM tasks WHERE id >= '{ID_RANGE_START}' AND id < '{ID_RANGE_END}'
+                UNION ALL
+                SELECT MAX(id) FROM tasks_archive WHERE id >= '{ID_RANGE_START}' AND id < '{ID_RANGE_END}'
             )
-        """)
+        """).fetchone()[0]
+        if newest:
+            self.ids.advance_past(newest)
+
+    def _hold_worker(self, conn: sqlite3.Connection):
+        """Renew the ID worker lease before it can lapse, or lease a new worker if it did"""
+        now = time.time()
+        if now < self._lease_renew_at:
+            return
+        renewed = conn.execute(
+            "UPDATE id_workers SET expires_at = ? WHERE worker = ? AND owner = ?",
+            (now + WORKER_LEASE_SECONDS, self.ids.worker_id, self._worker_owner)
+        ).rowcount
+        if renewed:
+            self._lease_renew_at = now + WORKER_LEASE_SECONDS / 2
+        else:
+            self._claim_worker(conn)
 
-        conn.commit()
-        conn.close()
+    def _insert_new_tasks(self, conn: sqlite3.Connection, tasks: List[Task]):
+        """
+        Insert just-created tasks with a plain INSERT, so an ID that is somehow
+        taken can never overwrite an existing task. On a collision the tasks
+        get fresh IDs past the newest stored one and the insert is retried.
+        """
+        self._hold_worker(conn)
+        for attempt in range(NEW_ID_ATTEMPTS):
+            conn.execute("SAVEPOINT new_tasks")
+            try:
+                conn.executemany(f"""
+                    INSERT INTO tasks ({TASK_COLUMNS})
+                    VALUES ({TASK_PLACEHOLDERS})
+                """, [self._task_params(task) for task in tasks])
+            except sqlite3.IntegrityError as e:
+                conn.execute("ROLLBACK TO new_tasks")
+                conn.execute("RELEASE new_tasks")
+                if "tasks.id" not in str(e) or attempt == NEW_ID_ATTEMPTS - 1:
+                    raise
+                print(f"⚠️ Task ID collision on {self.db_path}; retrying with new IDs")
+                self._advance_ids(conn)
+                for task in tasks:
+                    task.id = self._new_task_id()
+            else:
+                conn.execute("RELEASE new_tasks")
+                return
 
     def create_task(
         self,
@@ -145,166 +477,1027 @@ class TaskManager:
         description: str,
         agent: str,
         priority: TaskPriority = TaskPriority.P2,
-        tags: List[str] = None
+        tags: List[str] = None,
+        parent_task: Optional[str] = None
     ) -> Task:
         """Create a new task"""
-        import uuid
-        task_id = f"TASK-{uuid.uuid4().hex[:8].upper()}"
-
         task = Task(
-            id=task_id,
+            id=self._new_task_id(),
             title=title,
             description=description,
             agent=agent,
             priority=priority,
+            parent_task=parent_task,
             tags=tags or []
         )
 
-        self._save_task(task)
+        with self.db.writer() as conn:
+            self._insert_new_tasks(conn, [task])
+            self._invalidate([task.id], [task])
         return task
 
-    def _save_task(self, task: Task):
-        """Save task to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT OR REPLACE INTO tasks
-            (id, title, description, agent, state, priority, created_at, updated_at, parent_task, tags)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    def create_tasks_bulk(self, specs: List[Dict]) -> List[Task]:
+        """
+        Create many tasks in a single transaction.
+        Each spec takes the create_task arguments plus an optional 'state';
+        tasks created outside BACKLOG get a state history row, as if moved there.
+        """
+        now = datetime.now()
+        tasks = []
+
+        for spec in specs:
+            task = Task(
+                id=self._new_task_id(),
+                title=spec['title'],
+                description=spec.get('description', ''),
+                agent=spec['agent'],
+                state=spec.get('state', TaskState.BACKLOG),
+                priority=spec.get('priority', TaskPriority.P2),
+                created_at=now,
+                updated_at=now,
+                tags=spec.get('tags') or []
+            )
+            tasks.append(task)
+
+        with self.db.writer() as conn:
+            self._insert_new_tasks(conn, tasks)
+            # Built after the insert, which may have replaced colliding IDs
+            history = [
+                (task.id, "state", TaskState.BACKLOG.display_name,
+                 task.state.display_name, now.isoformat())
+                for task in tasks if task.state != TaskState.BACKLOG
+            ]
+            conn.executemany(HISTORY_INSERT, history)
+            self._invalidate([task.id for task in tasks], tasks)
+
+        return tasks
+
+    def _new_task_id(self) -> str:
+        """Generate a new time-ordered task ID (see task_ids)"""
+        return self.ids.new_id()
+
+    def _task_params(self, task: Task) -> tuple:
+        """Task fields in TASK_COLUMNS order"""
+        return (
             task.id,
             task.title,
             task.description,
             task.agent,
-            task.state.display_name,
+            task.state_name,
             task.priority.name,
-            task.created_at.isoformat(),
-            task.updated_at.isoformat(),
+            task.created_at_us,
+            task.updated_at_us,
             task.parent_task,
-            json.dumps(task.tags)
-        ))
+            json.dumps(task.tags),
+            task.version
+        )
+
+    def _save_task(self, task: Task):
+        """Save edits to an existing task (new tasks go through _insert_new_tasks)"""
+        with self.db.writer() as conn:
+            # An upsert (not INSERT OR REPLACE) so updates show up as updates in task_changes
+            row = conn.execute(f"""
+                INSERT INTO tasks ({TASK_COLUMNS})
+                VALUES ({TASK_PLACEHOLDERS})
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    description = excluded.description,
+                    agent = excluded.agent,
+                    state = excluded.state,
+                    priority = excluded.priority,
+                    created_at = excluded.created_at,
+                    updated_at = excluded.updated_at,
+                    parent_task = excluded.parent_task,
+                    tags = excluded.tags,
+                    version = tasks.version + 1
+                RETURNING version
+            """, self._task_params(task)).fetchone()
+            task.version = row[0]
+            self._invalidate([task.id], [task])
 
-        conn.commit()
-        conn.close()
+    def _invalidate(self, task_ids: List[str], tasks: List[Task] = ()):
+        """
+        Drop cached copies of written tasks once the write commits, along with
+        the cached queries they now belong to
+        """
+        keys = {ALL_KEY}
+        for task in tasks:
+            keys.add(state_key(task.state_name))
+            keys.add(agent_key(task.agent))
+
+        self.db.after_commit(lambda: self.cache.invalidate(task_ids, keys))
+
+    def _cache_usable(self) -> bool:
+        """
+        Whether reads may go through the cache: never inside a write
+        transaction, and only after dropping what other processes changed
+        since the last check (one lookup of the newest changelog seq)
+        """
+        if self.db.in_write_transaction():
+            return False
+        if self.cache.max_size and self.latest_change_seq() != self._cache_seq:
+            self.sync_cache()
+        return True
 
     def get_task(self, task_id: str) -> Optional[Task]:
         """Get task by ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        use_cache = self._cache_usable()
+        if use_cache:
+            task = self.cache.get(task_id)
+            if task:
+                return task
 
-        cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-        row = cursor.fetchone()
-        conn.close()
+        generation = self.cache.generation
+        with self.db.reader() as conn:
+            row = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+            if not row:
+                # Closed tasks may have moved to the archive
+                row = conn.execute(
+                    f"SELECT {TASK_COLUMNS} FROM tasks_archive WHERE id = ?", (task_id,)
+                ).fetchone()
 
         if not row:
             return None
 
-        return self._row_to_task(row)
+        task = self._row_to_task(row)
+        if use_cache:
+            self.cache.put(task, generation)
+        return task
+
+    def _query_tasks(self, key: Tuple, sql: str, params: tuple = (),
+                     limit: Optional[int] = None) -> List[Task]:
+        """
+        Run a task query through the cache, keyed by its index key. With a
+        limit, only the first rows are read and cached, as a prefix of the result.
+        """
+        use_cache = self._cache_usable()
+        if use_cache:
+            tasks = self.cache.get_list(key, limit)
+            if tasks is not None:
+                return tasks
+
+        if limit is not None:
+            sql, params = f"{sql} LIMIT ?", tuple(params) + (limit,)
+        generation = self.cache.generation
+        with self.db.reader() as conn:
+            # Decode while iterating so rows and tasks are never both held in full
+            tasks = [self._row_to_task(row) for row in conn.execute(sql, params)]
+
+        if use_cache:
+            # Fewer rows than the limit means this is the whole result
+            complete = limit is None or len(tasks) < limit
+            self.cache.put_list(key, tasks, generation, complete)
+        return tasks
 
     def _row_to_task(self, row) -> Task:
         """Convert database row to Task object"""
-        return Task(
-            id=row[0],
-            title=row[1],
-            description=row[2],
-            agent=row[3],
-            state=TaskState[row[4]],
-            priority=TaskPriority[row[5]],
-            created_at=datetime.fromisoformat(row[6]),
-            updated_at=datetime.fromisoformat(row[7]),
-            parent_task=row[8],
-            tags=json.loads(row[9]) if row[9] else []
-        )
+        return Task.from_row(row)
 
     def update_task_state(self, task_id: str, new_state: TaskState):
         """Update task state and log history"""
-        task = self.get_task(task_id)
-        if not task:
-            return None
+        return self.transition_state(task_id, new_state)
+
+    def transition_state(
+        self,
+        task_id: str,
+        new_state: TaskState,
+        expected_version: Optional[int] = None
+    ) -> Optional[Task]:
+        """
+        Atomically move a task to new_state and log the transition.
+
+        The history row and a single UPDATE ... WHERE id = ? AND version = ?
+        run in one IMMEDIATE transaction, so concurrent writers (even in other
+        processes) cannot lose each other's updates. With expected_version the
+        change only applies if the task is still at that version; otherwise
+        ConcurrentUpdateError is raised. Returns the updated task, or None if
+        it does not exist.
+        """
+        version_check = " AND version = ?" if expected_version is not None else ""
+        version_params = (expected_version,) if expected_version is not None else ()
+        now = datetime.now()
+
+        with self.db.writer() as conn:
+            # Reading the old state inside the INSERT keeps this to two statements
+            inserted = conn.execute(f"""
+                INSERT INTO task_history (task_id, field, old_value, new_value, changed_at)
+                SELECT id, 'state', state, ?, ? FROM tasks WHERE id = ?{version_check}
+            """, (new_state.display_name, now.isoformat(), task_id) + version_params).rowcount
 
-        old_state = task.state
-        task.state = new_state
-        task.updated_at = datetime.now()
+            if not inserted:
+                row = conn.execute("SELECT version FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is None:
+                    return None
+                raise ConcurrentUpdateError(task_id, expected_version, row[0])
 
-        self._save_task(task)
-        self._log_history(task_id, "state", old_state.display_name, new_state.display_name)
+            row = conn.execute(f"""
+                UPDATE tasks SET state = ?, updated_at = ?, version = version + 1
+                WHERE id = ?{version_check}
+                RETURNING {TASK_COLUMNS}
+            """, (new_state.display_name, to_epoch_us(now), task_id) + version_params).fetchone()
+
+            task = self._row_to_task(row)
+            self._invalidate([task_id], [task])
 
         return task
 
-    def _log_history(self, task_id: str, field: str, old_value: str, new_value: str):
-        """Log task changes to history"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def update_states_bulk(self, updates: List[Tuple[str, TaskState]]) -> List[Task]:
+        """
+        Move many tasks to new states in a single transaction.
+        Unknown task IDs are skipped; returns the updated tasks.
+        """
+        if not updates:
+            return []
 
-        cursor.execute("""
-            INSERT INTO task_history (task_id, field, old_value, new_value, changed_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (task_id, field, old_value, new_value, datetime.now().isoformat()))
+        now = datetime.now()
+        updated = {}
+        history = []
 
-        conn.commit()
-        conn.close()
+        with self.db.writer() as conn:
+            current = {}
+            ids = list({task_id for task_id, _ in updates})
+            for i in range(0, len(ids), BULK_CHUNK_SIZE):
+                chunk = ids[i:i + BULK_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                for row in conn.execute(
+                    f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({placeholders})", chunk
+                ):
+                    current[row[0]] = self._row_to_task(row)
 
-    def get_tasks_by_agent(self, agent: str) -> List[Task]:
-        """Get all tasks assigned to an agent"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+            for task_id, new_state in updates:
+                task = current.get(task_id)
+                if not task:
+                    continue
 
-        cursor.execute("SELECT * FROM tasks WHERE agent = ? ORDER BY updated_at DESC", (agent,))
-        rows = cursor.fetchall()
-        conn.close()
+                history.append((
+                    task_id, "state", task.state.display_name,
+                    new_state.display_name, now.isoformat()
+                ))
+                task.state = new_state
+                task.updated_at = now
+                updated[task_id] = task
 
-        return [self._row_to_task(row) for row in rows]
+            conn.executemany(
+                "UPDATE tasks SET state = ?, updated_at = ?, version = version + 1 WHERE id = ?",
+                [(task.state_name, to_epoch_us(now), task.id) for task in updated.values()]
+            )
+            for task in updated.values():
+                task.version += 1
+            conn.executemany(HISTORY_INSERT, history)
+            self._invalidate(list(updated), list(updated.values()))
+
+        return list(updated.values())
 
-    def get_tasks_by_state(self, state: TaskState) -> List[Task]:
-        """Get all tasks in a specific state"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _log_history(self, task_id: str, field: str, old_value: str, new_value: str):
+        """Log task changes to history"""
+        with self.db.writer() as conn:
+            conn.execute(
+                HISTORY_INSERT,
+                (task_id, field, old_value, new_value, datetime.now().isoformat())
+            )
 
-        cursor.execute(
-            "SELECT * FROM tasks WHERE state = ? ORDER BY priority, updated_at DESC",
-            (state.display_name,)
+    def get_tasks_by_agent(self, agent: str) -> List[Task]:
+        """Get all tasks assigned to an agent"""
+        return self._query_tasks(
+            agent_key(agent),
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE agent = ? ORDER BY updated_at DESC",
+            (agent,)
         )
-        rows = cursor.fetchall()
-        conn.close()
 
-        return [self._row_to_task(row) for row in rows]
+    def get_tasks_by_state(self, state: TaskState, limit: Optional[int] = None) -> List[Task]:
+        """Get all tasks in a specific state, or only the top `limit` of them"""
+        return self._query_tasks(
+            state_key(state.display_name),
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE state = ? ORDER BY priority, updated_at DESC",
+            (state.display_name,),
+            limit
+        )
 
     def get_all_tasks(self) -> List[Task]:
         """Get all tasks"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM tasks ORDER BY updated_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
+        return self._query_tasks(ALL_KEY, ALL_TASKS_SQL)
 
+    def get_tasks_created_between(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> List[Task]:
+        """
+        Get tasks created in [start, end), oldest first. New tasks are found
+        by a primary key range scan, since their IDs start with the creation time.
+        """
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE {CREATED_BETWEEN} ORDER BY created_at, id",
+                created_between_params(start, end)
+            ).fetchall()
         return [self._row_to_task(row) for row in rows]
 
+    def iter_tasks(self, filters: Optional[Dict] = None,
+                   batch_size: int = BULK_CHUNK_SIZE) -> Iterator[Task]:
+        """
+        Yield tasks one at a time, fetching batch_size rows per round trip,
+        so memory stays flat however large the board is. The generator holds
+        a reader connection until it is exhausted or closed.
+        """
+        conditions, params = self._filter_clause(filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.db.reader() as conn:
+            cursor = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks {where}", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._row_to_task(row)
+
+    def _filter_clause(self, filters: Optional[Dict],
+                       table: str = "tasks") -> Tuple[List[str], list]:
+        """
+        Build WHERE conditions for a filters dict: 'state', 'agent', and 'query'
+        (a task_query.CompiledQuery, e.g. from compile_query("prio:P0 tag:ios")).
+        Pass table="tasks_archive" to filter the archive instead.
+        """
+        conditions = []
+        params = []
+        filters = filters or {}
+
+        if filters.get('state'):
+            conditions.append("state = ?")
+            params.append(filters['state'].display_name)
+        if filters.get('agent'):
+            conditions.append("agent = ?")
+            params.append(filters['agent'])
+        if filters.get('query'):
+            query_conditions, query_params = filters['query'].bind(table=table)
+            conditions.extend(query_conditions)
+            params.extend(query_params)
+
+        return conditions, params
+
+    def get_tasks_page(
+        self,
+        filters: Optional[Dict] = None,
+        after_cursor: Optional[str] = None,
+        limit: int = 10,
+        before_cursor: Optional[str] = None
+    ) -> Tuple[List[Task], Optional[str], Optional[str]]:
+        """
+        Get one page of tasks, newest first, using keyset pagination on
+        (updated_at, id). Pass after_cursor for the next page or before_cursor
+        for the previous one. Returns (tasks, next_cursor, prev_cursor), with a
+        cursor set to None when there is no page in that direction.
+        """
+        if not filters and after_cursor is None and before_cursor is None:
+            # The bot reads this first page for every message; keep it in the cache
+            rows = self._query_tasks(ALL_KEY, ALL_TASKS_SQL, limit=limit + 1)
+            tasks = rows[:limit]
+            next_cursor = encode_cursor(tasks[-1]) if len(rows) > limit else None
+            return tasks, next_cursor, None
+
+        conditions, params = self._filter_clause(filters)
+        backwards = before_cursor is not None
+
+        if backwards:
+            conditions.append("(updated_at, id) > (?, ?)")
+            params.extend(decode_cursor(before_cursor))
+            order = "updated_at ASC, id ASC"
+        elif after_cursor:
+            conditions.append("(updated_at, id) < (?, ?)")
+            params.extend(decode_cursor(after_cursor))
+            order = "updated_at DESC, id DESC"
+        else:
+            order = "updated_at DESC, id DESC"
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks {where} ORDER BY {order} LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        tasks = [self._row_to_task(row) for row in rows]
+
+        if not tasks:
+            return tasks, None, None
+
+        if backwards:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, after_cursor is not None
+
+        next_cursor = encode_cursor(tasks[-1]) if has_next else None
+        prev_cursor = encode_cursor(tasks[0]) if has_prev else None
+        return tasks, next_cursor, prev_cursor
+
+    def count_tasks(self, filters: Optional[Dict] = None) -> int:
+        """
+        Count tasks matching a filters dict. State, agent and priority filters
+        are answered from the board counters; anything else (tags, ages, text)
+        counts the matching rows in tasks.
+        """
+        conditions, params = self._filter_clause(filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = (filters or {}).get('query')
+
+        with self.db.reader() as conn:
+            if query and not query.counts_from_board:
+                return conn.execute(f"SELECT COUNT(*) FROM tasks {where}", params).fetchone()[0]
+            return conn.execute(
+                f"SELECT COALESCE(SUM(count), 0) FROM board_counts {where}", params
+            ).fetchone()[0]
+
+    def search(
+        self,
+        query: str,
+        filters: Optional[Dict] = None,
+        limit: int = 20,
+        include_archived: bool = False
+    ) -> List[Task]:
+        """
+        Full-text search over titles and descriptions, best matches first.
+        Every word must match, as a prefix ("sync" also finds "syncing").
+        With include_archived, archived tasks fill any remaining slots.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        tables = [("tasks", "tasks_fts")]
+        if include_archived:
+            tables.append(("tasks_archive", "tasks_archive_fts"))
+
+        tasks = []
+        with self.db.reader() as conn:
+            for table, fts_table in tables:
+                remaining = limit - len(tasks)
+                if remaining <= 0:
+                    break
+                columns = ", ".join(f"{table}.{field}" for field in TASK_FIELDS)
+                conditions, params = self._filter_clause(filters, table)
+                where = "".join(f" AND {condition}" for condition in conditions)
+                rows = conn.execute(f"""
+                    SELECT {columns}
+                    FROM {fts_table}
+                    JOIN {table} ON {table}.rowid = {fts_table}.rowid
+                    WHERE {fts_table} MATCH ?{where}
+                    ORDER BY bm25({fts_table}, 10.0, 1.0)
+                    LIMIT ?
+                """, [match] + params + [remaining]).fetchall()
+                tasks.extend(self._row_to_task(row) for row in rows)
+
+        return tasks
+
+    def rebuild_search_index(self):
+        """Rebuild the full-text indexes (e.g. after a VACUUM renumbers rowids)"""
+        with self.db.writer() as conn:
+            conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO tasks_archive_fts (tasks_archive_fts) VALUES ('rebuild')")
+
+    def find_existing_titles(self, titles: List[str]) -> Set[str]:
+        """Return which of the given titles already belong to a task"""
+        found = set()
+        titles = list(set(titles))
+
+        with self.db.reader() as conn:
+            for i in range(0, len(titles), BULK_CHUNK_SIZE):
+                chunk = titles[i:i + BULK_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                for table in ("tasks", "tasks_archive"):
+                    found.update(
+                        row[0] for row in conn.execute(
+                            f"SELECT title FROM {table} WHERE title IN ({placeholders})", chunk
+                        )
+                    )
+
+        return found
+
+    def export_ndjson(self, path: str, include_history: bool = True) -> Dict[str, int]:
+        """
+        Stream every active task (then, optionally, its history) to a
+        newline-delimited JSON file, one record per line:
+        {"type": "task", ...Task.to_dict()} or {"type": "history", ...}
+        """
+        stats = {"tasks": 0, "history": 0}
+
+        with open(path, "w", encoding="utf-8") as f:
+            for task in self.iter_tasks():
+                f.write(json.dumps({"type": "task", **task.to_dict()}, ensure_ascii=False) + "\n")
+                stats["tasks"] += 1
+
+            if include_history:
+                with self.db.reader() as conn:
+                    cursor = conn.execute("""
+                        SELECT task_id, field, old_value, new_value, changed_at
+                        FROM task_history ORDER BY id
+                    """)
+                    while True:
+                        rows = cursor.fetchmany(BULK_CHUNK_SIZE)
+                        if not rows:
+                            break
+                        for task_id, field, old_value, new_value, changed_at in rows:
+                            f.write(json.dumps({
+                                "type": "history", "task_id": task_id, "field": field,
+                                "old_value": old_value, "new_value": new_value,
+                                "changed_at": changed_at
+                            }, ensure_ascii=False) + "\n")
+                            stats["history"] += 1
+
+        return stats
+
+    def import_ndjson(
+        self,
+        path: str,
+        include_history: bool = True,
+        replace: bool = False,
+        batch_size: int = BULK_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Load a file written by export_ndjson, batch_size records per transaction.
+
+        Tasks whose ID already exists are skipped, or overwritten with
+        replace=True. History rows are only added for tasks that exist and
+        are not already recorded, so importing the same file twice is safe.
+        Merged history lands out of order, so if any was added the last
+        transaction also rebuilds flow_stats (reassigned tasks move their
+        samples by trigger).
+        """
+        stats = {"tasks": 0, "skipped": 0, "history": 0}
+        conflict = """
+            DO UPDATE SET
+                title = excluded.title,
+                description = excluded.description,
+                agent = excluded.agent,
+                state = excluded.state,
+                priority = excluded.priority,
+                created_at = excluded.created_at,
+                updated_at = excluded.updated_at,
+                parent_task = excluded.parent_task,
+                tags = excluded.tags,
+                version = tasks.version + 1
+        """ if replace else "DO NOTHING"
+
+        def flush(tasks: List[Task], history: List[tuple], last: bool = False):
+            with self.db.writer() as conn:
+                if tasks:
+                    inserted = conn.executemany(f"""
+                        INSERT INTO tasks ({TASK_COLUMNS})
+                        VALUES ({TASK_PLACEHOLDERS})
+                        ON CONFLICT(id) {conflict}
+                    """, [self._task_params(task) for task in tasks]).rowcount
+                    stats["tasks"] += inserted
+                    stats["skipped"] += len(tasks) - inserted
+                    self._invalidate([task.id for task in tasks], tasks)
+                if history:
+                    # Uses idx_task_history_task_changed for the duplicate check
+                    stats["history"] += conn.executemany("""
+                        INSERT INTO task_history (task_id, field, old_value, new_value, changed_at)
+                        SELECT ?1, ?2, ?3, ?4, ?5
+                        WHERE EXISTS (SELECT 1 FROM tasks WHERE id = ?1)
+                          AND NOT EXISTS (
+                            SELECT 1 FROM task_history
+                            WHERE task_id = ?1 AND changed_at = ?5 AND field = ?2 AND new_value IS ?4
+                          )
+                    """, history).rowcount
+                if last and stats["history"]:
+                    for statement in REBUILD_FLOW_STATS:
+                        conn.execute(statement)
+
+        tasks, history = [], []
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                kind = record.pop("type", "task")
+                if kind == "task":
+                    tasks.append(Task.from_dict(record))
+                elif kind == "history" and include_history:
+                    history.append((
+                        record["task_id"], record["field"], record.get("old_value"),
+                        record.get("new_value"), record["changed_at"]
+                    ))
+                elif kind != "history":
+                    raise ValueError(f"{path}:{line_number}: unknown record type {kind!r}")
+
+                if len(tasks) + len(history) >= batch_size:
+                    flush(tasks, history)
+                    tasks, history = [], []
+
+        flush(tasks, history, last=True)
+        return stats
+
     def delete_task(self, task_id: str):
-        """Delete a task"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Delete a task; its subtasks move up to its parent"""
+        with self.db.writer() as conn:
+            children = [row[0] for row in conn.execute(
+                "SELECT id FROM tasks WHERE parent_task = ?", (task_id,)
+            )]
+            conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            conn.execute("DELETE FROM task_history WHERE task_id = ?", (task_id,))
+            self._invalidate([task_id] + children)
+
+    def archive_closed_tasks(self, older_than_days: int = ARCHIVE_AFTER_DAYS) -> int:
+        """
+        Move DONE and CANCELLED tasks untouched for older_than_days, with their
+        history, into the archive tables. Works in small transactions so other
+        writers are never held up for long. Returns the number archived.
+        """
+        cutoff = to_epoch_us(datetime.now() - timedelta(days=older_than_days))
+        archived = 0
+
+        while True:
+            with self.db.writer() as conn:
+                # Uses idx_tasks_state_updated_id for each closed state. A task in a
+                # hierarchy only goes once its whole tree qualifies, deepest first,
+                # so epics never lose subtasks that are still live.
+                ids = [row[0] for row in conn.execute("""
+                    SELECT id FROM tasks
+                    WHERE state IN ('DONE', 'CANCELLED') AND updated_at < ?1
+                      AND NOT EXISTS (
+                        SELECT 1 FROM task_tree tree
+                        JOIN task_tree related ON related.ancestor = tree.ancestor
+                        JOIN tasks t ON t.id = related.descendant
+                        WHERE tree.descendant = tasks.id
+                          AND tree.ancestor = (
+                            SELECT ancestor FROM task_tree
+                            WHERE descendant = tasks.id ORDER BY depth DESC LIMIT 1
+                          )
+                          AND NOT (t.state IN ('DONE', 'CANCELLED') AND t.updated_at < ?1)
+                      )
+                    ORDER BY (SELECT MAX(depth) FROM task_tree WHERE descendant = tasks.id) DESC
+                    LIMIT ?2
+                """, (cutoff, BULK_CHUNK_SIZE))]
+                if not ids:
+                    return archived
+
+                placeholders = ", ".join("?" * len(ids))
+                archived_at = to_epoch_us(datetime.now())
+                conn.execute(f"""
+                    INSERT INTO tasks_archive ({TASK_COLUMNS}, archived_at)
+                    SELECT {TASK_COLUMNS}, ? FROM tasks WHERE id IN ({placeholders})
+                """, [archived_at] + ids)
+                conn.execute(f"""
+                    INSERT INTO task_history_archive
+                    SELECT id, task_id, field, old_value, new_value, changed_at
+                    FROM task_history WHERE task_id IN ({placeholders})
+                """, ids)
+                conn.execute(f"DELETE FROM task_history WHERE task_id IN ({placeholders})", ids)
+                conn.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", ids)
+                self._invalidate(ids)
+
+            archived += len(ids)
+
+    def restore_archived_task(self, task_id: str) -> Optional[Task]:
+        """Move an archived task and its history back into the active tables"""
+        with self.db.writer() as conn:
+            row = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks_archive WHERE id = ?", (task_id,)
+            ).fetchone()
+            if not row:
+                return None
+
+            task = self._row_to_task(row)
+            conn.execute(f"""
+                INSERT INTO tasks ({TASK_COLUMNS})
+                VALUES ({TASK_PLACEHOLDERS})
+            """, self._task_params(task))
+            conn.execute("""
+                INSERT INTO task_history
+                SELECT id, task_id, field, old_value, new_value, changed_at
+                FROM task_history_archive WHERE task_id = ?
+            """, (task_id,))
+            conn.execute("DELETE FROM task_history_archive WHERE task_id = ?", (task_id,))
+            conn.execute("DELETE FROM tasks_archive WHERE id = ?", (task_id,))
+            self._invalidate([task_id], [task])
+
+        return task
+
+    def create_subtask(
+        self,
+        parent_id: str,
+        title: str,
+        description: str,
+        agent: Optional[str] = None,
+        priority: Optional[TaskPriority] = None,
+        tags: List[str] = None
+    ) -> Optional[Task]:
+        """Create a task under parent_id (agent and priority default to the parent's)"""
+        with self.db.writer() as conn:
+            row = conn.execute(
+                "SELECT agent, priority FROM tasks WHERE id = ?", (parent_id,)
+            ).fetchone()
+            if not row:
+                return None
+            return self.create_task(
+                title, description, agent or row[0], priority or TaskPriority[row[1]],
+                tags, parent_task=parent_id
+            )
+
+    def set_parent(self, task_id: str, parent_id: Optional[str]) -> Optional[Task]:
+        """
+        Move a task and its subtasks under parent_id (None makes it top level).
+        Raises ValueError if the parent is missing or would create a cycle.
+        """
+        with self.db.writer() as conn:
+            old = conn.execute("SELECT parent_task FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if not old:
+                return None
+            if parent_id is not None and not conn.execute(
+                "SELECT 1 FROM tasks WHERE id = ?", (parent_id,)
+            ).fetchone():
+                raise ValueError(f"No active task {parent_id}")
+
+            try:
+                row = conn.execute(f"""
+                    UPDATE tasks SET parent_task = ?, updated_at = ?, version = version + 1
+                    WHERE id = ?
+                    RETURNING {TASK_COLUMNS}
+                """, (parent_id, to_epoch_us(datetime.now()), task_id)).fetchone()
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Cannot move {task_id} under {parent_id}: {e}") from e
+
+            self._log_history(task_id, "parent_task", old[0], parent_id)
+            task = self._row_to_task(row)
+            self._invalidate([task_id], [task])
+
+        return task
+
+    def get_children(self, task_id: str) -> List[Task]:
+        """Direct subtasks, by priority then age"""
+        with self.db.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE parent_task = ? ORDER BY priority, created_at
+            """, (task_id,))
+            return [self._row_to_task(row) for row in rows]
+
+    def get_ancestors(self, task_id: str) -> List[Task]:
+        """Parent chain of a task, top-level task first"""
+        with self.db.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT {_T_COLUMNS} FROM task_tree tree JOIN tasks t ON t.id = tree.ancestor
+                WHERE tree.descendant = ? AND tree.depth > 0
+                ORDER BY tree.depth DESC
+            """, (task_id,))
+            return [self._row_to_task(row) for row in rows]
 
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        cursor.execute("DELETE FROM task_history WHERE task_id = ?", (task_id,))
+    def get_subtree(self, task_id: str, max_depth: Optional[int] = None) -> List[Tuple[int, Task]]:
+        """
+        A task and all its descendants as (depth, task) in display order:
+        each task is followed by its subtasks, siblings by priority then age.
+        """
+        depth_clause = "AND tree.depth <= ?" if max_depth is not None else ""
+        params = (task_id, max_depth) if max_depth is not None else (task_id,)
 
-        conn.commit()
-        conn.close()
+        with self.db.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT tree.depth, {_T_COLUMNS}
+                FROM task_tree tree JOIN tasks t ON t.id = tree.descendant
+                WHERE tree.ancestor = ? {depth_clause}
+                ORDER BY tree.depth, t.priority, t.created_at
+            """, params).fetchall()
+        if not rows:
+            return []
+
+        children: Dict[Optional[str], List[Tuple[int, Task]]] = {}
+        for row in rows:
+            task = self._row_to_task(row[1:])
+            children.setdefault(task.parent_task if row[0] else None, []).append((row[0], task))
+
+        ordered = []
+        stack = list(reversed(children[None]))
+        while stack:
+            depth, task = stack.pop()
+            ordered.append((depth, task))
+            stack.extend(reversed(children.get(task.id, [])))
+        return ordered
+
+    def get_rollups(self, task_ids: List[str]) -> Dict[str, Dict[TaskState, int]]:
+        """Descendant counts per state for each task (tasks without subtasks are omitted)"""
+        rollups: Dict[str, Dict[TaskState, int]] = {}
+        with self.db.reader() as conn:
+            for i in range(0, len(task_ids), BULK_CHUNK_SIZE):
+                chunk = task_ids[i:i + BULK_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                for task_id, state, count in conn.execute(f"""
+                    SELECT task_id, state, count FROM task_rollups
+                    WHERE task_id IN ({placeholders}) AND count > 0
+                """, chunk):
+                    rollups.setdefault(task_id, {})[TaskState[state]] = count
+        return rollups
+
+    def get_progress(self, task_id: str) -> Tuple[int, int]:
+        """(done, total) over a task's descendants; cancelled subtasks are left out"""
+        counts = self.get_rollups([task_id]).get(task_id, {})
+        total = sum(counts.values()) - counts.get(TaskState.CANCELLED, 0)
+        return counts.get(TaskState.DONE, 0), total
+
+    def get_epics(self, limit: int = 20) -> List[Task]:
+        """Top-level tasks that have subtasks, most recently updated first"""
+        with self.db.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT {TASK_COLUMNS} FROM tasks
+                WHERE parent_task IS NULL
+                  AND id IN (SELECT parent_task FROM tasks WHERE parent_task IS NOT NULL)
+                ORDER BY updated_at DESC
+                LIMIT ?
+            """, (limit,))
+            return [self._row_to_task(row) for row in rows]
+
+    def rebuild_hierarchy(self):
+        """Recompute the closure table and rollups from parent_task"""
+        with self.db.writer() as conn:
+            for statement in REBUILD_HIERARCHY:
+                conn.execute(statement)
+
+    def rebuild_flow_stats(self):
+        """
+        Recompute the flow_stats histograms from all state history.
+        Needed after history is written out of order (import_ndjson runs it itself).
+        """
+        with self.db.writer() as conn:
+            for statement in REBUILD_FLOW_STATS:
+                conn.execute(statement)
 
     def get_workload_summary(self) -> Dict[str, int]:
         """Get task count per agent"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.db.reader() as conn:
+            rows = conn.execute("""
+                SELECT agent, SUM(count)
+                FROM board_counts
+                WHERE state NOT IN ('DONE', 'CANCELLED')
+                GROUP BY agent
+                HAVING SUM(count) > 0
+            """).fetchall()
+
+        return dict(rows)
+
+    def get_board_counts(self) -> Dict[Tuple[str, str, str], int]:
+        """
+        Get task counts keyed by (agent, state, priority).
+        Read from the counters table, so the cost does not grow with the board.
+        """
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                "SELECT agent, state, priority, count FROM board_counts WHERE count > 0"
+            ).fetchall()
+
+        return {(agent, state, priority): count for agent, state, priority, count in rows}
+
+    def count_by_state(self) -> Dict[TaskState, int]:
+        """Get the number of tasks in each state"""
+        counts = {state: 0 for state in TaskState}
+        for (_, state, _), count in self.get_board_counts().items():
+            counts[TaskState[state]] += count
+        return counts
+
+    def check_board_counts(self) -> Dict[Tuple[str, str, str], Tuple[int, int]]:
+        """
+        Compare the counters with a full GROUP BY over tasks.
+        Returns {key: (counter, actual)} for every mismatch; empty means consistent.
+        """
+        with self.db.reader() as conn:
+            actual = {
+                (agent, state, priority): count
+                for agent, state, priority, count in conn.execute("""
+                    SELECT agent, state, priority, COUNT(*)
+                    FROM tasks
+                    GROUP BY agent, state, priority
+                """)
+            }
+            counters = {
+                (agent, state, priority): count
+                for agent, state, priority, count in conn.execute(
+                    "SELECT agent, state, priority, count FROM board_counts"
+                )
+            }
+
+        mismatches = {}
+        for key in actual.keys() | counters.keys():
+            if actual.get(key, 0) != counters.get(key, 0):
+                mismatches[key] = (counters.get(key, 0), actual.get(key, 0))
+        return mismatches
+
+    def rebuild_board_counts(self):
+        """Recompute the counters from tasks"""
+        with self.db.writer() as conn:
+            conn.execute("DELETE FROM board_counts")
+            conn.execute("""
+                INSERT INTO board_counts (agent, state, priority, count)
+                SELECT agent, state, priority, COUNT(*)
+                FROM tasks
+                GROUP BY agent, state, priority
+            """)
+
+    def changes_since(self, cursor: int = 0, limit: int = 500) -> List[TaskChange]:
+        """Get changelog entries with seq > cursor, oldest first"""
+        with self.db.reader() as conn:
+            rows = conn.execute("""
+                SELECT seq, task_id, op, agent, old_state, new_state, changed_at
+                FROM task_changes
+                WHERE seq > ?
+                ORDER BY seq
+                LIMIT ?
+            """, (cursor, limit)).fetchall()
+
+        return [
+            TaskChange(
+                seq=row[0],
+                task_id=row[1],
+                op=row[2],
+                agent=row[3],
+                old_state=TaskState[row[4]] if row[4] else None,
+                new_state=TaskState[row[5]] if row[5] else None,
+                changed_at=datetime.fromisoformat(row[6])
+            )
+            for row in rows
+        ]
+
+    def latest_change_seq(self) -> int:
+        """Get the newest changelog sequence number (0 if empty)"""
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT MAX(seq) FROM task_changes").fetchone()
+        return row[0] or 0
+
+    def get_change_cursor(self, consumer: str) -> Optional[int]:
+        """Get a consumer's saved changelog cursor, or None if it never saved one"""
+        with self.db.reader() as conn:
+            row = conn.execute(
+                "SELECT seq FROM change_cursors WHERE consumer = ?", (consumer,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_change_cursor(self, consumer: str, seq: int):
+        """Durably store a consumer's changelog cursor"""
+        with self.db.writer() as conn:
+            conn.execute("""
+                INSERT INTO change_cursors (consumer, seq, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(consumer) DO UPDATE SET seq = excluded.seq, updated_at = excluded.updated_at
+            """, (consumer, seq, datetime.now().isoformat()))
+
+    def prune_changes(self, before_seq: int) -> int:
+        """Delete changelog entries older than before_seq; returns rows deleted"""
+        pruned = 0
+        while True:
+            # Small transactions, like archive_closed_tasks, so writers are never held up
+            with self.db.writer() as conn:
+                deleted = conn.execute("""
+                    DELETE FROM task_changes
+                    WHERE seq < ? AND seq < (SELECT MIN(seq) FROM task_changes) + ?
+                """, (before_seq, BULK_CHUNK_SIZE * 10)).rowcount
+            pruned += deleted
+            if not deleted:
+                return pruned
+
+    def prune_consumed_changes(self, keep: int = CHANGELOG_KEEP) -> int:
+        """
+        Delete changelog entries every consumer with a saved cursor has read,
+        always keeping the newest `keep`. The response cache's board version
+        comes from sqlite_sequence, which pruning never lowers.
+        """
+        with self.db.reader() as conn:
+            latest, consumed = conn.execute("""
+                SELECT (SELECT MAX(seq) FROM task_changes), (SELECT MIN(seq) FROM change_cursors)
+            """).fetchone()
+        if latest is None:
+            return 0
+
+        before_seq = latest - max(keep, 1) + 1
+        if consumed is not None:
+            before_seq = min(before_seq, consumed + 1)
+        return self.prune_changes(before_seq)
 
-        cursor.execute("""
-            SELECT agent, COUNT(*)
-            FROM tasks
-            WHERE state NOT IN ('DONE', 'CANCELLED')
-            GROUP BY agent
-        """)
+    def sync_cache(self) -> int:
+        """
+        Drop cached tasks changed by other processes since the last sync.
+        Returns the number of changes applied.
+        """
+        applied = 0
+        while True:
+            changes = self.changes_since(self._cache_seq)
+            if not changes:
+                return applied
+            if changes[0].seq > self._cache_seq + 1:
+                # Entries we never saw were pruned, so nothing cached can be trusted
+                self.cache.clear()
 
-        results = dict(cursor.fetchall())
-        conn.close()
+            keys = {ALL_KEY}
+            for change in changes:
+                keys.add(agent_key(change.agent))
+                for state in (change.old_state, change.new_state):
+                    if state:
+                        keys.add(state_key(state.display_name))
 
-        return results
+            self.cache.invalidate([change.task_id for change in changes], keys)
+            self._cache_seq = changes[-1].seq
+            applied += len(changes)
@@ -0,0 +1,219 @@
+"""
+Filter queries for August's task lists
+Compiles `/tasks agent:engineer state:progress prio:P0,P1 tag:ios updated:<7d` into parameterized SQL
+"""
+
+import re
+import shlex
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from task_ids import normalize_task_id
+from task_manager import (
+    TaskState, TaskPriority, CREATED_BETWEEN, created_between_params, to_epoch_us
+)
+
+
+QUERY_CACHE_SIZE = 256
+
+QUERY_HELP = """Filters (combine freely, comma = any of, leading - = not):
+`state:progress,review`  `agent:engineer`  `prio:P0,P1`
+`tag:ios`  `updated:<7d`  `created:>2w`  `parent:TASK-ID`
+Other words search titles and descriptions."""
+
+STATE_ALIASES = {
+    'backlog': TaskState.BACKLOG,
+    'planned': TaskState.PLANNED,
+    'progress': TaskState.IN_PROGRESS,
+    'review': TaskState.REVIEW,
+    'done': TaskState.DONE,
+    'blocked': TaskState.BLOCKED,
+    'cancelled': TaskState.CANCELLED,
+}
+
+_FIELDS = {
+    'state': 'state', 'status': 'state',
+    'agent': 'agent',
+    'prio': 'priority', 'priority': 'priority',
+    'tag': 'tag', 'tags': 'tag',
+    'updated': 'updated', 'created': 'created',
+    'parent': 'parent',
+}
+
+# Fields with a board_counts column of the same name, so counts can skip the tasks table
+_COUNTER_FIELDS = {'state', 'agent', 'priority'}
+
+# Free words match the full-text index of whichever table the query runs on
+_WORDS_CONDITION = "{table}.rowid IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)"
+
+_AGE = re.compile(r"^([<>])(\d+)([hdw])$")
+_AGE_UNITS_US = {'h': 3600 * 10**6, 'd': 86400 * 10**6, 'w': 7 * 86400 * 10**6}
+
+
+class QueryError(ValueError):
+    """Raised for a filter query that cannot be parsed"""
+
+
+class Ago:
+    """Parameter placeholder for "now minus an age", resolved when the query runs"""
+    __slots__ = ("us",)
+
+    def __init__(self, us: int):
+        self.us = us
+
+
+class CreatedAgo(Ago):
+    """Placeholder for CREATED_BETWEEN's parameters on one side of now minus an age"""
+    __slots__ = ("older",)
+
+    def __init__(self, us: int, older: bool):
+        super().__init__(us)
+        self.older = older
+
+
+class CompiledQuery:
+    """
+    A parsed filter query: WHERE conditions over the tasks table and their
+    parameters. Relative ages stay symbolic until bind(), so one compiled
+    query can be cached and reused as time moves on.
+    """
+
+    __slots__ = ("text", "conditions", "params", "counts_from_board")
+
+    def __init__(self, text: str, conditions: Tuple[str, ...], params: tuple,
+                 counts_from_board: bool):
+        self.text = text
+        self.conditions = conditions
+        self.params = params
+        self.counts_from_board = counts_from_board
+
+    def bind(self, now: Optional[datetime] = None,
+             table: str = "tasks") -> Tuple[List[str], list]:
+        """Conditions over `table` (tasks or tasks_archive) and concrete parameter values as of now"""
+        now = now or datetime.now()
+        now_us = to_epoch_us(now)
+        params = []
+        for p in self.params:
+            if isinstance(p, CreatedAgo):
+                moment = now - timedelta(microseconds=p.us)
+                params.extend(created_between_params(None, moment) if p.older
+                              else created_between_params(moment, None))
+            elif isinstance(p, Ago):
+                params.append(now_us - p.us)
+            else:
+                params.append(p)
+        conditions = [
+            _WORDS_CONDITION.format(table=table) if condition == _WORDS_CONDITION else condition
+            for condition in self.conditions
+        ]
+        return conditions, params
+
+
+def _state(value: str) -> str:
+    state = STATE_ALIASES.get(value.lower()) or TaskState.__members__.get(value.upper())
+    if state is None:
+        raise QueryError(f"Unknown state '{value}'. Try: {', '.join(STATE_ALIASES)}")
+    return state.display_name
+
+
+def _priority(value: str) -> str:
+    name = value.upper()
+    if not name.startswith("P"):
+        name = "P" + name
+    if name not in TaskPriority.__members__:
+        raise QueryError(f"Unknown priority '{value}'. Use P0 to P3")
+    return name
+
+
+def _in(column: str, values: List[str], negate: bool) -> str:
+    placeholders = ", ".join("?" * len(values))
+    return f"{column} {'NOT IN' if negate else 'IN'} ({placeholders})"
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(text: str) -> CompiledQuery:
+    """
+    Parse a filter query into a CompiledQuery, or raise QueryError.
+
+    Each `field:value` term becomes one indexed condition (state, agent and
+    priority as IN lists, ages as ranges on updated_at or the task ID), terms are
+    ANDed, and the remaining words go to the full-text index. Compiled
+    queries are cached by their text, and their SQL is stable per query
+    shape, so SQLite's statement cache reuses the prepared plans as well.
+    """
+    try:
+        tokens = shlex.split(text)
+    except ValueError as e:
+        raise QueryError(f"Could not read the query: {e}")
+
+    conditions, params, words = [], [], []
+    counts_from_board = True
+
+    for token in tokens:
+        negate = token.startswith("-") and ":" in token
+        key, sep, value = (token[1:] if negate else token).partition(":")
+        field = _FIELDS.get(key.lower()) if sep else None
+
+        if field is None:
+            if sep:
+                fields = ", ".join(sorted(set(_FIELDS.values())))
+                raise QueryError(f"Unknown filter '{key}:'. Use {fields}")
+            if token.lower() in STATE_ALIASES:
+                # `/tasks review` has always meant the review column
+                conditions.append("state = ?")
+                params.append(STATE_ALIASES[token.lower()].display_name)
+            else:
+                words.extend(re.findall(r"\w+", token))
+            continue
+
+        if not value:
+            raise QueryError(f"'{key}:' needs a value")
+        if field not in _COUNTER_FIELDS:
+            counts_from_board = False
+        values = [v for v in value.split(",") if v]
+
+        if field == 'state':
+            states = [_state(v) for v in values]
+            conditions.append(_in("state", states, negate))
+            params.extend(states)
+        elif field == 'agent':
+            agents = [v.lower() for v in values]
+            conditions.append(_in("agent", agents, negate))
+            params.extend(agents)
+        elif field == 'priority':
+            priorities = [_priority(v) for v in values]
+            conditions.append(_in("priority", priorities, negate))
+            params.extend(priorities)
+        elif field == 'tag':
+            tags = [v.lower() for v in values]
+            exists = f"EXISTS (SELECT 1 FROM json_each(tags) WHERE {_in('lower(value)', tags, False)})"
+            conditions.append(f"NOT {exists}" if negate else exists)
+            params.extend(tags)
+        elif field == 'parent':
+            parents = [normalize_task_id(v) for v in values]
+            condition = _in("parent_task", parents, negate)
+            # Top-level tasks have no parent, and NULL NOT IN (...) would drop them
+            conditions.append(f"(parent_task IS NULL OR {condition})" if negate else condition)
+            params.extend(parents)
+        else:
+            match = _AGE.match(value)
+            if not match or negate:
+                raise QueryError(f"'{key}:' takes an age like <7d or >2w (units h, d, w)")
+            direction, amount, unit = match.groups()
+            age_us = int(amount) * _AGE_UNITS_US[unit]
+            # <7d: newer than 7 days ago; >7d: older than that
+            if field == 'updated':
+                conditions.append(f"updated_at {'>' if direction == '<' else '<'} ?")
+                params.append(Ago(age_us))
+            else:
+                # A range of time-ordered IDs, rather than a created_at scan
+                conditions.append(CREATED_BETWEEN)
+                params.append(CreatedAgo(age_us, older=direction == '>'))
+
+    if words:
+        counts_from_board = False
+        conditions.append(_WORDS_CONDITION)
+        params.append(" ".join(f'"{word}"*' for word in words))
+
+    return CompiledQuery(text, tuple(conditions), tuple(params), counts_from_board)
@@ -0,0 +1,299 @@
+"""
+Per-user task databases for August
+Routes each Telegram user from configs/user_<id>.json to their own TaskManager shard
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from analytics import TeamAnalytics
+from async_task_manager import AsyncTaskManager
+from response_cache import ResponseCache
+from task_manager import TaskManager
+from vibe_sync import VibeKanbanClient, VibeAugustSync, VIBE_BASE_URL, VIBE_PROJECT_ID
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_CONFIGS_DIR = "configs"
+DEFAULT_DATA_DIR = "data"
+
+# Each SQLite connection in WAL mode holds the database, -wal and -shm files open
+FDS_PER_CONNECTION = 3
+
+# A user missing from the configs re-reads configs/ at most this often
+CONFIG_RELOAD_SECONDS = 30
+
+
+def load_tenant_configs(configs_dir: str = DEFAULT_CONFIGS_DIR) -> Dict[int, Dict]:
+    """Read every configs/user_*.json written by setup.py, keyed by Telegram user ID"""
+    configs = {}
+    for path in sorted(Path(configs_dir).glob("user_*.json")):
+        try:
+            with open(path) as f:
+                config = json.load(f)
+            configs[int(config["telegram_user_id"])] = config
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Skipping tenant config {path}: {e}")
+    return configs
+
+
+def read_change_seq(db_path: str) -> Optional[int]:
+    """
+    Newest changelog seq of a shard file, read over a throwaway read-only
+    connection so the shard is not opened, migrated or counted as used.
+    0 for a shard that does not exist yet; None if it cannot be read this way.
+    """
+    if not os.path.exists(db_path):
+        return 0
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=5.0)
+        try:
+            return conn.execute("SELECT MAX(seq) FROM task_changes").fetchone()[0] or 0
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+def default_fd_budget() -> int:
+    """Half of the process's open-file limit, leaving room for sockets and logs"""
+    if resource is None:
+        return 512
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return 4096
+    return max(soft // 2, FDS_PER_CONNECTION)
+
+
+class Tenant:
+    """One user's open shard: task store, flow analytics, response cache and Vibe Kanban sync"""
+
+    def __init__(self, user_id: int, config: Dict, db_path: str,
+                 max_readers: int, cache_size: int):
+        self.user_id = user_id
+        self.config = config
+        self.db_path = db_path
+        self.task_manager = TaskManager(db_path, max_readers=max_readers, cache_size=cache_size)
+        try:
+            self.store = AsyncTaskManager(self.task_manager)
+            self.analytics = TeamAnalytics(self.task_manager)
+            self.responses = ResponseCache(self.task_manager)
+
+            vibe = config.get("vibe_kanban") or {}
+            vibe_client = VibeKanbanClient(
+                base_url=vibe["url"].rstrip("/") + "/api" if vibe.get("url") else VIBE_BASE_URL,
+                project_id=vibe.get("project_id") or VIBE_PROJECT_ID
+            )
+            self.vibe_sync = VibeAugustSync(self.task_manager, vibe=vibe_client)
+        except BaseException:
+            # The router never sees a shard that failed to open, so close its files here
+            self.task_manager.close()
+            raise
+
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        """Drain queued calls and close the shard's connections"""
+        self.store.shutdown()
+
+
+class TenantRouter:
+    """
+    Maps Telegram users to their own database shard.
+
+    Shards open lazily on first use and stay in an LRU of open handles.
+    Handlers hold a lease while they work (`async with router.lease(user_id)`),
+    so only shards nobody is using get closed: the least recently used one
+    when the open-handle cap is reached, and any that sat idle too long.
+    The cap is derived from a file-descriptor budget, since every shard
+    keeps up to 1 + max_readers connections of FDS_PER_CONNECTION files.
+    Shards are opened and closed outside the router lock, so one slow
+    migration only holds up the user whose shard it is.
+    """
+
+    def __init__(
+        self,
+        configs_dir: str = DEFAULT_CONFIGS_DIR,
+        data_dir: str = DEFAULT_DATA_DIR,
+        max_open: int = 64,
+        max_fds: Optional[int] = None,
+        idle_seconds: int = 15 * 60,
+        max_readers: int = 2,
+        cache_size: int = 500
+    ):
+        self.configs_dir = configs_dir
+        self.data_dir = data_dir
+        self.idle_seconds = idle_seconds
+        self.max_readers = max_readers
+        self.cache_size = cache_size
+
+        fds_per_shard = (1 + max_readers) * FDS_PER_CONNECTION
+        self.max_open = max(1, min(max_open, (max_fds or default_fd_budget()) // fds_per_shard))
+
+        self.configs = load_tenant_configs(configs_dir)
+        self._configs_loaded = time.monotonic()
+        self._open: "OrderedDict[int, Tenant]" = OrderedDict()
+        # Shards being opened; other callers for the same user wait on the future
+        self._opening: Dict[int, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self.running = False
+
+        os.makedirs(data_dir, exist_ok=True)
+
+    def add_tenant(self, user_id: int, config: Dict):
+        """Register a tenant that has no config file (e.g. the legacy single user)"""
+        self.configs.setdefault(user_id, {"telegram_user_id": user_id, **config})
+
+    def reload_configs(self):
+        """Pick up users added by setup.py since startup"""
+        self._configs_loaded = time.monotonic()
+        for user_id, config in load_tenant_configs(self.configs_dir).items():
+            self.configs[user_id] = config
+
+    def is_tenant(self, user_id: int) -> bool:
+        """Check if the user has a workspace, re-reading configs/ (throttled) for unknown users"""
+        if user_id not in self.configs and \
+                time.monotonic() - self._configs_loaded >= CONFIG_RELOAD_SECONDS:
+            self.reload_configs()
+        return user_id in self.configs
+
+    def user_ids(self) -> List[int]:
+        """All configured tenants"""
+        return list(self.configs)
+
+    def db_path(self, user_id: int) -> str:
+        """Shard file for a user; a config may pin an explicit tasks_db path"""
+        return self.configs[user_id].get("tasks_db") or os.path.join(
+            self.data_dir, f"tasks_{user_id}.db"
+        )
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    @asynccontextmanager
+    async def lease(self, user_id: int):
+        """Yield the user's Tenant, keeping the shard open until the block exits"""
+        tenant = await self.acquire(user_id)
+        try:
+            yield tenant
+        finally:
+            self.release(tenant)
+
+    async def acquire(self, user_id: int) -> Tenant:
+        """Open (or reuse) a user's shard and pin it; pair with release()"""
+        if not self.is_tenant(user_id):
+            raise KeyError(f"No tenant config for user {user_id}")
+
+        while True:
+            async with self._lock:
+                tenant = self._open.get(user_id)
+                if tenant is not None:
+                    self._open.move_to_end(user_id)
+                    tenant.leases += 1
+                    tenant.last_used = time.monotonic()
+                    return tenant
+
+                opening = self._opening.get(user_id)
+                if opening is None:
+                    opening = asyncio.get_running_loop().create_future()
+                    self._opening[user_id] = opening
+                    victims = self._take_victims()
+                    break
+
+            # Someone else is opening this shard; take a lease once it is in.
+            # Shielded so a cancelled waiter does not cancel the shared future.
+            await asyncio.shield(opening)
+
+        try:
+            for victim in victims:
+                await asyncio.to_thread(victim.close)
+            # Opening runs pending migrations, so keep it off the event loop
+            tenant = await asyncio.to_thread(
+                Tenant, user_id, self.configs[user_id], self.db_path(user_id),
+                self.max_readers, self.cache_size
+            )
+            async with self._lock:
+                self._open[user_id] = tenant
+                tenant.leases += 1
+                tenant.last_used = time.monotonic()
+            return tenant
+        finally:
+            del self._opening[user_id]
+            if not opening.done():
+                opening.set_result(None)
+
+    def release(self, tenant: Tenant):
+        """Unpin a shard acquired with acquire()"""
+        tenant.leases -= 1
+        tenant.last_used = time.monotonic()
+
+    def _take_victims(self) -> List[Tenant]:
+        """
+        Take least recently used, unleased shards out of the LRU until the
+        shards being opened fit (lock held); the caller closes them
+        """
+        victims = []
+        while len(self._open) + len(self._opening) > self.max_open:
+            victim = next((t for t in self._open.values() if not t.leases), None)
+            if victim is None:
+                # Every open shard is mid-request; go over the cap briefly rather than fail
+                print(f"⚠️ All {len(self._open)} tenant shards busy, exceeding max_open")
+                break
+            del self._open[victim.user_id]
+            victims.append(victim)
+        return victims
+
+    async def evict_idle(self) -> int:
+        """Close shards that nobody has used for idle_seconds"""
+        cutoff = time.monotonic() - self.idle_seconds
+        async with self._lock:
+            idle = [t for t in self._open.values() if not t.leases and t.last_used < cutoff]
+            for tenant in idle:
+                del self._open[tenant.user_id]
+        for tenant in idle:
+            await asyncio.to_thread(tenant.close)
+        return len(idle)
+
+    async def change_seq(self, user_id: int) -> Optional[int]:
+        """
+        Newest changelog seq of a user's shard, read without leasing it (see
+        read_change_seq), so schedulers can skip shards with nothing new
+        """
+        return await asyncio.to_thread(read_change_seq, self.db_path(user_id))
+
+    async def start_idle_eviction(self, interval_seconds: int = 60):
+        """Periodically close idle shards"""
+        self.running = True
+
+        while self.running:
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                print(f"Tenant eviction error: {e}")
+
+            await asyncio.sleep(interval_seconds)
+
+    def stop(self):
+        """Stop the idle eviction loop"""
+        self.running = False
+
+    async def close_all(self):
+        """Close every open shard (on shutdown)"""
+        self.stop()
+        async with self._lock:
+            tenants, self._open = list(self._open.values()), OrderedDict()
+        for tenant in tenants:
+            await asyncio.to_thread(tenant.close)
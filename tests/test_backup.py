@@ -0,0 +1,102 @@
+"""
+Backups and restore
+Snapshots a live task database, rotates snapshots past the keep count, and restores
+one into a fresh path and over a newer database
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backup  # noqa: E402
+from backup import backup_database, list_snapshots, restore_database  # noqa: E402
+from task_manager import TaskManager, TaskState  # noqa: E402
+
+
+class BackupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "tasks.db")
+        self.backup_dir = os.path.join(self.tmp, "backups")
+        self.tm = TaskManager(self.db_path)
+        self.tm.create_tasks_bulk([
+            {"title": f"task {i}", "description": "x" * 2000, "agent": "engineer"}
+            for i in range(300)
+        ])
+
+    def tearDown(self):
+        self.tm.close()
+        shutil.rmtree(self.tmp)
+
+    def titles(self, db_path: str) -> set:
+        with contextlib.closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+            return {row[0] for row in conn.execute("SELECT title FROM tasks")}
+
+    def test_copy_pauses_between_steps(self):
+        pauses = []
+        real_sleep = backup.time.sleep
+        backup.time.sleep = pauses.append
+        try:
+            backup_database(self.db_path, self.backup_dir, pages=16, sleep=0.01)
+        finally:
+            backup.time.sleep = real_sleep
+        self.assertGreater(len(pauses), 5)
+        self.assertEqual(set(pauses), {0.01})
+
+    def test_rotation(self):
+        taken = [backup_database(self.db_path, self.backup_dir, keep=3) for _ in range(5)]
+        snapshots = list_snapshots(self.db_path, self.backup_dir)
+        self.assertEqual(snapshots, taken[:-4:-1])  # The newest three, newest first
+        self.assertFalse(any(path.name.endswith(".partial") for path in snapshots[0].parent.iterdir()))
+
+        # keep=None never prunes
+        backup_database(self.db_path, self.backup_dir, keep=None)
+        self.assertEqual(len(list_snapshots(self.db_path, self.backup_dir)), 4)
+
+    def test_snapshot_is_standalone(self):
+        snapshot = backup_database(self.db_path, self.backup_dir)
+        with contextlib.closing(sqlite3.connect(snapshot)) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0], 300)
+
+    def test_restore_into_fresh_path(self):
+        expected = self.titles(self.db_path)
+        snapshot = backup_database(self.db_path, self.backup_dir)
+        restored = os.path.join(self.tmp, "restored", "tasks.db")
+        os.makedirs(os.path.dirname(restored))
+
+        restore_database(str(snapshot), restored)
+        self.assertEqual(self.titles(restored), expected)
+
+        with self.assertRaises(FileNotFoundError):
+            restore_database(os.path.join(self.tmp, "missing.db"), restored)
+
+    def test_restore_over_newer_database(self):
+        snapshot = backup_database(self.db_path, self.backup_dir)
+        task = self.tm.create_task("written after the snapshot", "", "qa")
+        self.tm.transition_state(task.id, TaskState.DONE)
+        self.tm.close()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            backup.main(["--db", self.db_path, "--backup-dir", self.backup_dir,
+                         "restore", str(snapshot)])
+        self.assertNotIn("written after the snapshot", self.titles(self.db_path))
+
+        # The pre-restore state was saved as the newest snapshot
+        newest = list_snapshots(self.db_path, self.backup_dir)[0]
+        self.assertNotEqual(newest, snapshot)
+        self.assertIn("written after the snapshot", self.titles(str(newest)))
+        self.tm = TaskManager(self.db_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Benchmark suite checks
+Runs benchmarks/bench_suite.py on a tiny board so a broken benchmark shows up before a long run
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import bench_suite  # noqa: E402
+from task_manager import TaskManager, TaskState  # noqa: E402
+
+
+class BenchSuiteTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(bench_suite.percentile(values, 0.50), 50)
+        self.assertEqual(bench_suite.percentile(values, 0.99), 99)
+        self.assertEqual(bench_suite.percentile([7], 0.99), 7)
+
+    def test_generate_board_is_repeatable(self):
+        first = list(bench_suite.generate_board(200))
+        self.assertEqual(first, list(bench_suite.generate_board(200)))
+        self.assertNotEqual(first, list(bench_suite.generate_board(200, seed=7)))
+        for task, history in first:
+            # Only tasks moved out of BACKLOG get a history row
+            self.assertEqual(len(history), 0 if task[4] == "BACKLOG" else 1)
+
+    def test_seed_board_fires_triggers(self):
+        tm = TaskManager(os.path.join(self.tmp, "bench.db"), cache_size=0)
+        try:
+            bench_suite.seed_board(tm, 2500)
+            self.assertEqual(sum(tm.count_by_state().values()), 2500)
+            self.assertEqual(tm.check_board_counts(), {})
+            self.assertTrue(tm.search("email"))
+            self.assertEqual(len(tm.get_tasks_by_state(TaskState.DONE)),
+                             tm.count_by_state()[TaskState.DONE])
+        finally:
+            tm.close()
+
+    def test_bench_size_times_every_operation(self):
+        args = argparse.Namespace(ops=5, seconds=0.1, cache_size=0, only=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = bench_suite.bench_size(300, args)
+
+        self.assertEqual(set(result["operations"]), {
+            "create_task", "update_task_state", "get_tasks_by_state",
+            "get_all_tasks", "get_workload_summary", "delete_task",
+        })
+        for name, row in result["operations"].items():
+            self.assertEqual(row["calls"], 5, name)
+            self.assertGreater(row["ops_per_sec"], 0, name)
+            self.assertLessEqual(row["p50_ms"], row["p99_ms"], name)
+
+    def test_compare(self):
+        row = {"ops_per_sec": 100.0, "p99_ms": 2.0}
+        previous = {"commit": "old", "sizes": {"1000": {"operations": {"create_task": row}}}}
+        path = os.path.join(self.tmp, "old.json")
+        with open(path, "w") as f:
+            json.dump(previous, f)
+
+        current = {"commit": "new", "sizes": {"1000": {"operations": {
+            "create_task": {"ops_per_sec": 150.0, "p99_ms": 1.0},
+            "delete_task": {"ops_per_sec": 10.0, "p99_ms": 1.0},  # Not in the old file
+        }}}}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            bench_suite.compare(path, current)
+        lines = output.getvalue().splitlines()
+        self.assertIn("create_task", lines[-1])
+        self.assertIn("+50.0%", lines[-1])
+        self.assertIn("-50.0%", lines[-1])
+        self.assertNotIn("delete_task", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+Upgrading a pre-migrations tasks.db
+Builds a database with the original schema (TEXT ISO timestamps, TASK- IDs, no schema_version),
+opens it with TaskManager and checks that every migration kept the data and filled the derived tables
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import MIGRATIONS, migrate  # noqa: E402
+from task_ids import is_time_ordered  # noqa: E402
+from task_manager import TaskManager, TaskState  # noqa: E402
+
+# The schema TaskManager.init_db created before migrations.py existed
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        agent TEXT NOT NULL,
+        state TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        parent_task TEXT,
+        tags TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id TEXT NOT NULL,
+        field TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        changed_at TEXT NOT NULL,
+        FOREIGN KEY (task_id) REFERENCES tasks(id)
+    )
+    """,
+]
+
+CREATED = datetime(2025, 3, 3, 10, 0)
+
+# id, title, agent, state, priority, parent_task, tags
+LEGACY_TASKS = [
+    ("TASK-0A1B2C3D", "Sync engine epic", "engineer", "IN_PROGRESS", "P1", None, ["sync"]),
+    ("TASK-1F2E3D4C", "Fix email sync timeout", "engineer", "DONE", "P0", "TASK-0A1B2C3D", []),
+    ("TASK-9ABCDEF0", "Design sync settings", "designer", "REVIEW", "P2", "TASK-0A1B2C3D", ["ios"]),
+    ("TASK-77777777", "Write release notes", "docs", "BACKLOG", "P3", None, []),
+]
+
+
+class LegacyMigrationTest(unittest.TestCase):
+    """A database from before migrations opens, upgrades and behaves like a new one"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "tasks.db")
+
+        conn = sqlite3.connect(self.db_path)
+        for statement in LEGACY_SCHEMA:
+            conn.execute(statement)
+        for i, (task_id, title, agent, state, priority, parent, tags) in enumerate(LEGACY_TASKS):
+            created = CREATED + timedelta(days=i)
+            conn.execute(
+                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (task_id, title, f"{title} details", agent, state, priority,
+                 created.isoformat(), (created + timedelta(days=2)).isoformat(),
+                 parent, json.dumps(tags))
+            )
+            if state != "BACKLOG":
+                path = ["BACKLOG", "IN_PROGRESS"] + ([state] if state != "IN_PROGRESS" else [])
+                for step, (old, new) in enumerate(zip(path, path[1:]), 1):
+                    conn.execute(
+                        "INSERT INTO task_history (task_id, field, old_value, new_value, changed_at) "
+                        "VALUES (?, 'state', ?, ?, ?)",
+                        (task_id, old, new, (created + timedelta(hours=6 * step)).isoformat())
+                    )
+        conn.commit()
+        conn.close()
+
+        self.tm = TaskManager(self.db_path)
+
+    def tearDown(self):
+        self.tm.close()
+        shutil.rmtree(self.tmp)
+
+    def test_schema_reaches_latest_version(self):
+        with self.tm.db.reader() as conn:
+            versions = [row[0] for row in conn.execute("SELECT version FROM schema_version")]
+        self.assertEqual(versions, [version for version, _, _ in MIGRATIONS])
+
+        # Reopening applies nothing twice
+        with self.tm.db.writer() as conn:
+            self.assertEqual(migrate(conn), 0)
+
+    def test_tasks_keep_their_data(self):
+        for task_id, title, agent, state, priority, parent, tags in LEGACY_TASKS:
+            task = self.tm.get_task(task_id)
+            self.assertEqual(
+                (task.title, task.agent, task.state.name, task.priority.name, task.parent_task, task.tags),
+                (title, agent, state, priority, parent, tags)
+            )
+            self.assertEqual(task.version, 1)
+
+        task = self.tm.get_task("TASK-0A1B2C3D")
+        self.assertEqual(task.created_at, CREATED)
+        self.assertEqual(task.updated_at, CREATED + timedelta(days=2))
+        with self.tm.db.reader() as conn:
+            types = conn.execute(
+                "SELECT DISTINCT typeof(created_at), typeof(updated_at) FROM tasks"
+            ).fetchall()
+        self.assertEqual(types, [("integer", "integer")])
+
+    def test_derived_tables_are_filled(self):
+        tm = self.tm
+        self.assertEqual(tm.check_board_counts(), {})
+        self.assertEqual(tm.count_by_state()[TaskState.IN_PROGRESS], 1)
+        self.assertEqual([t.id for t in tm.search("sync timeout")], ["TASK-1F2E3D4C"])
+        self.assertEqual(
+            {t.id for t in tm.get_children("TASK-0A1B2C3D")}, {"TASK-1F2E3D4C", "TASK-9ABCDEF0"}
+        )
+        self.assertEqual(tm.get_progress("TASK-0A1B2C3D"), (1, 2))
+
+        with tm.db.reader() as conn:
+            metrics = dict(conn.execute(
+                "SELECT metric, SUM(count) FROM flow_stats GROUP BY metric"
+            ).fetchall())
+        self.assertEqual(metrics["lead_time"], 1)
+        self.assertEqual(metrics["state:BACKLOG"], 3)
+
+    def test_legacy_ids_work_beside_new_ones(self):
+        tm = self.tm
+        new = tm.create_task("New task", "", "qa", parent_task="TASK-0A1B2C3D")
+        self.assertTrue(is_time_ordered(new.id))
+        self.assertEqual(tm.get_progress("TASK-0A1B2C3D"), (1, 3))
+
+        # Legacy IDs carry no time, so creation-time queries fall back to created_at
+        found = tm.get_tasks_created_between(CREATED + timedelta(days=1), CREATED + timedelta(days=3))
+        self.assertEqual([t.id for t in found], ["TASK-1F2E3D4C", "TASK-9ABCDEF0"])
+        self.assertIn(new.id, [t.id for t in tm.get_tasks_created_between(datetime.now() - timedelta(hours=1))])
+
+    def test_writes_after_upgrade(self):
+        tm = self.tm
+        seq = tm.latest_change_seq()
+        task = tm.transition_state("TASK-77777777", TaskState.PLANNED, expected_version=1)
+        self.assertEqual(task.version, 2)
+
+        changes = tm.changes_since(seq)
+        self.assertEqual(
+            [(c.task_id, c.old_state, c.new_state) for c in changes],
+            [("TASK-77777777", TaskState.BACKLOG, TaskState.PLANNED)]
+        )
+        self.assertEqual(tm.check_board_counts(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
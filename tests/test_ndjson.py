@@ -0,0 +1,125 @@
+"""
+NDJSON export and import
+Round-trips a board through export_ndjson/import_ndjson and checks the tasks, their
+history and the derived flow_stats, including replaced tasks and history merged out of order
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import task_manager  # noqa: E402
+from task_manager import TaskManager, TaskPriority, TaskState  # noqa: E402
+
+FLOW_SQL = "SELECT week, metric, agent, priority, bucket, count, round(hours, 6) FROM flow_stats"
+
+
+class FakeClock:
+    """Stands in for task_manager.datetime so transitions are hours apart"""
+    now_value = datetime(2025, 5, 5, 9, 0)
+
+    class datetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return FakeClock.now_value
+
+
+class NdjsonTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.real_datetime = task_manager.datetime
+        task_manager.datetime = FakeClock.datetime
+        FakeClock.now_value = datetime(2025, 5, 5, 9, 0)
+        self.source = TaskManager(os.path.join(self.tmp, "source.db"))
+        self.target = TaskManager(os.path.join(self.tmp, "target.db"))
+        self.path = os.path.join(self.tmp, "board.ndjson")
+
+        self.tasks = [
+            self.source.create_task(f"task {i}", f"details {i}", "engineer", TaskPriority.P1)
+            for i in range(4)
+        ]
+        for state in (TaskState.IN_PROGRESS, TaskState.REVIEW, TaskState.DONE):
+            for task in self.tasks:
+                self.tick(hours=5)
+                self.source.transition_state(task.id, state)
+
+    def tearDown(self):
+        task_manager.datetime = self.real_datetime
+        self.source.close()
+        self.target.close()
+        shutil.rmtree(self.tmp)
+
+    def tick(self, hours: float):
+        FakeClock.now_value += timedelta(hours=hours)
+
+    def flow_stats(self, tm: TaskManager) -> set:
+        with tm.db.reader() as conn:
+            return set(conn.execute(FLOW_SQL))
+
+    def assert_flow_stats_rebuilt(self, tm: TaskManager):
+        """flow_stats equals a rebuild from the history now in tm"""
+        incremental = self.flow_stats(tm)
+        tm.rebuild_flow_stats()
+        self.assertEqual(incremental, self.flow_stats(tm))
+
+    def test_round_trip(self):
+        exported = self.source.export_ndjson(self.path)
+        stats = self.target.import_ndjson(self.path)
+        self.assertEqual(stats, {"tasks": 4, "skipped": 0, "history": exported["history"]})
+        self.assertEqual(
+            [t.to_dict() for t in self.target.get_all_tasks()],
+            [t.to_dict() for t in self.source.get_all_tasks()]
+        )
+        self.assertEqual(self.flow_stats(self.target), self.flow_stats(self.source))
+
+        # A second import adds nothing
+        self.assertEqual(self.target.import_ndjson(self.path), {"tasks": 0, "skipped": 4, "history": 0})
+        self.assertEqual(self.flow_stats(self.target), self.flow_stats(self.source))
+
+    def test_replace_moves_flow_samples(self):
+        self.source.export_ndjson(self.path)
+        self.target.import_ndjson(self.path)
+
+        # The other side reassigned two tasks
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+        for record in records:
+            if record.get("type", "task") == "task" and record["id"] in (self.tasks[0].id, self.tasks[1].id):
+                record["agent"], record["priority"] = "qa", "P0"
+        with open(self.path, "w") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+
+        stats = self.target.import_ndjson(self.path, replace=True)
+        self.assertEqual((stats["tasks"], stats["history"]), (4, 0))
+        self.assertEqual(self.target.get_task(self.tasks[0].id).agent, "qa")
+        with self.target.db.reader() as conn:
+            lead_times = dict(conn.execute(
+                "SELECT agent || '/' || priority, SUM(count) FROM flow_stats "
+                "WHERE metric = 'lead_time' GROUP BY agent, priority"
+            ))
+        self.assertEqual(lead_times, {"qa/P0": 2, "engineer/P1": 2})
+        self.assert_flow_stats_rebuilt(self.target)
+
+    def test_history_merged_out_of_order(self):
+        self.source.export_ndjson(self.path)
+        self.target.import_ndjson(self.path, include_history=False)
+        # The target moves on before the older history arrives
+        self.tick(hours=30)
+        for task in self.tasks:
+            self.target.transition_state(task.id, TaskState.IN_PROGRESS)
+
+        stats = self.target.import_ndjson(self.path)
+        self.assertEqual(stats["history"], 12)
+        self.assert_flow_stats_rebuilt(self.target)
+
+
+if __name__ == "__main__":
+    unittest.main()
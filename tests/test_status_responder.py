@@ -0,0 +1,119 @@
+"""
+Local answers to status questions
+Checks that plain status questions are answered from the board without the model, and that
+requests to change the board, or anything not fully understood, are left to the model
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_task_manager import AsyncTaskManager  # noqa: E402
+from status_responder import answer_status_question, parse_status_question  # noqa: E402
+from task_manager import TaskManager, TaskPriority, TaskState  # noqa: E402
+
+ACTIVE = "progress,review,blocked"
+OPEN = "backlog,planned,progress,review,blocked"
+
+STATUS_QUESTIONS = {
+    "what's blocked?": "state:blocked",
+    "What is the designer working on": f"state:{ACTIVE} agent:designer",
+    "what's in review for the engineers": "state:review agent:engineer",
+    "any critical tasks in progress?": "state:progress prio:P0",
+    "show me P0 tasks": f"state:{OPEN} prio:P0",
+    "what's done": "state:done",
+    "what's the team working on": f"state:{ACTIVE}",
+    "standup": "standup",
+    "give me an update": "standup",
+    "status update please": "standup",
+    "how busy is everyone": "workload",
+}
+
+# Requests to change the board, phrased around state and agent words
+CHANGE_REQUESTS = [
+    "move the designer task to done",
+    "update the designer task to done",
+    "mark the blocked tasks as done",
+    "set the qa task to P0",
+    "create a task for the designer",
+    "assign the blocked task to qa",
+    "can you move review tasks to done",
+    "close all done tasks",
+    "start the backlog tasks",
+    "update status",
+]
+
+# Questions with words the parser does not understand
+UNCLEAR_QUESTIONS = [
+    "why is login blocked?",
+    "what did the designer finish last week",
+    "hello",
+    "",
+]
+
+
+class ParseStatusQuestionTest(unittest.TestCase):
+    def test_status_questions(self):
+        for message, expected in STATUS_QUESTIONS.items():
+            with self.subTest(message=message):
+                self.assertEqual(parse_status_question(message), expected)
+
+    def test_change_requests_go_to_the_model(self):
+        for message in CHANGE_REQUESTS:
+            with self.subTest(message=message):
+                self.assertIsNone(parse_status_question(message))
+
+    def test_unclear_questions_go_to_the_model(self):
+        for message in UNCLEAR_QUESTIONS:
+            with self.subTest(message=message):
+                self.assertIsNone(parse_status_question(message))
+
+
+class AnswerStatusQuestionTest(unittest.TestCase):
+    """Answers built from a real board"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.tm = tm = TaskManager(os.path.join(self.tmp, "tasks.db"))
+        self.store = AsyncTaskManager(tm)
+        login = tm.create_task("Fix login crash", "", "engineer", TaskPriority.P0)
+        mockups = tm.create_task("Settings mockups", "", "designer")
+        tm.create_task("Write release notes", "", "docs")
+        tm.transition_state(login.id, TaskState.BLOCKED)
+        tm.transition_state(mockups.id, TaskState.IN_PROGRESS)
+
+    def tearDown(self):
+        self.store.shutdown()  # Closes the TaskManager too
+        shutil.rmtree(self.tmp)
+
+    def answer(self, message: str):
+        return asyncio.run(answer_status_question(self.store, message))
+
+    def test_filtered_answer(self):
+        answer = self.answer("what's blocked?")
+        self.assertIn("Fix login crash", answer)
+        self.assertIn("(1)", answer)
+        self.assertNotIn("Settings mockups", answer)
+        self.assertEqual(self.answer("what's in review"), "Nothing in review right now.")
+
+    def test_standup_and_workload(self):
+        standup = self.answer("standup")
+        self.assertIn("Settings mockups", standup)
+        self.assertIn("Fix login crash", standup)
+        self.assertNotIn("release notes", standup)
+        self.assertIn("Team Workload", self.answer("how busy is everyone"))
+
+    def test_change_request_is_not_answered(self):
+        self.assertIsNone(self.answer("move the blocked task to done"))
+        self.assertEqual(self.tm.count_by_state()[TaskState.BLOCKED], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
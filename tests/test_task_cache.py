@@ -0,0 +1,202 @@
+"""
+Task cache
+Checks TaskCache's LRU eviction and list invalidation, and that TaskManager's cached reads
+(including limited and first-page reads) stay correct across writes from this and other processes
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_cache import ALL_KEY, TaskCache, agent_key, state_key  # noqa: E402
+from task_manager import TaskManager, TaskState  # noqa: E402
+
+
+class Item:
+    """Minimal cached object: TaskCache only reads .id"""
+
+    def __init__(self, task_id: str):
+        self.id = task_id
+
+
+def items(*ids):
+    return [Item(task_id) for task_id in ids]
+
+
+class TaskCacheTest(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = TaskCache(max_size=3)
+        for item in items("a", "b", "c"):
+            cache.put(item, cache.generation)
+        cache.get("a")  # Now most recently used
+        cache.put(Item("d"), cache.generation)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([cache.get(task_id).id for task_id in "acd"], ["a", "c", "d"])
+
+    def test_eviction_drops_lists_and_memberships(self):
+        cache = TaskCache(max_size=3)
+        cache.put_list(state_key("REVIEW"), items("a", "b"), cache.generation)
+        cache.put_list(agent_key("qa"), items("b", "c"), cache.generation)
+        cache.get("b")
+        cache.get("c")
+        cache.put(Item("d"), cache.generation)  # Evicts a
+
+        self.assertIsNone(cache.get_list(state_key("REVIEW")))
+        self.assertEqual([t.id for t in cache.get_list(agent_key("qa"))], ["b", "c"])
+        self.assertNotIn("a", cache._memberships)
+        self.assertEqual(cache._memberships["b"], {agent_key("qa")})
+
+        # Memberships never outgrow the cached tasks
+        for i in range(100):
+            cache.put_list(("agent", f"a{i}"), items(f"t{i}"), cache.generation)
+        self.assertLessEqual(len(cache._memberships), 3)
+
+    def test_invalidate_drops_every_list_with_the_task(self):
+        cache = TaskCache()
+        cache.put_list(ALL_KEY, items("a", "b", "c"), cache.generation)
+        cache.put_list(state_key("DONE"), items("b"), cache.generation)
+        cache.put_list(agent_key("qa"), items("c"), cache.generation)
+
+        cache.invalidate(["b"], [agent_key("designer")])
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get_list(ALL_KEY))
+        self.assertIsNone(cache.get_list(state_key("DONE")))
+        self.assertEqual([t.id for t in cache.get_list(agent_key("qa"))], ["c"])
+        self.assertNotIn("b", cache._memberships)
+
+        cache.invalidate([], [agent_key("qa")])
+        self.assertIsNone(cache.get_list(agent_key("qa")))
+        self.assertEqual(cache._memberships, {})
+
+    def test_stale_generation_is_not_cached(self):
+        cache = TaskCache()
+        generation = cache.generation
+        cache.invalidate(["a"])  # A write lands while the read is in flight
+        cache.put(Item("a"), generation)
+        cache.put_list(ALL_KEY, items("a"), generation)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get_list(ALL_KEY))
+
+    def test_prefixes(self):
+        cache = TaskCache()
+        key = state_key("REVIEW")
+        cache.put_list(key, items("a", "b", "c"), cache.generation, complete=False)
+
+        self.assertEqual([t.id for t in cache.get_list(key, 2)], ["a", "b"])
+        self.assertEqual(len(cache.get_list(key, 3)), 3)
+        self.assertIsNone(cache.get_list(key, 4))
+        self.assertIsNone(cache.get_list(key))
+
+        # A shorter prefix never replaces a longer one or the full result
+        cache.put_list(key, items("a"), cache.generation, complete=False)
+        self.assertEqual(len(cache.get_list(key, 3)), 3)
+        cache.put_list(key, items("a", "b", "c", "d"), cache.generation)
+        cache.put_list(key, items("a", "b"), cache.generation, complete=False)
+        self.assertEqual(len(cache.get_list(key)), 4)
+
+    def test_disabled(self):
+        cache = TaskCache(max_size=0)
+        cache.put(Item("a"), cache.generation)
+        cache.put_list(ALL_KEY, items("a"), cache.generation)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get_list(ALL_KEY))
+
+
+class CachedReadsTest(unittest.TestCase):
+    """TaskManager reads served from the cache match the database"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "tasks.db")
+        self.tm = TaskManager(self.db_path)
+        self.tasks = [self.tm.create_task(f"task {i}", "", "engineer") for i in range(12)]
+        for task in self.tasks[:6]:
+            self.tm.transition_state(task.id, TaskState.REVIEW)
+
+    def tearDown(self):
+        self.tm.close()
+        shutil.rmtree(self.tmp)
+
+    def assert_served_from_cache(self, read):
+        """read() twice; the second call must hit the cache and return the same tasks"""
+        first = [t.id for t in read()]
+        hits = self.tm.cache.hits
+        self.assertEqual([t.id for t in read()], first)
+        self.assertGreater(self.tm.cache.hits, hits)
+        return first
+
+    def test_limited_reads_fill_the_cache(self):
+        tm = self.tm
+        top = self.assert_served_from_cache(lambda: tm.get_tasks_by_state(TaskState.REVIEW, limit=5))
+        self.assertEqual(len(top), 5)
+        self.assertEqual(top, [t.id for t in tm.get_tasks_by_state(TaskState.REVIEW)][:5])
+
+        # A state with fewer tasks than the limit is cached in full
+        tm.get_tasks_by_state(TaskState.BACKLOG, limit=50)
+        hits = tm.cache.hits
+        self.assertEqual(len(tm.get_tasks_by_state(TaskState.BACKLOG)), 6)
+        self.assertGreater(tm.cache.hits, hits)
+
+    def test_first_page_is_cached(self):
+        tm = self.tm
+        self.assert_served_from_cache(lambda: tm.get_tasks_page(limit=10)[0])
+        tasks, next_cursor, prev_cursor = tm.get_tasks_page(limit=10)
+        self.assertIsNone(prev_cursor)
+        rest, _, _ = tm.get_tasks_page(after_cursor=next_cursor, limit=10)
+        self.assertEqual([t.id for t in tasks + rest], [t.id for t in tm.get_all_tasks()])
+
+    def test_writes_invalidate_cached_reads(self):
+        tm = self.tm
+        tm.get_tasks_by_state(TaskState.REVIEW, limit=3)
+        tm.get_tasks_page(limit=3)
+        moved = tm.transition_state(self.tasks[0].id, TaskState.DONE)
+
+        review = [t.id for t in tm.get_tasks_by_state(TaskState.REVIEW, limit=10)]
+        self.assertNotIn(moved.id, review)
+        self.assertEqual(len(review), 5)
+        self.assertEqual(tm.get_tasks_page(limit=3)[0][0].id, moved.id)
+
+    def test_other_process_writes(self):
+        tm = self.tm
+        task_id = self.tasks[7].id
+        self.assertEqual(tm.get_task(task_id).state, TaskState.BACKLOG)
+        tm.get_tasks_by_state(TaskState.BACKLOG, limit=10)
+        tm.get_tasks_page(limit=5)
+
+        other = TaskManager(self.db_path)  # Another process on the same database
+        try:
+            other.transition_state(task_id, TaskState.BLOCKED)
+            added = other.create_task("from the other process", "", "qa")
+        finally:
+            other.close()
+
+        self.assertEqual(tm.get_task(task_id).state, TaskState.BLOCKED)
+        self.assertNotIn(task_id, [t.id for t in tm.get_tasks_by_state(TaskState.BACKLOG, limit=10)])
+        self.assertEqual(tm.get_tasks_page(limit=5)[0][0].id, added.id)
+        self.assertEqual(tm.sync_cache(), 0)  # Already caught up
+
+    def test_sync_cache_after_pruned_changes(self):
+        tm = self.tm
+        tm.get_task(self.tasks[0].id)
+        other = TaskManager(self.db_path)
+        try:
+            other.transition_state(self.tasks[0].id, TaskState.DONE)
+            other.create_task("later", "", "qa")
+            other.prune_changes(other.latest_change_seq())  # Drops the first change
+        finally:
+            other.close()
+
+        self.assertEqual(tm.sync_cache(), 1)
+        self.assertIsNone(tm.cache.get(self.tasks[0].id))  # Cleared: a change was missed
+        self.assertEqual(tm.get_task(self.tasks[0].id).state, TaskState.DONE)
+
+
+if __name__ == "__main__":
+    unittest.main()
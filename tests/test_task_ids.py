@@ -0,0 +1,160 @@
+"""
+Task ID generation and worker leases
+Checks that IDs stay ordered and readable, that processes sharing a database lease
+different workers, and that an ID collision can never overwrite an existing task
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import task_ids  # noqa: E402
+import task_manager  # noqa: E402
+from task_ids import TaskIdGenerator, is_time_ordered, normalize_task_id  # noqa: E402
+from task_manager import TaskManager  # noqa: E402
+
+
+class FrozenTime:
+    """Stands in for the time module in task_ids and task_manager"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+class TaskIdGeneratorTest(unittest.TestCase):
+    def test_ids_increase_within_one_millisecond(self):
+        real_time = task_ids.time
+        task_ids.time = FrozenTime(time.time())
+        try:
+            ids = TaskIdGenerator(3)
+            issued = [ids.new_id() for _ in range(3000)]  # Exhausts the sequence twice
+        finally:
+            task_ids.time = real_time
+        self.assertEqual(issued, sorted(set(issued)))
+        self.assertTrue(all(is_time_ordered(task_id) for task_id in issued))
+
+    def test_advance_past(self):
+        ids = TaskIdGenerator(0)
+        stored = TaskIdGenerator(5).new_id()
+        ids.advance_past(stored)
+        ids.advance_past("TASK-1A2B3C4D")  # Legacy IDs are ignored
+        self.assertGreater(ids.new_id(), stored)
+
+    def test_normalize_task_id(self):
+        task_id = TaskIdGenerator(1).new_id()
+        typed = task_id.lower().replace("0", "o").replace("1", "l")
+        self.assertEqual(normalize_task_id(f"  {typed} "), task_id)
+        self.assertEqual(normalize_task_id("task-1a2b3c4d"), "TASK-1A2B3C4D")
+
+    def test_worker_range(self):
+        with self.assertRaises(ValueError):
+            TaskIdGenerator(task_ids.WORKER_COUNT)
+
+
+class WorkerLeaseTest(unittest.TestCase):
+    """Managers on one database never issue the same ID or overwrite each other's tasks"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "tasks.db")
+        self.clock = FrozenTime(time.time())
+        self.real_times = task_ids.time, task_manager.time
+        task_ids.time = task_manager.time = self.clock
+        self.managers = []
+
+    def tearDown(self):
+        for tm in self.managers:
+            tm.close()
+        task_ids.time, task_manager.time = self.real_times
+        shutil.rmtree(self.tmp)
+
+    def open_manager(self) -> TaskManager:
+        tm = TaskManager(self.db_path, cache_size=0)
+        self.managers.append(tm)
+        return tm
+
+    def close_manager(self, tm: TaskManager):
+        self.managers.remove(tm)
+        tm.close()
+
+    def leases(self, tm: TaskManager) -> dict:
+        with tm.db.reader() as conn:
+            return dict(conn.execute("SELECT worker, owner FROM id_workers"))
+
+    def test_managers_lease_different_workers(self):
+        first, second = self.open_manager(), self.open_manager()
+        self.assertNotEqual(first.ids.worker_id, second.ids.worker_id)
+        self.assertEqual(len(self.leases(first)), 2)
+
+        # Same millisecond, different workers: distinct IDs
+        a = first.create_task("A", "", "engineer")
+        b = second.create_task("B", "", "engineer")
+        self.assertNotEqual(a.id, b.id)
+
+    def test_collision_never_overwrites(self):
+        first, second = self.open_manager(), self.open_manager()
+        # Two processes ending up on the same worker in the same millisecond
+        second.ids = TaskIdGenerator(first.ids.worker_id)
+
+        a = first.create_task("A", "", "engineer")
+        b = second.create_task("B", "", "designer")
+        self.assertNotEqual(a.id, b.id)
+        self.assertEqual(first.get_task(a.id).title, "A")
+        self.assertEqual(first.get_task(b.id).title, "B")
+
+    def test_bulk_collision_never_overwrites(self):
+        first, second = self.open_manager(), self.open_manager()
+        second.ids = TaskIdGenerator(first.ids.worker_id)
+
+        existing = [t.id for t in first.create_tasks_bulk(
+            [{"title": f"first {i}", "agent": "qa"} for i in range(5)]
+        )]
+        created = second.create_tasks_bulk(
+            [{"title": f"second {i}", "agent": "qa"} for i in range(5)]
+        )
+        self.assertFalse(set(existing) & {t.id for t in created})
+        titles = {t.title for t in first.get_all_tasks()}
+        self.assertEqual(titles, {f"first {i}" for i in range(5)} | {f"second {i}" for i in range(5)})
+
+    def test_clock_stepping_back_after_restart(self):
+        tm = self.open_manager()
+        before = [tm.create_task(f"task {i}", "", "engineer").id for i in range(3)]
+        self.close_manager(tm)
+
+        self.clock.now -= 3600
+        tm = self.open_manager()
+        after = tm.create_task("after restart", "", "engineer")
+        self.assertGreater(after.id, max(before))
+        self.assertEqual(len(tm.get_all_tasks()), 4)
+
+    def test_leases_are_released_and_recovered(self):
+        first = self.open_manager()
+        worker = first.ids.worker_id
+        self.close_manager(first)
+
+        second = self.open_manager()
+        self.assertEqual(second.ids.worker_id, worker)
+
+        # A lease that lapses (e.g. a suspended process) is taken over, and its
+        # old holder moves to another worker on its next write
+        self.clock.now += task_manager.WORKER_LEASE_SECONDS + 1
+        third = self.open_manager()
+        self.assertEqual(third.ids.worker_id, worker)
+
+        second.create_task("after lapse", "", "engineer")
+        self.assertNotEqual(second.ids.worker_id, worker)
+        self.assertEqual(set(self.leases(second)), {worker, second.ids.worker_id})
+
+
+if __name__ == "__main__":
+    unittest.main()
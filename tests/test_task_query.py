@@ -0,0 +1,142 @@
+"""
+Filter query language
+Checks that compile_query parses /tasks filters, rejects bad ones, and that the compiled
+SQL selects the right tasks on its own, as a search filter and on the archive
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_manager import TaskManager, TaskPriority, TaskState  # noqa: E402
+from task_query import QueryError, compile_query  # noqa: E402
+
+
+class ParseTest(unittest.TestCase):
+    def test_fields_and_aliases(self):
+        query = compile_query("status:progress,review agent:Engineer prio:0,P1 tag:iOS")
+        conditions, params = query.bind()
+        self.assertEqual(conditions[:3], [
+            "state IN (?, ?)", "agent IN (?)", "priority IN (?, ?)"
+        ])
+        self.assertIn("json_each(tags)", conditions[3])
+        self.assertEqual(params, ["IN_PROGRESS", "REVIEW", "engineer", "P0", "P1", "ios"])
+        self.assertFalse(query.counts_from_board)  # tag: needs the tasks table
+        self.assertTrue(compile_query("state:done agent:qa").counts_from_board)
+
+    def test_negation(self):
+        conditions, params = compile_query("-state:done,cancelled -tag:ios").bind()
+        self.assertEqual(conditions[0], "state NOT IN (?, ?)")
+        self.assertTrue(conditions[1].startswith("NOT EXISTS"))
+        self.assertEqual(params, ["DONE", "CANCELLED", "ios"])
+
+    def test_bare_state_and_words(self):
+        query = compile_query('review "email sync" agent:qa')
+        conditions, params = query.bind()
+        self.assertEqual(conditions[:2], ["state = ?", "agent IN (?)"])
+        self.assertIn("tasks_fts MATCH ?", conditions[2])
+        self.assertEqual(params, ["REVIEW", "qa", '"email"* "sync"*'])
+        self.assertFalse(query.counts_from_board)
+
+        # The same query filters the archive through the archive's own index
+        archived, _ = query.bind(table="tasks_archive")
+        self.assertEqual(archived[2],
+                         "tasks_archive.rowid IN (SELECT rowid FROM tasks_archive_fts "
+                         "WHERE tasks_archive_fts MATCH ?)")
+
+    def test_ages_bind_when_run(self):
+        query = compile_query("updated:<7d")
+        now = datetime(2026, 3, 10, 12, 0)
+        conditions, params = query.bind(now)
+        self.assertEqual(conditions, ["updated_at > ?"])
+        later_conditions, later_params = query.bind(now + timedelta(days=1))
+        self.assertEqual(later_params[0] - params[0], 86400 * 10**6)
+        self.assertEqual(compile_query("updated:>2w").bind(now)[0], ["updated_at < ?"])
+
+    def test_errors(self):
+        for text in ("owner:me", "state:finished", "prio:P9", "updated:7d",
+                     "-created:<1d", "agent:", 'title "unclosed'):
+            with self.subTest(text=text), self.assertRaises(QueryError):
+                compile_query(text)
+
+    def test_compiled_queries_are_cached(self):
+        self.assertIs(compile_query("prio:P0 state:progress"), compile_query("prio:P0 state:progress"))
+
+
+class QueryOnBoardTest(unittest.TestCase):
+    """Compiled queries against a real board"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.tm = tm = TaskManager(os.path.join(self.tmp, "tasks.db"), cache_size=0)
+        self.epic = tm.create_task("Email sync epic", "", "engineer", TaskPriority.P1)
+        self.fix = tm.create_subtask(self.epic.id, "Fix email timeout", "IMAP hangs", "engineer")
+        self.design = tm.create_task("Design settings", "email preferences", "designer",
+                                     TaskPriority.P0, tags=["ios"])
+        self.docs = tm.create_task("Write release notes", "", "docs", TaskPriority.P3)
+        tm.transition_state(self.fix.id, TaskState.IN_PROGRESS)
+
+    def tearDown(self):
+        self.tm.close()
+        shutil.rmtree(self.tmp)
+
+    def ids(self, text: str, now: datetime = None) -> set:
+        conditions, params = compile_query(text).bind(now)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.tm.db.reader() as conn:
+            return {row[0] for row in conn.execute(f"SELECT id FROM tasks {where}", params)}
+
+    def test_fields(self):
+        self.assertEqual(self.ids("state:progress"), {self.fix.id})
+        self.assertEqual(self.ids("-agent:engineer,docs"), {self.design.id})
+        self.assertEqual(self.ids("tag:IOS"), {self.design.id})
+        # Subtasks take their parent's priority
+        self.assertEqual(self.ids("prio:P0,P1 -tag:ios"), {self.epic.id, self.fix.id})
+
+    def test_parent(self):
+        self.assertEqual(self.ids(f"parent:{self.epic.id.lower()}"), {self.fix.id})
+        # Top-level tasks (NULL parent) are not children of the epic
+        self.assertEqual(self.ids(f"-parent:{self.epic.id}"),
+                         {self.epic.id, self.design.id, self.docs.id})
+
+    def test_ages(self):
+        everything = {self.epic.id, self.fix.id, self.design.id, self.docs.id}
+        self.assertEqual(self.ids("created:<1h"), everything)
+        self.assertEqual(self.ids("created:>1h"), set())
+        later = datetime.now() + timedelta(days=2)
+        self.assertEqual(self.ids("created:>1d", now=later), everything)
+        self.assertEqual(self.ids("updated:<1d", now=later), set())
+        self.assertEqual(self.ids("updated:>1d", now=later), everything)
+
+    def test_words_with_fields(self):
+        self.assertEqual(self.ids("email"), {self.epic.id, self.fix.id, self.design.id})
+        self.assertEqual(self.ids("email agent:engineer -state:progress"), {self.epic.id})
+        self.assertEqual(self.tm.count_tasks({'query': compile_query("emai prio:P0")}), 1)
+
+    def test_query_as_search_filter(self):
+        tm = self.tm
+        found = tm.search("email", filters={'query': compile_query("email agent:engineer")})
+        self.assertEqual({t.id for t in found}, {self.epic.id, self.fix.id})
+
+        tm.transition_state(self.design.id, TaskState.DONE)
+        with tm.db.writer() as conn:
+            conn.execute("UPDATE tasks SET updated_at = updated_at - 90 * 86400000000 WHERE id = ?",
+                         (self.design.id,))
+        self.assertEqual(tm.archive_closed_tasks(), 1)
+
+        # Words in the filter match each table's own index
+        filters = {'query': compile_query("settings agent:designer")}
+        self.assertEqual(tm.search("email", filters=filters), [])
+        found = tm.search("email", filters=filters, include_archived=True)
+        self.assertEqual([t.id for t in found], [self.design.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
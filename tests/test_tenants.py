@@ -0,0 +1,83 @@
+"""
+Per-user shards
+Checks that a shard which fails part-way through opening closes its database connections
+instead of leaking their file descriptors
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import task_manager  # noqa: E402
+import tenants  # noqa: E402
+from task_manager import TaskManager  # noqa: E402
+
+
+def open_files(path: str) -> int:
+    """File descriptors this process holds on a database, its -wal or its -shm"""
+    fd_dir = "/proc/self/fd"
+    count = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)).startswith(path):
+                count += 1
+        except OSError:
+            pass  # The fd listing itself, closed since listdir
+    return count
+
+
+@unittest.skipUnless(os.path.isdir("/proc/self/fd"), "needs /proc to count open files")
+class FailedOpenTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "tasks_1.db")
+        TaskManager(self.db_path).close()  # An existing, migrated shard
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_tenant_closes_its_task_manager(self):
+        real_cache = tenants.ResponseCache
+
+        def broken_cache(tm):
+            raise RuntimeError("response cache failed")
+
+        tenants.ResponseCache = broken_cache
+        try:
+            with self.assertRaises(RuntimeError):
+                tenants.Tenant(1, {"telegram_user_id": 1}, self.db_path,
+                               max_readers=2, cache_size=10)
+        finally:
+            tenants.ResponseCache = real_cache
+        self.assertEqual(open_files(self.db_path), 0)
+
+        # The shard opens normally once the fault is gone
+        tenant = tenants.Tenant(1, {"telegram_user_id": 1}, self.db_path,
+                                max_readers=2, cache_size=10)
+        self.assertGreater(open_files(self.db_path), 0)
+        tenant.close()
+        self.assertEqual(open_files(self.db_path), 0)
+
+    def test_task_manager_closes_its_pool(self):
+        real_migrate = task_manager.migrate
+
+        def broken_migrate(conn):
+            raise RuntimeError("migration failed")
+
+        task_manager.migrate = broken_migrate
+        try:
+            with self.assertRaises(RuntimeError):
+                TaskManager(self.db_path)
+        finally:
+            task_manager.migrate = real_migrate
+        self.assertEqual(open_files(self.db_path), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
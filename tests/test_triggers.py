@@ -0,0 +1,186 @@
+"""
+Trigger-maintained tables against their rebuilds
+Drives a board through random creates, moves, deletes, archives and restores, then checks
+the trigger-maintained tables against a full recompute
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import task_manager  # noqa: E402
+from task_manager import TaskManager, TaskPriority, TaskState  # noqa: E402
+
+AGENTS = ["engineer", "designer", "qa"]
+
+
+class FakeClock:
+    """Stands in for task_manager.datetime so history spans weeks in a fast test"""
+    now_value = datetime(2025, 1, 6, 9, 0)
+
+    class datetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return FakeClock.now_value
+
+
+class TriggerEquivalenceTest(unittest.TestCase):
+    """Every trigger-maintained table equals its rebuild after random operations"""
+
+    STEPS = 1500
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.real_datetime = task_manager.datetime
+        task_manager.datetime = FakeClock.datetime
+        FakeClock.now_value = datetime(2025, 1, 6, 9, 0)
+        self.tm = TaskManager(os.path.join(self.tmp, "tasks.db"), cache_size=0)
+
+    def tearDown(self):
+        task_manager.datetime = self.real_datetime
+        self.tm.close()
+        shutil.rmtree(self.tmp)
+
+    def run_random_operations(self, seed: int):
+        """Apply STEPS random writes, advancing the clock between them"""
+        rng = random.Random(seed)
+        tm = self.tm
+        active, archived = [], []
+
+        for _ in range(self.STEPS):
+            FakeClock.now_value += timedelta(minutes=rng.randint(1, 3000))
+            roll = rng.random()
+
+            if roll < 0.2 or not active:
+                task = tm.create_task(
+                    f"task {len(active)}", "", rng.choice(AGENTS),
+                    priority=rng.choice(list(TaskPriority))
+                )
+                active.append(task.id)
+            elif roll < 0.3:
+                parent = tm.create_subtask(rng.choice(active), "subtask", "", rng.choice(AGENTS))
+                if parent:
+                    active.append(parent.id)
+            elif roll < 0.75:
+                tm.transition_state(rng.choice(active), rng.choice(list(TaskState)))
+            elif roll < 0.8:
+                self.reassign(rng.choice(active), rng.choice(AGENTS), rng.choice(list(TaskPriority)))
+            elif roll < 0.87:
+                try:
+                    tm.set_parent(rng.choice(active), rng.choice(active + [None]))
+                except ValueError:
+                    pass  # Would create a cycle
+            elif roll < 0.94:
+                task_id = rng.choice(active)
+                tm.delete_task(task_id)
+                active.remove(task_id)
+            elif roll < 0.98:
+                moved = tm.archive_closed_tasks(older_than_days=rng.randint(1, 20))
+                if moved:
+                    with tm.db.reader() as conn:
+                        archived = [row[0] for row in conn.execute("SELECT id FROM tasks_archive")]
+                    active = [task_id for task_id in active if task_id not in archived]
+            elif archived:
+                task_id = archived.pop(rng.randrange(len(archived)))
+                if tm.restore_archived_task(task_id):
+                    active.append(task_id)
+
+    def reassign(self, task_id: str, agent: str, priority: TaskPriority):
+        """Hand a task to another agent and priority, as an edit does"""
+        task = self.tm.get_task(task_id)
+        task.agent, task.priority = agent, priority
+        self.tm._save_task(task)
+
+    def snapshot(self, sql: str) -> dict:
+        """Rows keyed by every column but the last, values rounded for float sums"""
+        with self.tm.db.reader() as conn:
+            return {
+                row[:-1]: round(row[-1], 6) if isinstance(row[-1], float) else row[-1]
+                for row in conn.execute(sql)
+            }
+
+    def assert_rebuild_matches(self, sql: str, rebuild):
+        """The table read by sql is unchanged by running rebuild()"""
+        incremental = self.snapshot(sql)
+        rebuild()
+        rebuilt = self.snapshot(sql)
+        diff = {
+            key: (incremental.get(key), rebuilt.get(key))
+            for key in incremental.keys() | rebuilt.keys()
+            if incremental.get(key) != rebuilt.get(key)
+        }
+        self.assertEqual(diff, {}, "trigger output (left) differs from the rebuild (right)")
+
+    def test_board_counts(self):
+        self.run_random_operations(seed=1)
+        self.assertEqual(self.tm.check_board_counts(), {})
+
+    def test_hierarchy(self):
+        self.run_random_operations(seed=2)
+        self.assert_rebuild_matches(
+            "SELECT ancestor, descendant, depth FROM task_tree", self.tm.rebuild_hierarchy
+        )
+        self.assert_rebuild_matches(
+            "SELECT task_id, state, count FROM task_rollups WHERE count > 0",
+            self.tm.rebuild_hierarchy
+        )
+
+    def test_flow_stats(self):
+        for seed in (3, 4, 5):
+            with self.subTest(seed=seed):
+                self.run_random_operations(seed)
+                for column in ("count", "hours"):
+                    self.assert_rebuild_matches(
+                        f"SELECT week, metric, agent, priority, bucket, {column} FROM flow_stats",
+                        self.tm.rebuild_flow_stats
+                    )
+
+    def test_flow_stats_drop_deleted_tasks(self):
+        tm = self.tm
+        task = tm.create_task("short lived", "", "engineer")
+        FakeClock.now_value += timedelta(hours=5)
+        tm.transition_state(task.id, TaskState.IN_PROGRESS)
+        FakeClock.now_value += timedelta(hours=5)
+        tm.transition_state(task.id, TaskState.DONE)
+        self.assertTrue(self.snapshot("SELECT metric, count FROM flow_stats"))
+
+        tm.delete_task(task.id)
+        self.assertEqual(self.snapshot("SELECT metric, count FROM flow_stats"), {})
+
+    def test_flow_stats_follow_reassigned_tasks(self):
+        tm = self.tm
+        tasks = [tm.create_task(f"task {i}", "", "engineer") for i in range(3)]
+        for state in (TaskState.IN_PROGRESS, TaskState.REVIEW, TaskState.DONE):
+            FakeClock.now_value += timedelta(hours=7)
+            for task in tasks:
+                tm.transition_state(task.id, state)
+
+        # Reassigned after their samples were filed, then deleted or archived
+        self.reassign(tasks[0].id, "designer", TaskPriority.P0)
+        self.reassign(tasks[1].id, "qa", TaskPriority.P3)
+        tm.delete_task(tasks[0].id)
+        FakeClock.now_value += timedelta(days=3)
+        self.assertEqual(tm.archive_closed_tasks(older_than_days=1), 2)
+
+        with tm.db.reader() as conn:
+            owners = {row[0] for row in conn.execute("SELECT DISTINCT agent FROM flow_stats")}
+            negative = conn.execute("SELECT COUNT(*) FROM flow_stats WHERE count < 0").fetchone()[0]
+        self.assertEqual(owners, {"engineer", "qa"})
+        self.assertEqual(negative, 0)
+        for column in ("count", "hours"):
+            self.assert_rebuild_matches(
+                f"SELECT week, metric, agent, priority, bucket, {column} FROM flow_stats",
+                tm.rebuild_flow_stats
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,13 +6,16 @@ Syncs tasks and agents between August and Vibe Kanban
 import requests
 import json
 from typing import List, Dict, Optional
-from task_manager import TaskManager, TaskState, TaskPriority
+from task_manager import Task, TaskManager, TaskState, TaskPriority
 from agents import get_all_agents, get_agent
 
 # Vibe Kanban configuration
 VIBE_BASE_URL = "http://127.0.0.1:52822/api"
 VIBE_PROJECT_ID = "04818b0a-f69b-42c0-858a-4c9132723523"  # Lovemail project
 
+# Tasks read per page when pushing to Vibe; no database connection is held during the HTTP calls
+VIBE_PUSH_PAGE_SIZE = 100
+
 
 class VibeKanbanClient:
     """Client for interacting with Vibe Kanban API"""
@@ -115,8 +118,8 @@ class VibeKanbanClient:
 class VibeAugustSync:
     """Syncs tasks and agents between Vibe and August"""
 
-    def __init__(self, task_manager: TaskManager):
-        self.vibe = VibeKanbanClient()
+    def __init__(self, task_manager: TaskManager, vibe: Optional[VibeKanbanClient] = None):
+        self.vibe = vibe or VibeKanbanClient()
         self.task_manager = task_manager
         self.state_mapping = self._create_state_mapping()
 
@@ -154,6 +157,22 @@ class VibeAugustSync:
                 "Docs": "docs",
             }
 
+            # Map status to August state
+            status_mapping = {
+                "backlog": TaskState.BACKLOG,
+                "todo": TaskState.PLANNED,
+                "inprogress": TaskState.IN_PROGRESS,
+                "inreview": TaskState.REVIEW,
+                "done": TaskState.DONE,
+                "blocked": TaskState.BLOCKED,
+            }
+
+            # Check if task already exists by title (simple dedup, indexed lookup)
+            existing_titles = self.task_manager.find_existing_titles(
+                [vibe_task.get("title", "Untitled") for vibe_task in vibe_tasks]
+            )
+            new_tasks = []
+
             for vibe_task in vibe_tasks:
                 try:
                     title = vibe_task.get("title", "Untitled")
@@ -161,43 +180,34 @@ class VibeAugustSync:
                     vibe_status = vibe_task.get("status", "backlog")
                     vibe_executor = vibe_task.get("executor", "CODEX")
 
-                    # Map status to August state
-                    status_mapping = {
-                        "backlog": TaskState.BACKLOG,
-                        "todo": TaskState.PLANNED,
-                        "inprogress": TaskState.IN_PROGRESS,
-                        "inreview": TaskState.REVIEW,
-                        "done": TaskState.DONE,
-                        "blocked": TaskState.BLOCKED,
-                    }
-
                     august_state = status_mapping.get(vibe_status.lower(), TaskState.BACKLOG)
                     august_agent = agent_map.get(vibe_executor, "engineer")
 
-                    # Check if task already exists by title (simple dedup)
-                    existing_tasks = self.task_manager.get_all_tasks()
-                    if any(t.title == title for t in existing_tasks):
+                    if title in existing_titles:
                         stats["skipped"] += 1
                         continue
+                    existing_titles.add(title)
 
-                    # Create task in August
-                    task = self.task_manager.create_task(
-                        title=title,
-                        description=description,
-                        agent=august_agent,
-                        priority=TaskPriority.P2,  # Default to P2
-                    )
-
-                    # Update state if not backlog
-                    if august_state != TaskState.BACKLOG:
-                        self.task_manager.update_task_state(task.id, august_state)
-
-                    stats["created"] += 1
+                    new_tasks.append({
+                        "title": title,
+                        "description": description,
+                        "agent": august_agent,
+                        "priority": TaskPriority.P2,  # Default to P2
+                        "state": august_state,
+                    })
 
                 except Exception as e:
                     print(f"Error syncing task {vibe_task.get('title')}: {e}")
                     stats["errors"] += 1
 
+            # Create all new tasks (and their state history) in one transaction
+            try:
+                created = self.task_manager.create_tasks_bulk(new_tasks)
+                stats["created"] += len(created)
+            except Exception as e:
+                print(f"Error creating imported tasks: {e}")
+                stats["errors"] += len(new_tasks)
+
         except Exception as e:
             print(f"Sync error: {e}")
             stats["errors"] += 1
@@ -213,27 +223,18 @@ class VibeAugustSync:
         }
 
         try:
-            august_tasks = self.task_manager.get_all_tasks()
-            stats["fetched"] = len(august_tasks)
-
-            for task in august_tasks:
-                try:
-                    # Convert August task to Vibe format
-                    vibe_task = {
-                        "title": task.title,
-                        "description": task.description,
-                        "agent": task.agent,
-                        "status": task.state.display_name.lower(),
-                        "priority": task.priority.name,
-                    }
-
-                    # Try to create in Vibe
-                    result = self.vibe.create_task(vibe_task)
-                    if result:
-                        stats["pushed"] += 1
-                except Exception as e:
-                    print(f"Error pushing task: {e}")
-                    stats["errors"] += 1
+            # Reads the board a page at a time, so a slow push never holds a
+            # reader (and its WAL snapshot) open across HTTP calls
+            cursor = None
+            while True:
+                tasks, cursor, _ = self.task_manager.get_tasks_page(
+                    after_cursor=cursor, limit=VIBE_PUSH_PAGE_SIZE
+                )
+                stats["fetched"] += len(tasks)
+                for task in tasks:
+                    self._push_task(task, stats)
+                if cursor is None:
+                    break
 
         except Exception as e:
             print(f"Push error: {e}")
@@ -241,17 +242,35 @@ class VibeAugustSync:
 
         return stats
 
+    def _push_task(self, task: Task, stats: Dict[str, int]):
+        """Create one August task in Vibe, counting the outcome in stats"""
+        try:
+            # Convert August task to Vibe format
+            vibe_task = {
+                "title": task.title,
+                "description": task.description,
+                "agent": task.agent,
+                "status": task.state.display_name.lower(),
+                "priority": task.priority.name,
+            }
+
+            # Try to create in Vibe
+            result = self.vibe.create_task(vibe_task)
+            if result:
+                stats["pushed"] += 1
+        except Exception as e:
+            print(f"Error pushing task: {e}")
+            stats["errors"] += 1
+
     def get_sync_status(self) -> Dict:
         """Get sync status and health"""
         try:
             projects = self.vibe.get_projects()
             vibe_tasks = self.vibe.get_tasks()
-            august_tasks = self.task_manager.get_all_tasks()
-
             return {
                 "vibe_online": len(projects) > 0,
                 "vibe_tasks": len(vibe_tasks),
-                "august_tasks": len(august_tasks),
+                "august_tasks": self.task_manager.count_tasks(),
                 "projects": projects,
             }
         except Exception as e: